@@ -40,6 +40,9 @@ class SistemaEstoqueGUI:
         self.arquivo_gerado = tk.StringVar()
         self.data_venda = tk.StringVar(value=(datetime.now() - timedelta(days=1)).strftime('%d/%m/%y'))
         
+        # Agente reutilizado entre consultas (histórico fica em memória)
+        self.agente = None
+        
         # Criar interface
         self.criar_interface()
         
@@ -172,7 +175,7 @@ class SistemaEstoqueGUI:
         
         # Info
         info = ttk.Label(frame, 
-                        text="Executa tratamento_abc.py: filtra dados, salva Excel e atualiza histórico Parquet",
+                        text="Executa tratamento_abc.py: filtra dados, salva resultado e atualiza histórico Parquet",
                         style='Info.TLabel')
         info.grid(row=2, column=0, columnspan=3, pady=(5, 0))
     
@@ -412,10 +415,9 @@ class SistemaEstoqueGUI:
         
         def executar():
             try:
-                # Executa tratamento_abc.py com data
+                # Executa tratamento_abc.py com a data como argumento (sem prompt)
                 processo = subprocess.Popen(
-                    [sys.executable, "tratamento_abc.py"],
-                    stdin=subprocess.PIPE,
+                    [sys.executable, "tratamento_abc.py", "--data", data],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     text=True,
@@ -423,8 +425,7 @@ class SistemaEstoqueGUI:
                     errors='replace'
                 )
                 
-                # Envia data
-                stdout, _ = processo.communicate(input=f"{data}\n")
+                stdout, _ = processo.communicate()
                 
                 # Mostra saída
                 self.log(stdout)
@@ -434,7 +435,7 @@ class SistemaEstoqueGUI:
                     self.status_var.set("Vendas processadas com sucesso")
                     messagebox.showinfo("Sucesso", 
                                       "Vendas processadas!\n"
-                                      "- resultado_abc.xlsx gerado\n"
+                                      "- resultado_abc.parquet gerado\n"
                                       "- Histórico Parquet atualizado")
                 else:
                     self.log("[ERRO] Erro no processamento")
@@ -479,7 +480,7 @@ class SistemaEstoqueGUI:
                 self.log("[INFO] Aplicando estratégias de balanceamento...")
                 
                 processo1 = subprocess.Popen(
-                    [sys.executable, "scripts/atualizar_simples.py"],
+                    [sys.executable, "scripts/atualizar_simples.py", "--excel"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -511,7 +512,7 @@ class SistemaEstoqueGUI:
                 self.log("\n=== ETAPA 2: Analisando Estratégias ===")
                 
                 processo2 = subprocess.Popen(
-                    [sys.executable, "scripts/analisar_estrategias.py"],
+                    [sys.executable, "scripts/analisar_estrategias.py", "--excel"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -578,7 +579,7 @@ class SistemaEstoqueGUI:
         def executar():
             try:
                 processo = subprocess.Popen(
-                    [sys.executable, "scripts/atualizar_simples.py"],
+                    [sys.executable, "scripts/atualizar_simples.py", "--excel"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -631,7 +632,7 @@ class SistemaEstoqueGUI:
         def executar():
             try:
                 processo = subprocess.Popen(
-                    [sys.executable, "scripts/analisar_estrategias.py"],
+                    [sys.executable, "scripts/analisar_estrategias.py", "--excel"],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -723,11 +724,12 @@ class SistemaEstoqueGUI:
                 
                 # Capturar prints do agente durante inicialização e consulta
                 with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                    agente = AgenteEstoque(usar_historico=True)
+                    if self.agente is None:
+                        self.agente = AgenteEstoque(usar_historico=True)
+                    agente = self.agente
                     
-                    # Forçar recarregamento do histórico para pegar dados mais recentes
-                    if agente.analisador:
-                        agente.analisador.recarregar()
+                    # Só relê o histórico se houve importação desde a última consulta
+                    if agente.analisador and agente.analisador.recarregar():
                         print("[INFO] Histórico recarregado do disco")
                     
                     resposta = agente.consulta_livre(pergunta)
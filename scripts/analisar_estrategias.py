@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import argparse
 import sys
 import io
+import os
 import pandas as pd
 
 # Configurar stdout para UTF-8 no Windows
@@ -9,47 +11,78 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# Carrega dados do arquivo de sugestões gerado
-df = pd.read_excel('data/sugestao_ia.xlsx')
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.banco_vendas import formatar_codigo, formatar_loja
+from src.etapas_pipeline import (
+    ARQUIVO_ANALISE_ESTRATEGIAS,
+    ARQUIVO_SUGESTOES,
+    caminho_excel,
+    gravar_etapa,
+    ler_etapa,
+)
+from src.exportacao_excel import exportar_excel
+
+# Rótulos de estrategia_usada (src/estrategia_pedido.py)
+DESCRICAO_ESTRATEGIAS = {
+    'comprador': "[OK] COMPRADOR (valores adequados)",
+    'giro_otimizado': "[AJUSTE] GIRO_OTIMIZADO (valores do comprador fora de 4-6 dias)",
+    'giro_saudavel': "[PADRÃO] GIRO_SAUDAVEL (sem valores do comprador)",
+}
+
+parser = argparse.ArgumentParser(description="Análise das estratégias aplicadas na sugestão")
+parser.add_argument('--excel', action='store_true',
+                    help=f"Gera também {caminho_excel(ARQUIVO_ANALISE_ESTRATEGIAS)} para os compradores")
+parser.add_argument('--verboso', action='store_true', help="Imprime o detalhe de cada produto")
+args = parser.parse_args()
+
+# Carrega o resultado de atualizar_simples.py (estratégia e coberturas já calculadas)
+df = ler_etapa(ARQUIVO_SUGESTOES)
+if df is None:
+    print(f"[ERRO] {ARQUIVO_SUGESTOES} não encontrado. Execute scripts/atualizar_simples.py primeiro.")
+    sys.exit(1)
+if 'estrategia_usada' not in df.columns:
+    print(f"[ERRO] {ARQUIVO_SUGESTOES} sem a coluna estrategia_usada. Execute scripts/atualizar_simples.py novamente.")
+    sys.exit(1)
 
 print("="*70)
 print("ANÁLISE DETALHADA - ESTRATÉGIA DE BALANCEAMENTO")
 print("="*70)
 print()
 
-for idx, row in df.iterrows():
-    print(f"[{idx+1}] Produto: {row['codigo_interno']} | Loja: {row['loja']}")
-    print(f"    Estoque atual: {row['estoque']} un")
-    print(f"    Ponto de pedido: {row['ponto_pedido']} un")
-    print(f"    Estoque ideal: {row['estoque_ideal']} un")
-    
-    # Calcular venda média com base na quantidade vendida
-    quantidade_vendida = float(row['quantidade_vendida']) if pd.notna(row['quantidade_vendida']) else 0
-    venda_media_dia = quantidade_vendida / 1  # Dados de 1 dia
-    print(f"    Venda média/dia: {venda_media_dia:.2f} un/dia")
-    
-    # Calcula dias de cobertura dos valores do comprador
-    if pd.notna(row['ponto_pedido']) and pd.notna(row['estoque_ideal']):
-        if venda_media_dia > 0:
-            dias_cobertura_comprador = (row['estoque_ideal'] - row['ponto_pedido']) / venda_media_dia
-            print(f"    Dias cobertura (valores comprador): {dias_cobertura_comprador:.1f} dias")
-        else:
-            dias_cobertura_comprador = float('inf')
-            print(f"    Dias cobertura (valores comprador): infinito (sem vendas)")
-        
-        # Avalia estratégia
-        if 4 <= dias_cobertura_comprador <= 6:
-            estrategia = "[OK] COMPRADOR (valores adequados)"
-        elif dias_cobertura_comprador > 6:
-            estrategia = "[AJUSTE] GIRO_OTIMIZADO (ajustado para baixo)"
-        else:
-            estrategia = "[AJUSTE] GIRO_OTIMIZADO (ajustado para cima)"
-    else:
-        estrategia = "[PADRÃO] GIRO_SAUDAVEL (sem valores do comprador)"
-    
-    print(f"    Estratégia: {estrategia}")
-    print(f"    -> Sugestão: {row['sugestao']:.0f} unidades")
-    print()
+if args.verboso:
+    for posicao, row in enumerate(df.itertuples(index=False)):
+        print(f"[{posicao+1}] Produto: {formatar_codigo(row.codigo_interno)} | Loja: {formatar_loja(row.loja)}")
+        print(f"    Estoque atual: {row.estoque} un")
+        print(f"    Ponto de pedido: {row.ponto_pedido} un")
+        print(f"    Estoque ideal: {row.estoque_ideal} un")
+        print(f"    Venda média/dia: {row.venda_media_dia:.2f} un/dia")
+        if pd.notna(row.dias_cobertura_comprador):
+            if row.venda_media_dia > 0:
+                print(f"    Dias cobertura (valores comprador): {row.dias_cobertura_comprador:.1f} dias")
+            else:
+                print(f"    Dias cobertura (valores comprador): infinito (sem vendas)")
+        print(f"    Estratégia: {DESCRICAO_ESTRATEGIAS.get(row.estrategia_usada, row.estrategia_usada)}")
+        print(f"    Motivo: {row.motivo_sugestao}")
+        print(f"    -> Sugestão: {row.sugestao:.0f} unidades ({row.sugestao_caixas} caixas)")
+        print()
+
+print("POR ESTRATÉGIA")
+print("-"*70)
+por_estrategia = df.groupby('estrategia_usada', sort=False).agg(
+    produtos=('sugestao', 'size'),
+    com_sugestao=('sugestao', lambda sugestao: (sugestao > 0).sum()),
+    unidades=('sugestao', 'sum'),
+    caixas=('sugestao_caixas', 'sum'),
+    cobertura_apos=('dias_cobertura_apos', 'mean'),
+)
+for linha in por_estrategia.sort_values('produtos', ascending=False).itertuples():
+    print(f"{DESCRICAO_ESTRATEGIAS.get(linha.Index, linha.Index)}")
+    print(f"    {linha.produtos:,} produtos, {linha.com_sugestao:,} com sugestão > 0")
+    print(f"    {linha.unidades:,.0f} unidades em {linha.caixas:,.0f} caixas")
+    print(f"    Cobertura média após pedido: {linha.cobertura_apos:.1f} dias")
+print()
 
 print("="*70)
 print("RESUMO GERAL")
@@ -58,36 +91,23 @@ print(f"Total de produtos analisados: {len(df)}")
 print(f"Produtos com sugestão > 0: {len(df[df['sugestao'] > 0])}")
 print(f"Produtos com estoque suficiente: {len(df[df['sugestao'] == 0])}")
 print(f"\nTotal de unidades sugeridas: {df['sugestao'].sum():.0f}")
+if 'unidades_alocadas' in df.columns:
+    print(f"Total de unidades atendidas pelo CD: {df['unidades_alocadas'].sum():.0f} "
+          f"({df.loc[df['corte_cd'] > 0, 'codigo_interno'].nunique()} produtos rateados)")
 
 # Calcular média de venda diária total
 venda_total = df['quantidade_vendida'].sum()
 print(f"Média de venda diária total: {venda_total:.2f} un/dia")
 print("="*70)
 
-# Salvar análise em Excel
+# Salvar análise (mesmas linhas e colunas da sugestão, estratégia em estrategia_usada)
 print("\nGerando arquivo de análise...")
 try:
-    # Adicionar coluna de estratégia ao DataFrame
-    estrategias = []
-    for idx, row in df.iterrows():
-        if pd.notna(row['ponto_pedido']) and pd.notna(row['estoque_ideal']):
-            quantidade_vendida = float(row['quantidade_vendida']) if pd.notna(row['quantidade_vendida']) else 0
-            venda_media = quantidade_vendida / 1
-            if venda_media > 0:
-                dias = (row['estoque_ideal'] - row['ponto_pedido']) / venda_media
-                if 4 <= dias <= 6:
-                    estrategias.append('COMPRADOR')
-                elif dias > 6:
-                    estrategias.append('GIRO_OTIMIZADO_BAIXO')
-                else:
-                    estrategias.append('GIRO_OTIMIZADO_ALTO')
-            else:
-                estrategias.append('SEM_VENDAS')
-        else:
-            estrategias.append('GIRO_SAUDAVEL')
+    gravar_etapa(df, ARQUIVO_ANALISE_ESTRATEGIAS)
+    print(f"[OK] Arquivo salvo: {ARQUIVO_ANALISE_ESTRATEGIAS}")
     
-    df['estrategia_aplicada'] = estrategias
-    df.to_excel('data/analise_estrategias.xlsx', index=False)
-    print("[OK] Arquivo salvo: data/analise_estrategias.xlsx")
+    if args.excel:
+        arquivo_excel = exportar_excel(df, caminho_excel(ARQUIVO_ANALISE_ESTRATEGIAS))
+        print(f"[OK] Arquivo Excel salvo: {arquivo_excel}")
 except Exception as e:
     print(f"[ERRO] Não foi possível salvar análise: {e}")
@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import argparse
+import numpy as np
 import pandas as pd
 import sys
 import io
 import os
-from openpyxl import load_workbook
-from openpyxl.styles import numbers
 
 # Configurar stdout para UTF-8 no Windows
 if sys.platform == 'win32':
@@ -15,110 +15,81 @@ if sys.platform == 'win32':
 # Adiciona diretório raiz ao path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from src.calculador_pedido import CalculadorPedido
+from src.alocacao_cd import alocar_estoque_cd
+from src.banco_vendas import converter_chaves
+from src.calculador_pedido import ARQUIVO_CACHE_SUGESTOES, CalculadorPedido
+from src.etapas_pipeline import (
+    ARQUIVO_RESULTADO_ABC,
+    ARQUIVO_SUGESTOES,
+    caminho_excel,
+    gravar_etapa,
+    ler_etapa,
+)
+from src.exportacao_excel import exportar_excel
+from src.indicadores_vendas import JANELAS_VENDAS, calcular_janelas_vendas, coluna_janela
 
 def main():
     """Função principal para atualização rápida"""
+    parser = argparse.ArgumentParser(description="Calcula a sugestão de pedido do dia importado")
+    parser.add_argument('--excel', action='store_true',
+                        help=f"Gera também {caminho_excel(ARQUIVO_SUGESTOES)} para os compradores")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Processos em paralelo, divididos por loja (padrão: 1; 0 = um por CPU)")
+    parser.add_argument('--recalcular', action='store_true',
+                        help="Recalcula todas as linhas, sem reaproveitar a execução anterior")
+    args = parser.parse_args()
+    
     print("Atualizando coluna sugestao...")
     
-    # Usar resultado_abc.xlsx que foi processado pelo tratamento_abc.py
-    df = pd.read_excel('data/resultado_abc.xlsx')
+    # Resultado do tratamento_abc.py (Parquet, tipos já convertidos)
+    df = ler_etapa(ARQUIVO_RESULTADO_ABC)
+    if df is None:
+        print(f"[ERRO] {ARQUIVO_RESULTADO_ABC} não encontrado. Execute tratamento_abc.py primeiro.")
+        sys.exit(1)
+    df = converter_chaves(df)
     calc = CalculadorPedido(4, 1.2)
-
-    sugestoes = []
-    estrategias = []
-    
-    for _, row in df.iterrows():
-        # Obtém ponto_pedido e estoque_ideal (já estão no resultado_abc.xlsx)
-        ponto_pedido = float(row['ponto_pedido']) if pd.notna(row['ponto_pedido']) else None
-        estoque_ideal = float(row['estoque_ideal']) if pd.notna(row['estoque_ideal']) else None
-        estoque_atual = float(row['estoque']) if pd.notna(row['estoque']) else 0
-        embalagem = int(row['embalagem']) if pd.notna(row['embalagem']) and row['embalagem'] > 0 else 1
-        
-        # Usar quantidade_vendida como proxy para venda_media_dia
-        quantidade_vendida = float(row['quantidade_vendida']) if pd.notna(row['quantidade_vendida']) else 0
-        venda_media_dia = quantidade_vendida  # Dados do dia
-        
-        # Cálculo simplificado sem usar o CalculadorPedido (evita divisão por zero)
-        # Baseado na estratégia de balanceamento: 4-6 dias de cobertura
-        
-        if ponto_pedido and estoque_ideal and venda_media_dia > 0:
-            # Calcular dias de cobertura dos valores do comprador
-            dias_cobertura = (estoque_ideal - ponto_pedido) / venda_media_dia
-            
-            if 4 <= dias_cobertura <= 6:
-                # COMPRADOR: valores adequados
-                if estoque_atual < ponto_pedido:
-                    sugestao = estoque_ideal - estoque_atual
-                else:
-                    sugestao = 0
-                estrategia = 'COMPRADOR'
-            elif dias_cobertura > 6:
-                # GIRO_OTIMIZADO: ajustar para baixo (6 dias)
-                estoque_alvo = ponto_pedido + (venda_media_dia * 6)
-                if estoque_atual < ponto_pedido:
-                    sugestao = estoque_alvo - estoque_atual
-                else:
-                    sugestao = 0
-                estrategia = 'GIRO_OTIMIZADO_BAIXO'
-            else:
-                # GIRO_OTIMIZADO: ajustar para cima (4 dias)
-                estoque_alvo = ponto_pedido + (venda_media_dia * 4)
-                if estoque_atual < ponto_pedido:
-                    sugestao = estoque_alvo - estoque_atual
-                else:
-                    sugestao = 0
-                estrategia = 'GIRO_OTIMIZADO_ALTO'
-        else:
-            # GIRO_SAUDAVEL: usar 4 dias de cobertura
-            if venda_media_dia > 0:
-                estoque_alvo = venda_media_dia * 4
-                if estoque_atual < estoque_alvo:
-                    sugestao = estoque_alvo - estoque_atual
-                else:
-                    sugestao = 0
-            else:
-                sugestao = 0
-            estrategia = 'GIRO_SAUDAVEL'
-        
-        # Arredondar para múltiplo de embalagem
-        if sugestao > 0:
-            sugestao = ((sugestao + embalagem - 1) // embalagem) * embalagem
-        
-        sugestoes.append(int(sugestao))
-        estrategias.append(estrategia)
-
-    df['sugestao'] = sugestoes
-    df['estrategia'] = estrategias
     
-    # codigo_interno e loja já estão padronizados no resultado_abc.xlsx
-    # Apenas garantir que são strings
-    df['codigo_interno'] = df['codigo_interno'].astype(str)
-    df['loja'] = df['loja'].astype(str)
+    # Vendas acumuladas e venda média diária do histórico (dias sem venda = 0)
+    chave = pd.MultiIndex.from_arrays([df['codigo_interno'], df['loja']])
+    data_referencia = df['data_venda'].max() if 'data_venda' in df.columns else None
+    janelas = calcular_janelas_vendas(data_referencia=data_referencia)
+    janelas = janelas.set_index(['codigo_interno', 'loja']).reindex(chave)
+    print(f"Venda média do histórico encontrada para {janelas['venda_media_dia'].notna().sum()} de {len(df)} linhas")
     
-    # Salva em nova planilha
-    arquivo_saida = 'data/sugestao_ia.xlsx'
-    df.to_excel(arquivo_saida, index=False)
+    # Sem histórico, usa a venda do dia como proxy da venda média
+    media_historico = janelas['venda_media_dia'].to_numpy()
+    df['venda_media_dia'] = np.where(np.isnan(media_historico), df['quantidade_vendida'].fillna(0), media_historico)
+    for dias in JANELAS_VENDAS:
+        df[coluna_janela(dias)] = janelas[coluna_janela(dias)].fillna(0).to_numpy()
+    df['estoque_atual'] = df['estoque'].fillna(0)
+    df['embalagem'] = df['embalagem'].where(df['embalagem'] > 0, 1)
     
-    # Força formato texto nas colunas codigo_interno e loja usando openpyxl
-    wb = load_workbook(arquivo_saida)
-    ws = wb.active
+    # Estratégia de balanceamento (src/estrategia_pedido.py) em todas as linhas de uma vez
+    # Só as linhas com estoque, vendas ou parâmetros do comprador alterados são recalculadas
+    df = calc.processar_dataframe(
+        df,
+        processos=args.processos,
+        arquivo_cache=None if args.recalcular else ARQUIVO_CACHE_SUGESTOES
+    ).drop(columns=['estoque_atual'])
     
-    # Identifica as colunas
-    headers = [cell.value for cell in ws[1]]
-    col_codigo = headers.index('codigo_interno') + 1
-    col_loja = headers.index('loja') + 1
+    # Rateio do estoque do CD quando a soma das lojas passa do disponível
+    if 'estoque_cd' in df.columns:
+        df = df.join(alocar_estoque_cd(df))
+        cortados = df.loc[df['corte_cd'] > 0, 'codigo_interno'].nunique()
+        print(f"Rateio do CD: {cortados} produtos com sugestão acima do estoque_cd "
+              f"({df['corte_cd'].sum()} unidades não atendidas)")
     
-    # Aplica formato texto (@) nas colunas
-    for row in range(2, ws.max_row + 1):
-        ws.cell(row=row, column=col_codigo).number_format = '@'
-        ws.cell(row=row, column=col_loja).number_format = '@'
+    # Resultado da etapa, lido por analisar_estrategias.py
+    gravar_etapa(df, ARQUIVO_SUGESTOES)
     
-    wb.save(arquivo_saida)
+    print(f"Atualizado! {(df['sugestao'] > 0).sum()} produtos com sugestao > 0")
+    print(f"Total de unidades sugeridas: {df['sugestao'].sum()}")
+    print(f"Arquivo salvo: {ARQUIVO_SUGESTOES}")
     
-    print(f"Atualizado! {len([s for s in sugestoes if s > 0])} produtos com sugestao > 0")
-    print(f"Total de unidades sugeridas: {sum(sugestoes)}")
-    print(f"Arquivo salvo: {arquivo_saida}")
+    if args.excel:
+        # Planilha para os compradores (codigo_interno e loja com zeros à esquerda)
+        arquivo_excel = exportar_excel(df, caminho_excel(ARQUIVO_SUGESTOES))
+        print(f"Arquivo Excel salvo: {arquivo_excel}")
 
 if __name__ == "__main__":
     main()
@@ -24,27 +24,23 @@ def atualizar_coluna_sugestao():
     
     # Calcular sugestões
     print("🧮 Calculando sugestões...\n")
-    sugestoes = []
-    
-    for idx, row in df.iterrows():
-        resultado = calculador.calcular_sugestao_pedido(
-            estoque_atual=int(row['estoque_atual']),
-            venda_media_dia=float(row['venda_media_dia']),
-            embalagem=int(row['embalagem']),
-            venda_7dias=int(row['venda_acumulada_7dias']),
-            venda_14dias=int(row['venda_acumulada_14dias']),
-            venda_30dias=int(row['venda_acumulada_30dias']),
-            venda_60dias=int(row['venda_acumulada_60dias'])
-        )
-        
-        sugestoes.append(resultado['sugestao_unidades'])
-        
-        # Print simplificado
-        if resultado['sugestao_unidades'] > 0:
-            print(f"  [{idx+1}] Produto {row['codigo_interno']}: {resultado['sugestao_caixas']} caixas")
+    resultados = calculador.calcular_lote(
+        estoque_atual=df['estoque_atual'].astype(int),
+        venda_media_dia=df['venda_media_dia'].astype(float),
+        embalagem=df['embalagem'].astype(int),
+        venda_7dias=df['venda_acumulada_7dias'].astype(int),
+        venda_14dias=df['venda_acumulada_14dias'].astype(int),
+        venda_30dias=df['venda_acumulada_30dias'].astype(int),
+        venda_60dias=df['venda_acumulada_60dias'].astype(int)
+    )
+    
+    # Print simplificado
+    for idx, codigo, caixas in zip(df.index, df['codigo_interno'], resultados['sugestao_caixas']):
+        if caixas > 0:
+            print(f"  [{idx+1}] Produto {codigo}: {caixas} caixas")
     
     # Atualizar coluna sugestao
-    df['sugestao'] = sugestoes
+    df['sugestao'] = resultados['sugestao_unidades'].to_numpy()
     
     # Salvar arquivo (sobrescrevendo o original)
     print(f"\n💾 Salvando arquivo atualizado: data/gerado.xlsx")
@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Confere CalculadorPedido.calcular_lote contra o cálculo produto a produto
+
+A regra de referência é o cálculo produto a produto da versão anterior do
+CalculadorPedido (antes de src/estrategia_pedido.py), mantido aqui só para
+conferência. Cada linha é comparada campo a campo com a linha
+correspondente de calcular_lote. Usa casos sintéticos (bordas das
+estratégias e da tendência), entradas inválidas (embalagem zero, estoque e
+venda média vazios) e, se houver, a posição mais recente do histórico. Sai
+com código 1 se alguma linha divergir.
+
+    python scripts/conferir_calculo_lote.py
+    python scripts/conferir_calculo_lote.py --data 01/12/25 --aleatorios 50000
+"""
+import argparse
+import math
+import os
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.banco_vendas import ARQUIVO_HISTORICO, formatar_data
+from src.calculador_pedido import CalculadorPedido, entrada_calculo
+from src.indicadores_vendas import coluna_janela, montar_entrada_calculador
+
+COLUNAS_ENTRADA = [
+    'estoque_atual', 'venda_media_dia', 'embalagem',
+    'venda_7dias', 'venda_14dias', 'venda_30dias', 'venda_60dias',
+    'ponto_pedido', 'estoque_ideal'
+]
+
+
+def sugestao_referencia(
+    margem_seguranca: float,
+    estoque_atual: int,
+    venda_media_dia: float,
+    embalagem: int,
+    venda_7dias: int = 0,
+    venda_14dias: int = 0,
+    venda_30dias: int = 0,
+    venda_60dias: int = 0,
+    ponto_pedido: int = None,
+    estoque_ideal: int = None
+) -> Dict:
+    """Cálculo produto a produto da versão anterior do CalculadorPedido"""
+
+    # 1. ESTRATÉGIA INTELIGENTE: Equilibrar giro saudável (4-6 dias) com exposição visual
+
+    # Calcula necessidade baseada em giro saudável
+    dias_giro_minimo = 4  # Mínimo recomendado
+    dias_giro_maximo = 6  # Máximo recomendado
+
+    necessidade_giro_min = venda_media_dia * dias_giro_minimo
+    necessidade_giro_max = venda_media_dia * dias_giro_maximo
+
+    # 2. Considera valores do comprador (experiência visual)
+    if ponto_pedido and estoque_ideal:
+        # O comprador definiu valores baseados em experiência de exposição
+        # Validar se esses valores são compatíveis com giro saudável
+
+        diferenca_comprador = estoque_ideal - ponto_pedido
+        dias_cobertura_comprador = diferenca_comprador / venda_media_dia if venda_media_dia > 0 else 0
+
+        # Se os valores do comprador resultam em giro muito lento (>6 dias)
+        if dias_cobertura_comprador > dias_giro_maximo:
+            # Ajusta para o máximo recomendado, mas respeitando múltiplos de embalagem
+            quantidade_necessaria = necessidade_giro_max * margem_seguranca - estoque_atual
+            estrategia = 'giro_otimizado'
+            observacao = f'Ajustado de {dias_cobertura_comprador:.1f} para {dias_giro_maximo} dias (giro mais saudável)'
+
+        # Se os valores do comprador resultam em giro muito rápido (<4 dias)
+        elif dias_cobertura_comprador < dias_giro_minimo:
+            # Ajusta para o mínimo recomendado
+            quantidade_necessaria = necessidade_giro_min * margem_seguranca - estoque_atual
+            estrategia = 'giro_otimizado'
+            observacao = f'Ajustado de {dias_cobertura_comprador:.1f} para {dias_giro_minimo} dias (evitar excesso de pedidos)'
+
+        # Se está dentro do range (4-6 dias), respeita valores do comprador
+        else:
+            # Verifica se está abaixo do ponto de pedido
+            if estoque_atual < ponto_pedido:
+                quantidade_necessaria = estoque_ideal - estoque_atual
+                estrategia = 'comprador'
+                observacao = f'Respeitando valores do comprador ({dias_cobertura_comprador:.1f} dias de cobertura)'
+            else:
+                quantidade_necessaria = 0
+                estrategia = 'comprador'
+                observacao = 'Estoque acima do ponto de pedido definido'
+    else:
+        # Sem valores do comprador, usa apenas lógica de giro saudável
+        quantidade_necessaria = necessidade_giro_min * margem_seguranca - estoque_atual
+        estrategia = 'giro_saudavel'
+        observacao = f'Baseado em giro de {dias_giro_minimo} dias (padrão do sistema)'
+
+    # 3. Se não precisa pedir (estoque suficiente), retorna 0
+    if quantidade_necessaria <= 0:
+        return {
+            'sugestao_unidades': 0,
+            'sugestao_caixas': 0,
+            'estoque_suficiente': True,
+            'dias_cobertura_atual': estoque_atual / venda_media_dia if venda_media_dia > 0 else float('inf'),
+            'estrategia': estrategia,
+            'observacao': observacao,
+            'ponto_pedido': ponto_pedido,
+            'estoque_ideal': estoque_ideal,
+            'motivo': 'Estoque atual suficiente para cobertura'
+        }
+
+    # 4. Arredonda para cima em múltiplos da embalagem
+    caixas_necessarias = math.ceil(quantidade_necessaria / embalagem)
+    sugestao_unidades = caixas_necessarias * embalagem
+
+    # 5. Análise de tendência
+    tendencia = _tendencia_referencia(venda_7dias, venda_14dias, venda_30dias, venda_60dias)
+
+    # 6. Ajusta baseado na tendência
+    ajuste_tendencia = ''
+    if tendencia['tipo'] == 'crescimento_forte':
+        # Aumenta em 1 caixa se crescimento forte
+        caixas_necessarias += 1
+        sugestao_unidades = caixas_necessarias * embalagem
+        ajuste_tendencia = ' + Ajustado para cima (crescimento forte)'
+    elif tendencia['tipo'] == 'queda_forte':
+        # Diminui em 1 caixa se queda forte (mas não menos que 1)
+        if caixas_necessarias > 1:
+            caixas_necessarias -= 1
+            sugestao_unidades = caixas_necessarias * embalagem
+            ajuste_tendencia = ' + Ajustado para baixo (queda forte)'
+
+    motivo = observacao + ajuste_tendencia
+
+    return {
+        'sugestao_unidades': sugestao_unidades,
+        'sugestao_caixas': caixas_necessarias,
+        'estoque_suficiente': False,
+        'dias_cobertura_atual': estoque_atual / venda_media_dia if venda_media_dia > 0 else 0,
+        'dias_cobertura_apos_pedido': (estoque_atual + sugestao_unidades) / venda_media_dia if venda_media_dia > 0 else float('inf'),
+        'estrategia': estrategia,
+        'observacao': observacao,
+        'ponto_pedido': ponto_pedido,
+        'estoque_ideal': estoque_ideal,
+        'tendencia': tendencia,
+        'motivo': motivo
+    }
+
+
+def _tendencia_referencia(
+    venda_7dias: int,
+    venda_14dias: int,
+    venda_30dias: int,
+    venda_60dias: int
+) -> Dict:
+    """Tendência da versão anterior do CalculadorPedido"""
+    if venda_7dias == 0 or venda_14dias == 0:
+        return {'tipo': 'estavel', 'percentual': 0, 'descricao': 'Sem dados suficientes'}
+
+    # Calcula média diária de cada período
+    media_7dias = venda_7dias / 7
+    media_14dias = venda_14dias / 14
+    media_30dias = venda_30dias / 30 if venda_30dias > 0 else media_14dias
+
+    # Compara período mais recente (7 dias) com a semana anterior (dias 8 a 14)
+    media_semana_anterior = (venda_14dias - venda_7dias) / 7
+    if media_semana_anterior > 0:
+        variacao = ((media_7dias - media_semana_anterior) / media_semana_anterior) * 100
+    else:
+        variacao = 0
+
+    # Classifica tendência
+    if variacao > 20:
+        tipo = 'crescimento_forte'
+        descricao = f'Crescimento forte ({variacao:.1f}%)'
+    elif variacao > 5:
+        tipo = 'crescimento'
+        descricao = f'Crescimento moderado ({variacao:.1f}%)'
+    elif variacao < -20:
+        tipo = 'queda_forte'
+        descricao = f'Queda forte ({variacao:.1f}%)'
+    elif variacao < -5:
+        tipo = 'queda'
+        descricao = f'Queda moderada ({variacao:.1f}%)'
+    else:
+        tipo = 'estavel'
+        descricao = f'Vendas estáveis ({variacao:.1f}%)'
+
+    return {
+        'tipo': tipo,
+        'percentual': round(variacao, 2),
+        'descricao': descricao,
+        'media_7dias': round(media_7dias, 2),
+        'media_14dias': round(media_14dias, 2),
+        'media_30dias': round(media_30dias, 2)
+    }
+
+
+def casos_sinteticos(quantidade: int, semente: int = 0) -> pd.DataFrame:
+    """
+    Bordas conhecidas mais combinações aleatórias
+
+    Inclui cobertura do comprador exatamente em 4 e 6 dias, venda média
+    zero, estoque igual ao ponto de pedido, variações de tendência de ±5 e
+    ±20% e valores terminados em 5 na primeira casa decimal.
+    """
+    bordas = pd.DataFrame([
+        # estoque, venda_media, embalagem, v7, v14, v30, v60, ponto, ideal
+        [0, 0.0, 12, 0, 0, 0, 0, None, None],
+        [10, 0.0, 12, 0, 0, 0, 0, 5, 20],
+        [0, 0.0, 12, 0, 0, 0, 0, 5, 20],
+        [5, 2.5, 6, 21, 35, 60, 120, 5, 15],
+        [4, 2.5, 6, 21, 35, 60, 120, 5, 20],
+        [4, 2.5, 6, 12, 24, 60, 120, 5, 15],
+        [4, 2.5, 6, 14, 24, 60, 120, 5, 15],
+        [4, 2.5, 6, 7, 14, 60, 120, 10, 20],
+        [4, 2.5, 6, 10, 24, 60, 120, 0, 20],
+        [4, 2.5, 6, 8, 14, 60, 120, 10, 25],
+        [4, 2.5, 6, 5, 14, 60, 120, 10, 25],
+        [4, 2.5, 1, 4, 14, 60, 120, None, None],
+        [3, 1.0, 1, 4, 12, 60, 120, None, None],
+        [100, 1.0, 24, 9, 15, 30, 60, None, 30],
+        [-5, 1.3, 10, 20, 20, 30, 60, None, None],
+        [1, 0.3, 3, 2, 3, 9, 18, 2, 3],
+    ], columns=COLUNAS_ENTRADA)
+
+    gerador = np.random.default_rng(semente)
+    venda_7 = gerador.integers(0, 60, quantidade)
+    ponto = gerador.integers(0, 40, quantidade).astype(float)
+    aleatorios = pd.DataFrame({
+        'estoque_atual': gerador.integers(-5, 120, quantidade),
+        'venda_media_dia': gerador.integers(0, 400, quantidade) / gerador.choice([1, 4, 7, 10, 30], quantidade),
+        'embalagem': gerador.choice([1, 2, 3, 6, 12, 24], quantidade),
+        'venda_7dias': venda_7,
+        'venda_14dias': venda_7 + gerador.integers(0, 60, quantidade),
+        'venda_30dias': gerador.integers(0, 200, quantidade),
+        'venda_60dias': gerador.integers(0, 400, quantidade),
+        'ponto_pedido': np.where(gerador.random(quantidade) < 0.3, np.nan, ponto),
+        'estoque_ideal': np.where(gerador.random(quantidade) < 0.3, np.nan, ponto + gerador.integers(0, 60, quantidade)),
+    })
+    return pd.concat([bordas, aleatorios], ignore_index=True)
+
+
+def casos_invalidos() -> pd.DataFrame:
+    """Entradas que o cálculo produto a produto rejeita (ou só aceita sem pedido)"""
+    nan = float('nan')
+    return pd.DataFrame([
+        # estoque, venda_media, embalagem, v7, v14, v30, v60, ponto, ideal
+        [0, 5.0, 0, 30, 60, 150, 300, None, None],
+        [100, 1.0, 0, 7, 14, 30, 60, None, None],
+        [2, 2.0, 0, 14, 28, 60, 120, 5, 20],
+        [30, 2.0, 0, 14, 28, 60, 120, 5, 10],
+        [nan, 5.0, 6, 30, 60, 150, 300, None, None],
+        [nan, 0.0, 6, 0, 0, 0, 0, None, None],
+        [nan, 2.0, 6, 14, 28, 60, 120, 5, 10],
+        [4, nan, 6, 30, 60, 150, 300, None, None],
+        [4, nan, 6, 14, 28, 60, 120, 5, 20],
+        [nan, nan, 0, 0, 0, 0, 0, None, None],
+    ], columns=COLUNAS_ENTRADA)
+
+
+def _resultado(funcao, **argumentos):
+    """(caixas, unidades) calculadas ou 'rejeitado' se a função levantar erro"""
+    try:
+        resultado = funcao(**argumentos)
+    except (ValueError, ZeroDivisionError):
+        return 'rejeitado'
+    if isinstance(resultado, pd.DataFrame):
+        resultado = resultado.iloc[0]
+    return int(resultado['sugestao_caixas']), int(resultado['sugestao_unidades'])
+
+
+def conferir_invalidos(calculador: CalculadorPedido, casos: pd.DataFrame) -> int:
+    """
+    Entradas inválidas: rejeitadas (ou aceitas) igual à referência
+
+    Valores crus: calcular_lote e calcular_sugestao_pedido devem rejeitar o
+    que a referência rejeita e calcular o mesmo no resto (nunca caixas
+    negativas absurdas). Pelo caminho de planilha (processar_dataframe),
+    entrada_calculo saneia as células e o resultado deve ser o da
+    referência sobre os valores saneados.
+
+    Returns:
+        Número de casos divergentes
+    """
+    divergentes = 0
+    linhas_planilha = casos.rename(columns={f'venda_{d}dias': coluna_janela(d) for d in (7, 14, 30, 60)}).assign(
+        codigo_interno=range(len(casos)), loja=1
+    )
+    saneados = entrada_calculo(linhas_planilha)
+    planilha = calculador.processar_dataframe(linhas_planilha)
+
+    for posicao, linha in enumerate(casos.itertuples(index=False)):
+        argumentos = dict(
+            estoque_atual=linha.estoque_atual,
+            venda_media_dia=linha.venda_media_dia,
+            embalagem=linha.embalagem,
+            venda_7dias=linha.venda_7dias,
+            venda_14dias=linha.venda_14dias,
+            venda_30dias=linha.venda_30dias,
+            venda_60dias=linha.venda_60dias,
+            ponto_pedido=_inteiro(linha.ponto_pedido),
+            estoque_ideal=_inteiro(linha.estoque_ideal)
+        )
+        esperado = _resultado(sugestao_referencia, margem_seguranca=calculador.margem_seguranca, **argumentos)
+        lote = _resultado(calculador.calcular_lote, **{
+            coluna: np.array([np.nan if valor is None else valor], dtype=float)
+            for coluna, valor in argumentos.items()
+        })
+        produto = _resultado(calculador.calcular_sugestao_pedido, **argumentos)
+
+        saneado = saneados.iloc[posicao]
+        esperado_saneado = _resultado(
+            sugestao_referencia,
+            margem_seguranca=calculador.margem_seguranca,
+            estoque_atual=int(saneado['estoque_atual']),
+            venda_media_dia=float(saneado['venda_media_dia']),
+            embalagem=int(saneado['embalagem']),
+            venda_7dias=int(saneado['venda_acumulada_7dias']),
+            venda_14dias=int(saneado['venda_acumulada_14dias']),
+            venda_30dias=int(saneado['venda_acumulada_30dias']),
+            venda_60dias=int(saneado['venda_acumulada_60dias']),
+            ponto_pedido=_inteiro(saneado['ponto_pedido']),
+            estoque_ideal=_inteiro(saneado['estoque_ideal'])
+        )
+        obtido_planilha = (int(planilha['sugestao_caixas'].iloc[posicao]), int(planilha['sugestao'].iloc[posicao]))
+
+        if not (esperado == lote == produto and esperado_saneado == obtido_planilha):
+            divergentes += 1
+            print(f"[ERRO] Entrada inválida, caso {posicao}: {linha}")
+            print(f"   referência {esperado!r}, lote {lote!r}, produto a produto {produto!r}")
+            print(f"   planilha: referência saneada {esperado_saneado!r}, processar_dataframe {obtido_planilha!r}")
+
+    situacao = "[OK]" if divergentes == 0 else "[ERRO]"
+    print(f"{situacao} Entradas inválidas: {len(casos):,} casos, {divergentes:,} divergentes")
+    return divergentes
+
+
+def casos_historico(data_referencia=None) -> pd.DataFrame:
+    """Entrada real do calculador na posição do histórico (vazio sem histórico)"""
+    if not os.path.exists(ARQUIVO_HISTORICO):
+        return pd.DataFrame(columns=COLUNAS_ENTRADA)
+
+    entrada = montar_entrada_calculador(ARQUIVO_HISTORICO, data_referencia)
+    if entrada.empty:
+        return pd.DataFrame(columns=COLUNAS_ENTRADA)
+
+    print(f"[INFO] Histórico: posição de {formatar_data(entrada['data_venda'].iloc[0])}")
+    entrada = entrada.rename(columns={coluna_janela(d): f'venda_{d}dias' for d in (7, 14, 30, 60)})
+    # Mesmas conversões de processar_dataframe
+    for coluna in COLUNAS_ENTRADA:
+        if coluna != 'venda_media_dia':
+            entrada[coluna] = np.trunc(pd.to_numeric(entrada[coluna]).astype(float))
+    return entrada[COLUNAS_ENTRADA]
+
+
+def _inteiro(valor):
+    return None if pd.isna(valor) else int(valor)
+
+
+def _iguais(esperado, obtido) -> bool:
+    """Valor do escalar igual ao do lote (None e NaN = ausente)"""
+    if esperado is None or (isinstance(esperado, float) and math.isnan(esperado)):
+        return obtido is None or (isinstance(obtido, float) and math.isnan(obtido))
+    return esperado == obtido
+
+
+def conferir(calculador: CalculadorPedido, casos: pd.DataFrame, nome: str) -> int:
+    """
+    Compara as duas implementações nos casos informados
+
+    Returns:
+        Número de linhas divergentes
+    """
+    if casos.empty:
+        print(f"[AVISO] {nome}: nenhum caso")
+        return 0
+
+    lote = calculador.calcular_lote(**{coluna: casos[coluna].to_numpy(dtype=float) for coluna in COLUNAS_ENTRADA})
+
+    divergentes = 0
+    for posicao, (linha, obtido) in enumerate(zip(casos.itertuples(index=False), lote.to_dict('records'))):
+        esperado = sugestao_referencia(
+            calculador.margem_seguranca,
+            estoque_atual=int(linha.estoque_atual),
+            venda_media_dia=float(linha.venda_media_dia),
+            embalagem=int(linha.embalagem),
+            venda_7dias=int(linha.venda_7dias),
+            venda_14dias=int(linha.venda_14dias),
+            venda_30dias=int(linha.venda_30dias),
+            venda_60dias=int(linha.venda_60dias),
+            ponto_pedido=_inteiro(linha.ponto_pedido),
+            estoque_ideal=_inteiro(linha.estoque_ideal)
+        )
+        tendencia = esperado.pop('tendencia', {})
+        esperado['tendencia_tipo'] = tendencia.get('tipo')
+        esperado['tendencia_percentual'] = tendencia.get('percentual', float('nan'))
+        esperado['tendencia_descricao'] = tendencia.get('descricao')
+        esperado.setdefault('dias_cobertura_apos_pedido', float('nan'))
+
+        campos = [campo for campo, valor in esperado.items() if not _iguais(valor, obtido[campo])]
+        if campos:
+            divergentes += 1
+            if divergentes <= 10:
+                print(f"[ERRO] {nome}, linha {posicao}: {linha}")
+                for campo in campos:
+                    print(f"   {campo}: esperado {esperado[campo]!r}, lote {obtido[campo]!r}")
+
+    situacao = "[OK]" if divergentes == 0 else "[ERRO]"
+    print(f"{situacao} {nome}: {len(casos):,} casos, {divergentes:,} divergentes")
+    return divergentes
+
+
+def conferir_produto_a_produto(calculador: CalculadorPedido, casos: pd.DataFrame) -> int:
+    """
+    Compara o dicionário de calcular_sugestao_pedido com o da referência
+
+    Returns:
+        Número de casos divergentes
+    """
+    divergentes = 0
+    for posicao, linha in enumerate(casos.itertuples(index=False)):
+        argumentos = dict(
+            estoque_atual=int(linha.estoque_atual),
+            venda_media_dia=float(linha.venda_media_dia),
+            embalagem=int(linha.embalagem),
+            venda_7dias=int(linha.venda_7dias),
+            venda_14dias=int(linha.venda_14dias),
+            venda_30dias=int(linha.venda_30dias),
+            venda_60dias=int(linha.venda_60dias),
+            ponto_pedido=_inteiro(linha.ponto_pedido),
+            estoque_ideal=_inteiro(linha.estoque_ideal)
+        )
+        esperado = sugestao_referencia(calculador.margem_seguranca, **argumentos)
+        obtido = calculador.calcular_sugestao_pedido(**argumentos)
+        if esperado != obtido:
+            divergentes += 1
+            if divergentes <= 10:
+                print(f"[ERRO] Produto a produto, caso {posicao}: esperado {esperado}, obtido {obtido}")
+
+    situacao = "[OK]" if divergentes == 0 else "[ERRO]"
+    print(f"{situacao} calcular_sugestao_pedido: {len(casos):,} casos, {divergentes:,} divergentes")
+    return divergentes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere calcular_lote contra o cálculo produto a produto")
+    parser.add_argument('--data', help="Posição do histórico a conferir (dd/mm/yy); padrão: mais recente")
+    parser.add_argument('--aleatorios', type=int, default=20000, help="Casos sintéticos aleatórios (padrão: 20000)")
+    args = parser.parse_args()
+
+    calculador = CalculadorPedido(dias_cobertura=4, margem_seguranca=1.2)
+    sinteticos = casos_sinteticos(args.aleatorios)
+    divergentes = conferir(calculador, sinteticos, "Casos sintéticos")
+    divergentes += conferir_produto_a_produto(calculador, sinteticos.head(1000))
+    divergentes += conferir_invalidos(calculador, casos_invalidos())
+    divergentes += conferir(calculador, casos_historico(args.data), "Histórico")
+
+    sys.exit(1 if divergentes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Script para migrar o histórico de vendas para o formato atual
+
+- Arquivo vendas_historico.parquet único -> dataset particionado por data
+- Coluna data_venda em texto (dd/mm/yy) -> date32
+- Códigos e lojas em texto ('0021771', '004') -> int32/int16
+- Resumo diário (vendas_diarias.parquet) reconstruído a partir do histórico
+
+A importação diária (tratamento_abc.py) já faz essa migração automaticamente;
+este script permite executá-la antes, de forma isolada.
+"""
+import os
+import sys
+
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.banco_vendas import (
+    ARQUIVO_HISTORICO,
+    contar_registros_por_data,
+    formatar_data,
+    migrar_historico,
+    reconstruir_resumo_diario,
+)
+
+
+def main():
+    """Executa a migração do histórico"""
+    print("="*60)
+    print("MIGRAÇÃO DO HISTÓRICO DE VENDAS")
+    print("="*60)
+
+    if not os.path.exists(ARQUIVO_HISTORICO):
+        print(f"[AVISO] {ARQUIVO_HISTORICO} não encontrado, nada a migrar")
+        return
+
+    if migrar_historico(ARQUIVO_HISTORICO):
+        print("[OK] Migração concluída")
+    else:
+        print("[OK] Histórico já está no formato atual")
+
+    reconstruir_resumo_diario(ARQUIVO_HISTORICO)
+
+    print(f"\n[INFO] Registros por data:")
+    for data, count in contar_registros_por_data(ARQUIVO_HISTORICO).items():
+        print(f"   {formatar_data(data)}: {count:,} registros")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ except ImportError:
 # Importa analisador de histórico
 try:
     from .analise_historico import AnalisadorHistorico
+    from .banco_vendas import formatar_codigo, formatar_data, formatar_loja
     USAR_HISTORICO = True
 except ImportError:
     USAR_HISTORICO = False
@@ -433,7 +434,7 @@ DADOS ATUAIS:
 - Embalagem: {embalagem} unidades
 
 HISTÓRICO DE VENDAS:
-- Período: {media_vendas['periodo_analisado']['inicio']} a {media_vendas['periodo_analisado']['fim']}
+- Período: {formatar_data(media_vendas['periodo_analisado']['inicio'])} a {formatar_data(media_vendas['periodo_analisado']['fim'])}
 - Dias com dados: {media_vendas['periodo_analisado']['dias_com_dados']}
 - Média vendas/dia: {media_vendas['vendas']['media_dia']:.2f} unidades
 - Total vendido: {media_vendas['vendas']['total']:.0f} unidades
@@ -502,9 +503,10 @@ Seja objetivo e direto nas recomendações."""
             lojas_detectadas = re.findall(r'loja[s]?\s+(\d{1,3})', pergunta.lower())
             lojas_normalizadas = None
             if lojas_detectadas:
-                # Normalizar lojas com padding de zeros (3 dígitos)
-                lojas_normalizadas = [str(int(loja)).zfill(3) for loja in lojas_detectadas]
-                print(f"[INFO] Lojas detectadas na pergunta: {lojas_normalizadas}")
+                # Lojas como int (mesmo tipo do histórico); zeros à esquerda só na exibição
+                lojas_normalizadas = [int(loja) for loja in lojas_detectadas]
+                lojas_texto = ', '.join(formatar_loja(loja) for loja in lojas_normalizadas)
+                print(f"[INFO] Lojas detectadas na pergunta: {lojas_texto}")
             
             if codigos:
                 print(f"[INFO] Códigos detectados: {codigos}")
@@ -529,12 +531,12 @@ Seja objetivo e direto nas recomendações."""
                             # AGREGAR VENDAS POR DATA (somar todas as lojas)
                             vendas_por_data = dados_produto.groupby('data_venda').agg({
                                 'quantidade_vendida_num': 'sum',
-                                'loja': lambda x: ', '.join(map(str, sorted(x.unique())))
+                                'loja': lambda x: ', '.join(formatar_loja(loja) for loja in sorted(x.unique()))
                             }).reset_index()
                             vendas_por_data = vendas_por_data.sort_values('data_venda')
                             
                             contexto_produto = f"\n\n{'='*60}\n"
-                            contexto_produto += f"DADOS REAIS DO HISTÓRICO - PRODUTO {codigo}\n"
+                            contexto_produto += f"DADOS REAIS DO HISTÓRICO - PRODUTO {formatar_codigo(codigo)}\n"
                             contexto_produto += f"{'='*60}\n"
                             contexto_produto += f"FONTE: data/vendas_historico.parquet\n"
                             contexto_produto += f"Total de registros encontrados: {len(dados_produto)}\n"
@@ -547,7 +549,7 @@ Seja objetivo e direto nas recomendações."""
                             # ÚLTIMA VENDA (dados agregados)
                             ultima_data = vendas_por_data.iloc[-1]
                             contexto_produto += f"\n*** ÚLTIMA VENDA REGISTRADA (AGREGADA) ***\n"
-                            contexto_produto += f"Data: {ultima_data['data_venda']}\n"
+                            contexto_produto += f"Data: {formatar_data(ultima_data['data_venda'])}\n"
                             contexto_produto += f"Quantidade TOTAL vendida (todas as lojas): {ultima_data['quantidade_vendida_num']:.0f} unidades\n"
                             contexto_produto += f"Lojas que venderam: {ultima_data['loja']}\n"
                             
@@ -560,8 +562,8 @@ Seja objetivo e direto nas recomendações."""
                             if lojas_normalizadas:
                                 dados_filtrados = dados_ultima_data[dados_ultima_data['loja'].isin(lojas_normalizadas)]
                                 if len(dados_filtrados) > 0:
-                                    contexto_produto += f"\n*** DADOS DAS LOJAS SOLICITADAS ({', '.join(lojas_normalizadas)}) ***\n"
-                                    contexto_produto += f"Data: {ultima_data['data_venda']}\n"
+                                    contexto_produto += f"\n*** DADOS DAS LOJAS SOLICITADAS ({lojas_texto}) ***\n"
+                                    contexto_produto += f"Data: {formatar_data(ultima_data['data_venda'])}\n"
                                     for _, row in dados_filtrados.iterrows():
                                         estoque_txt = ""
                                         if 'estoque' in row and pd.notna(row['estoque']):
@@ -570,16 +572,16 @@ Seja objetivo e direto nas recomendações."""
                                                 estoque_txt = f" | ESTOQUE: {estoque_val:.0f} un"
                                             except:
                                                 estoque_txt = f" | ESTOQUE: {row['estoque']}"
-                                        contexto_produto += f"  - Loja {row['loja']}: {row['quantidade_vendida_num']:.0f} un vendidas{estoque_txt}\n"
+                                        contexto_produto += f"  - Loja {formatar_loja(row['loja'])}: {row['quantidade_vendida_num']:.0f} un vendidas{estoque_txt}\n"
                                 else:
-                                    contexto_produto += f"\n⚠️  ATENÇÃO: Lojas {', '.join(lojas_normalizadas)} não encontradas para este produto na última data.\n"
+                                    contexto_produto += f"\n⚠️  ATENÇÃO: Lojas {lojas_texto} não encontradas para este produto na última data.\n"
                             
                             # Mostrar todas as lojas (resumido ou completo)
                             if len(dados_ultima_data) > 1:
                                 if lojas_normalizadas:
-                                    contexto_produto += f"\nTodas as lojas (resumo) na data {ultima_data['data_venda']}:\n"
+                                    contexto_produto += f"\nTodas as lojas (resumo) na data {formatar_data(ultima_data['data_venda'])}:\n"
                                 else:
-                                    contexto_produto += f"\nDetalhamento por loja na data {ultima_data['data_venda']}:\n"
+                                    contexto_produto += f"\nDetalhamento por loja na data {formatar_data(ultima_data['data_venda'])}:\n"
                                 for _, row in dados_ultima_data.iterrows():
                                     estoque_txt = ""
                                     if 'estoque' in row and pd.notna(row['estoque']):
@@ -588,14 +590,14 @@ Seja objetivo e direto nas recomendações."""
                                             estoque_txt = f" | ESTOQUE: {estoque_val:.0f} un"
                                         except:
                                             estoque_txt = f" | ESTOQUE: {row['estoque']}"
-                                    contexto_produto += f"  - Loja {row['loja']}: {row['quantidade_vendida_num']:.0f} un vendidas{estoque_txt}\n"
+                                    contexto_produto += f"  - Loja {formatar_loja(row['loja'])}: {row['quantidade_vendida_num']:.0f} un vendidas{estoque_txt}\n"
                             
                             # Estatísticas gerais
                             contexto_produto += f"\n*** ESTATÍSTICAS DO HISTÓRICO ***\n"
                             contexto_produto += f"Total vendido (TODAS as datas e lojas): {dados_produto['quantidade_vendida_num'].sum():.0f} unidades\n"
                             contexto_produto += f"Número de datas com vendas: {dados_produto['data_venda'].nunique()}\n"
                             contexto_produto += f"Número de lojas que venderam: {dados_produto['loja'].nunique()}\n"
-                            contexto_produto += f"Período: {dados_produto['data_venda'].min()} a {dados_produto['data_venda'].max()}\n"
+                            contexto_produto += f"Período: {formatar_data(dados_produto['data_venda'].min())} a {formatar_data(dados_produto['data_venda'].max())}\n"
                             
                             # Média diária (considerando agregação por data)
                             media_diaria = vendas_por_data['quantidade_vendida_num'].mean()
@@ -608,7 +610,7 @@ Seja objetivo e direto nas recomendações."""
                                     estoque_cd_num = float(estoque_cd_valor)
                                     contexto_produto += f"\n{'='*60}\n"
                                     contexto_produto += f"*** ESTOQUE DO CD (CENTRO DE DISTRIBUIÇÃO) ***\n"
-                                    contexto_produto += f"Data: {ultima_data['data_venda']}\n"
+                                    contexto_produto += f"Data: {formatar_data(ultima_data['data_venda'])}\n"
                                     contexto_produto += f"ESTOQUE CD: {estoque_cd_num:.0f} unidades\n"
                                     contexto_produto += f"\nO CD (Centro de Distribuição) é o estoque central que\n"
                                     contexto_produto += f"abastece todas as lojas. Este valor é DIFERENTE do estoque\n"
@@ -619,13 +621,13 @@ Seja objetivo e direto nas recomendações."""
                             
                             # ESTOQUE ATUAL POR LOJA (última data disponível)
                             if 'estoque' in dados_produto.columns:
-                                contexto_produto += f"\n*** ESTOQUE POR LOJA (última data: {ultima_data['data_venda']}) ***\n"
+                                contexto_produto += f"\n*** ESTOQUE POR LOJA (última data: {formatar_data(ultima_data['data_venda'])}) ***\n"
                                 estoque_por_loja = dados_ultima_data[['loja', 'estoque']].copy()
                                 
                                 # DEBUG: Mostrar valores originais
                                 print(f"[DEBUG] Valores de estoque originais no Parquet:")
                                 for idx, row in dados_ultima_data.iterrows():
-                                    print(f"  Loja {row['loja']}: estoque={row['estoque']} (tipo: {type(row['estoque'])})")
+                                    print(f"  Loja {formatar_loja(row['loja'])}: estoque={row['estoque']} (tipo: {type(row['estoque'])})")
                                 
                                 estoque_por_loja['estoque_num'] = pd.to_numeric(
                                     estoque_por_loja['estoque'], errors='coerce'
@@ -633,7 +635,7 @@ Seja objetivo e direto nas recomendações."""
                                 
                                 estoque_total = 0
                                 for _, row in estoque_por_loja.iterrows():
-                                    contexto_produto += f"  Loja {row['loja']}: {row['estoque_num']:.0f} unidades em estoque\n"
+                                    contexto_produto += f"  Loja {formatar_loja(row['loja'])}: {row['estoque_num']:.0f} unidades em estoque\n"
                                     estoque_total += row['estoque_num']
                                 
                                 contexto_produto += f"\nESTOQUE TOTAL (todas as lojas): {estoque_total:.0f} unidades\n"
@@ -658,12 +660,12 @@ Seja objetivo e direto nas recomendações."""
                             if num_datas_unicas <= 10:
                                 contexto_produto += "Todas as vendas agregadas:\n"
                                 for _, row in vendas_por_data.iterrows():
-                                    contexto_produto += f"  {row['data_venda']}: {row['quantidade_vendida_num']:.0f} un TOTAL (lojas: {row['loja']})\n"
+                                    contexto_produto += f"  {formatar_data(row['data_venda'])}: {row['quantidade_vendida_num']:.0f} un TOTAL (lojas: {row['loja']})\n"
                             else:
                                 contexto_produto += f"Últimas 10 datas (de {num_datas_unicas} datas):\n"
                                 ultimas = vendas_por_data.tail(10)
                                 for _, row in ultimas.iterrows():
-                                    contexto_produto += f"  {row['data_venda']}: {row['quantidade_vendida_num']:.0f} un TOTAL (lojas: {row['loja']})\n"
+                                    contexto_produto += f"  {formatar_data(row['data_venda'])}: {row['quantidade_vendida_num']:.0f} un TOTAL (lojas: {row['loja']})\n"
                             
                             contexto_produto += f"{'='*60}\n"
                             contexto_produto += "IMPORTANTE: Use APENAS estes dados reais do histórico para responder.\n"
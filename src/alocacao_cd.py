@@ -0,0 +1,77 @@
+"""
+Rateio do estoque do CD entre as lojas
+
+A sugestão de cada loja é calculada isoladamente; quando a soma das
+sugestões de um produto passa do estoque_cd, as caixas disponíveis são
+distribuídas pela menor cobertura: cada caixa vai para a loja que, com as
+caixas já recebidas, teria menos dias de estoque. O resultado equaliza a
+cobertura das lojas (quem está em ruptura recebe primeiro) e é sempre o
+mesmo para a mesma entrada.
+
+Todos os produtos são rateados de uma vez: uma linha por caixa sugerida,
+uma ordenação e uma soma acumulada por produto.
+"""
+import numpy as np
+import pandas as pd
+
+# Colunas acrescentadas por alocar_estoque_cd
+COLUNAS_ALOCACAO = ['caixas_alocadas', 'unidades_alocadas', 'corte_cd']
+
+
+def alocar_estoque_cd(df: pd.DataFrame, coluna_estoque: str = 'estoque') -> pd.DataFrame:
+    """
+    Caixas de cada loja atendidas pelo estoque do CD
+
+    Produtos cujo estoque_cd cobre todas as sugestões recebem tudo; nos
+    demais, as caixas seguem a ordem de menor cobertura (estoque da loja +
+    caixas já alocadas, sobre venda_media_dia; empate pela loja) até o
+    estoque do CD acabar. Sem estoque_cd informado, o produto não é rateado;
+    estoque_cd negativo conta como zero.
+
+    Args:
+        df: Resultado de processar_dataframe com codigo_interno, loja,
+            estoque_cd, venda_media_dia e a coluna de estoque da loja
+        coluna_estoque: Coluna com o estoque atual da loja
+
+    Returns:
+        DataFrame com o índice de df e as colunas caixas_alocadas,
+        unidades_alocadas e corte_cd (unidades sugeridas não atendidas)
+    """
+    caixas = df['sugestao_caixas'].to_numpy(dtype=np.int64)
+    sugestao = df['sugestao'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        por_caixa = np.where(caixas > 0, sugestao / caixas, 0.0)
+    estoque = pd.to_numeric(df[coluna_estoque]).fillna(0).to_numpy(dtype=float)
+    venda_media = df['venda_media_dia'].to_numpy(dtype=float)
+    produto, _ = pd.factorize(df['codigo_interno'])
+    loja = df['loja'].to_numpy()
+
+    # Estoque do CD por produto (o mesmo valor em todas as lojas)
+    estoque_cd = pd.to_numeric(df['estoque_cd']).groupby(produto).max()
+    disponivel = estoque_cd.clip(lower=0).fillna(np.inf).to_numpy()
+
+    # Uma linha por caixa sugerida, com a cobertura da loja antes de recebê-la
+    linha = np.repeat(np.arange(len(df)), caixas)
+    recebidas = np.arange(len(linha)) - np.repeat(np.cumsum(caixas) - caixas, caixas)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cobertura = np.where(
+            venda_media[linha] > 0,
+            (estoque[linha] + recebidas * por_caixa[linha]) / venda_media[linha],
+            np.inf
+        )
+
+    # Ordem de atendimento por produto; aceita enquanto a soma cabe no CD
+    ordem = np.lexsort((linha, loja[linha], cobertura, produto[linha]))
+    linha = linha[ordem]
+    unidades = np.cumsum(por_caixa[linha])
+    inicio_produto = np.diff(produto[linha], prepend=-1) != 0
+    acumulado = unidades - np.maximum.accumulate(np.where(inicio_produto, unidades - por_caixa[linha], 0.0))
+    atendida = acumulado <= disponivel[produto[linha]]
+
+    caixas_alocadas = np.bincount(linha[atendida], minlength=len(df))
+    unidades_alocadas = np.rint(caixas_alocadas * por_caixa).astype(np.int64)
+    return pd.DataFrame({
+        'caixas_alocadas': caixas_alocadas,
+        'unidades_alocadas': unidades_alocadas,
+        'corte_cd': np.rint(sugestao).astype(np.int64) - unidades_alocadas
+    }, index=df.index)
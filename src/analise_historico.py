@@ -1,62 +1,402 @@
 """
 Módulo de análise de histórico de vendas usando banco Parquet
+
+As análises usam o resumo diário (produto x loja x dia) mantido pela
+importação, e não os registros brutos do histórico.
 """
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from .banco_vendas import (
+    ARQUIVO_HISTORICO,
+    abrir_dataset,
+    abrir_tabela_arrow,
+    assinatura_manifesto,
+    caminho_resumo_diario,
+    codificar_categorias,
+    converter_chave,
+    datas_alteradas_desde,
+    decodificar_categorias,
+    formatar_codigo,
+    formatar_data,
+    formatar_loja,
+    gravar_tabela_arrow,
+    impressao_digital,
+    ler_dimensao_produtos,
+    ler_historico,
+    listar_datas,
+    montar_filtro,
+    reconstruir_resumo_diario,
+    resumo_diario_atualizado,
+)
+
+# Cache Arrow IPC dentro do resumo diário (prefixo "_" é ignorado na leitura do dataset)
+DIRETORIO_CACHE = '_cache'
+
+# Incrementar quando o formato do cache mudar (caches antigos são descartados)
+VERSAO_CACHE = 3
+
+# Ordem física do histórico em memória (permite fatiar por produto/loja/data)
+ORDEM_INDICE = ['codigo_interno', 'loja', 'data_venda']
+
+# Colunas necessárias para cada tipo de consulta (projeção na leitura)
+# (descrição e seção vêm da dimensão de produtos)
+COLUNAS_MEDIA_VENDAS = ['codigo_interno', 'loja', 'data_venda', 'quantidade_vendida']
+COLUNAS_ESTATISTICAS = ['data_venda', 'loja', 'codigo_interno', 'quantidade_vendida']
+COLUNAS_TOP_PRODUTOS = ['codigo_interno', 'loja', 'quantidade_vendida', 'valor_venda']
+COLUNAS_LOTE = ['codigo_interno', 'loja', 'data_venda', 'quantidade_vendida', 'estoque']
+
+# Colunas do DataFrame retornado por calcular_estatisticas_lote
+COLUNAS_ESTATISTICAS_LOTE = [
+    'codigo_interno', 'loja', 'descricao', 'secao', 'inicio', 'fim', 'dias_com_dados',
+    'total', 'media_dia', 'minima_dia', 'maxima_dia', 'desvio_padrao',
+    'media_primeira_metade', 'media_segunda_metade', 'variacao_percentual', 'tendencia',
+    'estoque_atual', 'dias_cobertura_atual', 'total_para_cobertura', 'quantidade_pedir', 'status'
+]
+
 
 class AnalisadorHistorico:
     """
     Analisa histórico de vendas para fornecer insights ao agente IA
     """
     
-    def __init__(self, arquivo_parquet: str = 'data/vendas_historico.parquet'):
+    def __init__(self, arquivo_parquet: str = ARQUIVO_HISTORICO, sob_demanda: bool = False):
         """
         Inicializa o analisador
         
         Args:
-            arquivo_parquet: Caminho do arquivo Parquet com histórico
+            arquivo_parquet: Caminho do dataset Parquet com histórico
+            sob_demanda: Não carrega o histórico na memória; cada consulta lê
+                do Parquet apenas as colunas e linhas necessárias
         """
         self.arquivo_parquet = arquivo_parquet
-        self.df = None
+        self.arquivo_resumo = caminho_resumo_diario(arquivo_parquet)
+        self.sob_demanda = sob_demanda
+        self.dataset = None
+        self.tabela = None
+        self.produtos: Optional[pd.DataFrame] = None
+        self._df = None
+        self._indice_produtos: Dict[int, Tuple[int, int]] = {}
+        self._assinatura = None
         self._carregar_dados()
     
-    def _carregar_dados(self):
-        """Carrega dados do arquivo Parquet"""
-        if os.path.exists(self.arquivo_parquet):
-            self.df = pd.read_parquet(self.arquivo_parquet)
-            print(f"[OK] Historico carregado: {len(self.df):,} registros")
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """
+        Resumo diário completo como DataFrame
+        
+        Só é materializado (convertido da tabela Arrow mapeada) quando uma
+        análise precisa varrer todo o histórico; consultas por produto não
+        passam por aqui.
+        """
+        if self._df is None and self.tabela is not None:
+            self._df = self.tabela.to_pandas(date_as_object=False)
+        return self._df
+    
+    def _assinatura_atual(self):
+        """
+        Assinatura barata do estado do banco
+        
+        Usa o manifesto gravado pela importação (mtime, tamanho, versão);
+        históricos sem manifesto caem na impressão digital das partições.
+        """
+        assinatura = assinatura_manifesto(self.arquivo_parquet)
+        if assinatura is not None:
+            return ('manifesto',) + assinatura
+        return ('particoes', impressao_digital(self.arquivo_resumo))
+    
+    def _carregar_dados(self, datas_alteradas: Optional[List] = None):
+        """
+        Carrega todas as partições do resumo diário
+        
+        Args:
+            datas_alteradas: Datas que mudaram desde a última carga; se
+                informado, só essas partições são relidas do Parquet
+        """
+        # Históricos anteriores ao resumo diário (ou em formato antigo): gera o resumo uma única vez
+        if not resumo_diario_atualizado(self.arquivo_parquet) and os.path.exists(self.arquivo_parquet):
+            reconstruir_resumo_diario(self.arquivo_parquet)
+        
+        self._assinatura = self._assinatura_atual()
+        self.produtos = ler_dimensao_produtos(self.arquivo_parquet)
+        
+        if self.sob_demanda:
+            self.dataset = abrir_dataset(self.arquivo_resumo)
+            if self.dataset is not None:
+                print(f"[OK] Historico aberto sob demanda: {len(self.dataset.files)} particoes")
+            else:
+                print(f"[AVISO] Arquivo {self.arquivo_parquet} nao encontrado")
+            return
+        
+        self._df = None
+        self.tabela, self._indice_produtos = self._abrir_cache(datas_alteradas)
+        if self.tabela is not None:
+            print(f"[OK] Historico carregado: {self.tabela.num_rows:,} registros diarios (produto x loja x dia)")
         else:
             print(f"[AVISO] Arquivo {self.arquivo_parquet} nao encontrado")
-            self.df = None
     
-    def recarregar(self):
-        """Recarrega dados do arquivo (útil após atualizações)"""
-        self._carregar_dados()
+    def _caminhos_cache(self, impressao: str) -> Tuple[str, str]:
+        """Arquivos Arrow do cache (tabela e índice) para uma impressão digital"""
+        diretorio = os.path.join(self.arquivo_resumo, DIRETORIO_CACHE)
+        return (
+            os.path.join(diretorio, f"resumo-v{VERSAO_CACHE}-{impressao}.arrow"),
+            os.path.join(diretorio, f"indice-v{VERSAO_CACHE}-{impressao}.arrow")
+        )
+    
+    def _abrir_cache(
+        self,
+        datas_alteradas: Optional[List] = None
+    ) -> Tuple[Optional[pa.Table], Dict[int, Tuple[int, int]]]:
+        """
+        Abre o cache Arrow IPC do resumo diário com memory-map
+        
+        O cache guarda o resumo já ordenado por (codigo_interno, loja,
+        data_venda), sem compressão e com código/loja inteiros, e o índice
+        produto -> (linha inicial, linha final). O nome dos arquivos contém a impressão digital das
+        partições Parquet: se alguma partição mudou, o cache é regenerado.
+        
+        Args:
+            datas_alteradas: Se informado (e já houver tabela carregada), o
+                novo cache reaproveita a tabela atual e relê só essas datas
+        
+        Returns:
+            Tupla (tabela mapeada, índice de produtos)
+        """
+        impressao = impressao_digital(self.arquivo_resumo)
+        if impressao is None:
+            return None, {}
+        
+        arquivo_tabela, arquivo_indice = self._caminhos_cache(impressao)
+        tabela = abrir_tabela_arrow(arquivo_tabela)
+        indice = abrir_tabela_arrow(arquivo_indice)
+        
+        if tabela is None or indice is None:
+            dataset = abrir_dataset(self.arquivo_resumo)
+            if dataset is None:
+                return None, {}
+            
+            tabela_nova = None
+            if datas_alteradas is not None and self.tabela is not None:
+                tabela_nova = self._atualizar_tabela(dataset, datas_alteradas)
+            if tabela_nova is None:
+                print("[INFO] Gerando cache Arrow do historico...")
+                tabela_nova = dataset.to_table()
+            
+            ordenada = tabela_nova.sort_by([(col, 'ascending') for col in ORDEM_INDICE]).combine_chunks()
+            gravar_tabela_arrow(codificar_categorias(ordenada).replace_schema_metadata(None), arquivo_tabela)
+            gravar_tabela_arrow(self._construir_indice(ordenada), arquivo_indice)
+            self._remover_caches_antigos(impressao)
+            
+            tabela = abrir_tabela_arrow(arquivo_tabela)
+            indice = abrir_tabela_arrow(arquivo_indice)
+        
+        indice_produtos = {
+            codigo: (inicio, fim)
+            for codigo, inicio, fim in zip(
+                indice.column('codigo_interno').to_pylist(),
+                indice.column('inicio').to_pylist(),
+                indice.column('fim').to_pylist()
+            )
+        }
+        return tabela, indice_produtos
+    
+    def _atualizar_tabela(self, dataset: ds.Dataset, datas_alteradas: List) -> Optional[pa.Table]:
+        """
+        Tabela atual com as datas alteradas substituídas pelas do Parquet
+        
+        Returns:
+            Nova tabela (não ordenada) ou None se os esquemas não forem
+            compatíveis (nesse caso o cache é gerado do zero)
+        """
+        print(f"[INFO] Atualizando cache Arrow: {len(datas_alteradas)} data(s) alterada(s)")
+        datas = pa.array(datas_alteradas, type=pa.date32())
+        datas_existentes = pa.array(listar_datas(self.arquivo_resumo), type=pa.date32())
+        coluna_data = self.tabela.column('data_venda')
+        mantidas = decodificar_categorias(self.tabela.filter(pc.and_(
+            pc.is_in(coluna_data, value_set=datas_existentes),
+            pc.invert(pc.is_in(coluna_data, value_set=datas))
+        )))
+        novas = dataset.to_table(filter=ds.field('data_venda').isin(datas))
+        
+        try:
+            novas = novas.select(mantidas.schema.names).cast(mantidas.schema)
+        except (KeyError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return None
+        return pa.concat_tables([mantidas, novas])
+    
+    def _remover_caches_antigos(self, impressao_atual: str):
+        """Remove arquivos de cache de versões anteriores (ignora os que estão em uso)"""
+        diretorio = os.path.join(self.arquivo_resumo, DIRETORIO_CACHE)
+        for nome in os.listdir(diretorio):
+            if f"v{VERSAO_CACHE}-{impressao_atual}" not in nome:
+                try:
+                    os.remove(os.path.join(diretorio, nome))
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _construir_indice(tabela: pa.Table) -> pa.Table:
+        """
+        Monta o índice produto -> (linha inicial, linha final) de uma tabela
+        ordenada por (codigo_interno, loja, data_venda)
+        
+        Com isso uma consulta por produto é um dicionário + fatia contígua,
+        e loja/data dentro do produto são buscas binárias.
+        """
+        codigos = tabela.column('codigo_interno').to_numpy()
+        if len(codigos) == 0:
+            inicios = np.array([], dtype=np.int64)
+        else:
+            inicios = np.flatnonzero(np.append(True, codigos[1:] != codigos[:-1]))
+        fins = np.append(inicios[1:], len(codigos))
+        return pa.table({
+            'codigo_interno': pa.array(codigos[inicios], type=pa.int32()),
+            'inicio': pa.array(inicios, type=pa.int64()),
+            'fim': pa.array(fins, type=pa.int64())
+        })
+    
+    def _descrever_produto(self, codigo: int) -> Tuple[str, str]:
+        """Descrição e seção de um produto (dimensão de produtos)"""
+        codigo = converter_chave(codigo)
+        if self.produtos is None or codigo not in self.produtos.index:
+            return "", ""
+        produto = self.produtos.loc[codigo]
+        return produto['descricao'], produto['secao']
+    
+    def _fatia_produto(self, codigo: int, loja: Optional[int], data_inicio) -> pa.Table:
+        """Fatia (sem cópia) da tabela mapeada para um produto"""
+        inicio, fim = self._indice_produtos.get(codigo, (0, 0))
+        fatia = self.tabela.slice(inicio, fim - inicio)
+        
+        if loja is not None and fatia.num_rows > 0:
+            lojas = fatia.column('loja').to_numpy()
+            esquerda = int(np.searchsorted(lojas, loja, side='left'))
+            direita = int(np.searchsorted(lojas, loja, side='right'))
+            fatia = fatia.slice(esquerda, direita - esquerda)
+        
+        if data_inicio is not None and fatia.num_rows > 0:
+            datas = fatia.column('data_venda').to_numpy()
+            limite = np.datetime64(pd.Timestamp(data_inicio).date())
+            if loja is not None:
+                # Dentro de produto + loja as datas já estão ordenadas
+                fatia = fatia.slice(int(np.searchsorted(datas, limite)))
+            else:
+                fatia = fatia.filter(pa.array(datas >= limite))
+        
+        return fatia
+    
+    def recarregar(self) -> bool:
+        """
+        Recarrega dados do arquivo se o banco mudou desde a última carga
+        
+        Compara a assinatura do manifesto (mtime, tamanho e versão gravada
+        pela importação); se nada mudou não lê nada. Se mudou, relê apenas
+        as datas gravadas depois da versão carregada.
+        
+        Returns:
+            True se os dados foram recarregados
+        """
+        assinatura = self._assinatura_atual()
+        if assinatura == self._assinatura:
+            return False
+        
+        datas_alteradas = None
+        if assinatura[0] == 'manifesto' and self._assinatura is not None and self._assinatura[0] == 'manifesto':
+            datas_alteradas = datas_alteradas_desde(self._assinatura[3], self.arquivo_parquet)
+        
+        self._carregar_dados(datas_alteradas)
+        return True
+    
+    def possui_dados(self) -> bool:
+        """Indica se há histórico disponível (em memória ou sob demanda)"""
+        if self.sob_demanda:
+            return self.dataset is not None
+        return self.tabela is not None and self.tabela.num_rows > 0
+    
+    def _consultar(
+        self,
+        colunas: Optional[List[str]] = None,
+        codigo_interno=None,
+        loja=None,
+        data_inicio=None
+    ) -> pd.DataFrame:
+        """
+        Retorna os registros que atendem aos filtros
+        
+        No modo sob demanda os filtros são enviados ao leitor Parquet
+        (partições e row groups são descartados pelas estatísticas);
+        caso contrário, consultas por produto usam o índice sobre a tabela
+        mapeada e as demais são aplicadas como máscara ao DataFrame.
+        
+        Args:
+            colunas: Colunas desejadas (None = todas)
+            codigo_interno: Código do produto ou lista de códigos (int ou
+                texto com zeros à esquerda)
+            loja: Código da loja ou lista de lojas (int ou texto)
+            data_inicio: Data inicial (inclusiva)
+        """
+        codigo_interno = converter_chave(codigo_interno)
+        loja = converter_chave(loja)
+        
+        if self.sob_demanda:
+            filtro = montar_filtro(codigo_interno, loja, data_inicio)
+            df = ler_historico(self.arquivo_resumo, colunas, filtro)
+            return df if df is not None else pd.DataFrame(columns=colunas)
+        
+        if isinstance(codigo_interno, int) and not isinstance(loja, list):
+            fatia = self._fatia_produto(codigo_interno, loja, data_inicio)
+            if colunas is not None:
+                fatia = fatia.select(colunas)
+            return fatia.to_pandas(date_as_object=False)
+        
+        mascara = pd.Series(True, index=self.df.index)
+        for coluna, valor in (('codigo_interno', codigo_interno), ('loja', loja)):
+            if isinstance(valor, list):
+                mascara &= self.df[coluna].isin(valor)
+            elif valor is not None:
+                mascara &= self.df[coluna] == valor
+        if data_inicio is not None:
+            mascara &= self.df['data_venda'] >= pd.Timestamp(data_inicio)
+        
+        if colunas is None:
+            return self.df[mascara]
+        return self.df.loc[mascara, colunas]
+    
+    def _data_mais_recente(self):
+        """Data mais recente do histórico (sem varrer os registros)"""
+        if self.sob_demanda:
+            datas = listar_datas(self.arquivo_resumo)
+        else:
+            datas = [pc.max(self.tabela.column('data_venda')).as_py()]
+        return pd.Timestamp(datas[-1]) if datas and datas[-1] else None
     
     def consultar_produto(self, codigo_interno) -> pd.DataFrame:
         """
         Consulta todos os dados históricos de um produto
         
         Args:
-            codigo_interno: Código do produto (int ou str, será padronizado)
+            codigo_interno: Código do produto (int ou texto com zeros à esquerda)
             
         Returns:
-            DataFrame com histórico do produto (vazio se não encontrado)
+            DataFrame com o resumo diário do produto, uma linha por loja e
+            dia, mais descrição e seção (vazio se não encontrado)
         """
-        if self.df is None or len(self.df) == 0:
+        if not self.possui_dados():
             return pd.DataFrame()
         
-        # Normalizar código para string com padding de zeros (7 dígitos)
-        codigo_padrao = str(codigo_interno).zfill(7)
-        
-        df_produto = self.df[self.df['codigo_interno'] == codigo_padrao].copy()
+        df_produto = self._consultar(codigo_interno=codigo_interno)
         
         # Ordenar por data para facilitar análise
         if not df_produto.empty:
             df_produto = df_produto.sort_values('data_venda')
+            descricao, secao = self._descrever_produto(codigo_interno)
+            df_produto = df_produto.assign(descricao=descricao, secao=secao)
         
         return df_produto
     
@@ -67,20 +407,28 @@ class AnalisadorHistorico:
         Returns:
             Dicionário com estatísticas
         """
-        if self.df is None or len(self.df) == 0:
+        if not self.possui_dados():
             return {"erro": "Sem dados disponíveis"}
         
+        df = self._consultar(COLUNAS_ESTATISTICAS)
+        datas = df['data_venda'].dt.date
+        
+        codigos = df['codigo_interno'].unique()
+        secoes = []
+        if self.produtos is not None:
+            secoes = self.produtos['secao'].reindex(codigos).dropna().unique().tolist()
+        
         return {
-            "total_registros": len(self.df),
-            "datas_disponiveis": sorted(self.df['data_venda'].unique().tolist()),
+            "total_registros": len(df),
+            "datas_disponiveis": sorted(datas.unique().tolist()),
             "periodo": {
-                "inicio": self.df['data_venda'].min(),
-                "fim": self.df['data_venda'].max()
+                "inicio": datas.min(),
+                "fim": datas.max()
             },
-            "lojas": self.df['loja'].nunique(),
-            "produtos_unicos": self.df['codigo_interno'].nunique(),
-            "total_quantidade_vendida": float(self.df['quantidade_vendida'].sum()),
-            "secoes": self.df['secao'].unique().tolist()
+            "lojas": df['loja'].nunique(),
+            "produtos_unicos": df['codigo_interno'].nunique(),
+            "total_quantidade_vendida": float(df['quantidade_vendida'].sum()),
+            "secoes": secoes
         }
     
     def calcular_media_vendas_produto(
@@ -95,50 +443,46 @@ class AnalisadorHistorico:
         Args:
             codigo_interno: Código do produto
             loja: Filtrar por loja específica (opcional)
-            dias: Considerar apenas últimos N dias (opcional)
+            dias: Considerar apenas os últimos N dias corridos até a data
+                mais recente do histórico (opcional)
             
         Returns:
             Dicionário com média e estatísticas
         """
-        if self.df is None:
+        if not self.possui_dados():
             return {"erro": "Sem dados disponíveis"}
         
-        # Filtrar produto
-        df_filtrado = self.df[self.df['codigo_interno'] == codigo_interno].copy()
+        # Período como intervalo de datas (filtra partições no modo sob demanda)
+        data_inicio = None
+        if dias is not None:
+            data_inicio = self._data_mais_recente() - pd.Timedelta(days=dias - 1)
         
-        if len(df_filtrado) == 0:
-            return {
-                "erro": "Produto não encontrado no histórico",
-                "codigo_interno": codigo_interno
-            }
+        df_filtrado = self._consultar(COLUNAS_MEDIA_VENDAS, codigo_interno, loja, data_inicio)
         
-        # Filtrar por loja se especificado
-        if loja is not None:
-            df_filtrado = df_filtrado[df_filtrado['loja'] == loja]
-            if len(df_filtrado) == 0:
+        if len(df_filtrado) == 0:
+            if loja is not None and len(self._consultar(['codigo_interno'], codigo_interno)) > 0:
                 return {
                     "erro": "Produto não encontrado para esta loja",
                     "codigo_interno": codigo_interno,
                     "loja": loja
                 }
-        
-        # Filtrar por período se especificado
-        if dias is not None:
-            datas_disponiveis = sorted(df_filtrado['data_venda'].unique())
-            datas_recentes = datas_disponiveis[-dias:] if len(datas_disponiveis) >= dias else datas_disponiveis
-            df_filtrado = df_filtrado[df_filtrado['data_venda'].isin(datas_recentes)]
+            return {
+                "erro": "Produto não encontrado no histórico",
+                "codigo_interno": codigo_interno
+            }
         
         # Calcular estatísticas
         vendas_por_dia = df_filtrado.groupby('data_venda')['quantidade_vendida'].sum()
+        descricao, secao = self._descrever_produto(codigo_interno)
         
         resultado = {
             "codigo_interno": codigo_interno,
-            "descricao": df_filtrado['descricao'].iloc[0],
-            "secao": df_filtrado['secao'].iloc[0],
+            "descricao": descricao,
+            "secao": secao,
             "loja": loja if loja else "todas",
             "periodo_analisado": {
-                "inicio": df_filtrado['data_venda'].min(),
-                "fim": df_filtrado['data_venda'].max(),
+                "inicio": df_filtrado['data_venda'].min().date(),
+                "fim": df_filtrado['data_venda'].max().date(),
                 "dias_com_dados": len(vendas_por_dia)
             },
             "vendas": {
@@ -148,7 +492,7 @@ class AnalisadorHistorico:
                 "maxima_dia": float(vendas_por_dia.max()),
                 "desvio_padrao": float(vendas_por_dia.std())
             },
-            "detalhes_por_dia": vendas_por_dia.to_dict()
+            "detalhes_por_dia": {data.date(): qtd for data, qtd in vendas_por_dia.items()}
         }
         
         return resultado
@@ -203,16 +547,16 @@ class AnalisadorHistorico:
     
     def _classificar_cobertura(self, dias: float) -> str:
         """Classifica status de cobertura"""
-        if dias < 2:
-            return "CRITICO"
-        elif dias < 4:
-            return "BAIXO"
-        elif dias <= 6:
-            return "IDEAL"
-        elif dias <= 10:
-            return "ALTO"
-        else:
-            return "EXCESSO"
+        return str(self._classificar_coberturas(np.array([dias]))[0])
+    
+    @staticmethod
+    def _classificar_coberturas(dias: np.ndarray) -> np.ndarray:
+        """Classifica status de cobertura de vários itens de uma vez"""
+        return np.select(
+            [dias < 2, dias < 4, dias <= 6, dias <= 10],
+            ["CRITICO", "BAIXO", "IDEAL", "ALTO"],
+            default="EXCESSO"
+        )
     
     def analisar_tendencia_produto(
         self,
@@ -270,15 +614,126 @@ class AnalisadorHistorico:
             "periodo": {
                 "primeira_metade": {
                     "media": round(media_primeira, 2),
-                    "periodo": f"{datas[0]} a {datas[meio-1]}"
+                    "periodo": f"{formatar_data(datas[0])} a {formatar_data(datas[meio-1])}"
                 },
                 "segunda_metade": {
                     "media": round(media_segunda, 2),
-                    "periodo": f"{datas[meio]} a {datas[-1]}"
+                    "periodo": f"{formatar_data(datas[meio])} a {formatar_data(datas[-1])}"
                 }
             }
         }
     
+    def calcular_estatisticas_lote(
+        self,
+        produtos: Optional[List] = None,
+        lojas: Optional[List] = None,
+        dias: Optional[int] = None,
+        dias_cobertura: int = 4,
+        estoques: Optional[pd.Series] = None
+    ) -> pd.DataFrame:
+        """
+        Média, tendência e cobertura de vários produtos/lojas de uma vez
+        
+        Versão em lote de calcular_media_vendas_produto,
+        analisar_tendencia_produto e calcular_cobertura_necessaria (por
+        loja): todas as estatísticas saem de um único groupby sobre o resumo
+        diário, em vez de uma consulta por produto.
+        
+        Args:
+            produtos: Códigos dos produtos (None = todos)
+            lojas: Códigos das lojas (None = todas)
+            dias: Considerar apenas os últimos N dias corridos até a data
+                mais recente do histórico (opcional)
+            dias_cobertura: Dias de cobertura desejados
+            estoques: Estoque atual indexado por (codigo_interno, loja); se
+                omitido, usa o estoque do dia mais recente no histórico
+            
+        Returns:
+            DataFrame com COLUNAS_ESTATISTICAS_LOTE, uma linha por
+            (codigo_interno, loja)
+        """
+        if not self.possui_dados():
+            return pd.DataFrame(columns=COLUNAS_ESTATISTICAS_LOTE)
+        
+        data_inicio = None
+        if dias is not None:
+            data_inicio = self._data_mais_recente() - pd.Timedelta(days=dias - 1)
+        
+        df = self._consultar(COLUNAS_LOTE, produtos, lojas, data_inicio)
+        if df.empty:
+            return pd.DataFrame(columns=COLUNAS_ESTATISTICAS_LOTE)
+        
+        # Cada linha do resumo é um dia de um produto/loja; em ordem de data
+        # a posição dentro do grupo separa as duas metades do período
+        df = df.sort_values(ORDEM_INDICE, kind='stable')
+        grupos = df.groupby(['codigo_interno', 'loja'], observed=True, sort=False)
+        tamanho = grupos['quantidade_vendida'].transform('size')
+        primeira_metade = grupos.cumcount() < tamanho // 2
+        df = df.assign(
+            venda_primeira=df['quantidade_vendida'].where(primeira_metade, 0.0),
+            venda_segunda=df['quantidade_vendida'].where(~primeira_metade, 0.0)
+        )
+        
+        lote = df.groupby(['codigo_interno', 'loja'], observed=True, sort=False).agg(
+            inicio=('data_venda', 'min'),
+            fim=('data_venda', 'max'),
+            dias_com_dados=('quantidade_vendida', 'size'),
+            total=('quantidade_vendida', 'sum'),
+            media_dia=('quantidade_vendida', 'mean'),
+            minima_dia=('quantidade_vendida', 'min'),
+            maxima_dia=('quantidade_vendida', 'max'),
+            desvio_padrao=('quantidade_vendida', 'std'),
+            estoque_atual=('estoque', 'last'),
+            venda_primeira=('venda_primeira', 'sum'),
+            venda_segunda=('venda_segunda', 'sum')
+        ).reset_index()
+        
+        # Tendência: média da primeira metade dos dias x segunda metade
+        meio = lote['dias_com_dados'] // 2
+        lote['media_primeira_metade'] = lote['venda_primeira'] / meio.where(meio > 0)
+        lote['media_segunda_metade'] = lote['venda_segunda'] / (lote['dias_com_dados'] - meio)
+        variacao = (
+            (lote['media_segunda_metade'] - lote['media_primeira_metade'])
+            / lote['media_primeira_metade'] * 100
+        )
+        lote['variacao_percentual'] = variacao.where(lote['media_primeira_metade'] > 0, 0.0).round(2)
+        lote['tendencia'] = np.select(
+            [lote['variacao_percentual'] > 10, lote['variacao_percentual'] < -10],
+            ["CRESCIMENTO", "QUEDA"],
+            default="ESTAVEL"
+        )
+        # Menos de 2 dias: dados insuficientes para tendência
+        lote.loc[lote['dias_com_dados'] < 2, ['variacao_percentual', 'tendencia']] = None
+        
+        # Cobertura
+        if estoques is not None:
+            chaves = pd.MultiIndex.from_arrays([
+                converter_chave(estoques.index.get_level_values(0)),
+                converter_chave(estoques.index.get_level_values(1))
+            ])
+            estoque = pd.Series(estoques.to_numpy(), index=chaves)
+            lote['estoque_atual'] = estoque.reindex(
+                pd.MultiIndex.from_arrays([lote['codigo_interno'].astype('int64'), lote['loja'].astype('int64')])
+            ).to_numpy()
+        
+        media = lote['media_dia']
+        lote['dias_cobertura_atual'] = (lote['estoque_atual'] / media).where(media > 0, 999.0)
+        lote['total_para_cobertura'] = media * dias_cobertura
+        lote['quantidade_pedir'] = (lote['total_para_cobertura'] - lote['estoque_atual']).clip(lower=0)
+        lote['status'] = self._classificar_coberturas(lote['dias_cobertura_atual'].to_numpy())
+        lote.loc[lote['estoque_atual'].isna(), 'status'] = None
+        
+        # Descrição e seção da dimensão de produtos
+        codigos = lote['codigo_interno']
+        if self.produtos is not None:
+            lote['descricao'] = codigos.map(self.produtos['descricao']).fillna("")
+            lote['secao'] = codigos.map(self.produtos['secao'].astype(str)).fillna("")
+        else:
+            lote['descricao'] = ""
+            lote['secao'] = ""
+        
+        return lote[COLUNAS_ESTATISTICAS_LOTE]
+    
     def obter_top_produtos(
         self,
         loja: Optional[int] = None,
@@ -296,45 +751,31 @@ class AnalisadorHistorico:
         Returns:
             Lista de produtos
         """
-        if self.df is None:
+        if not self.possui_dados():
             return []
         
-        df_filtrado = self.df.copy()
-        
-        if loja is not None:
-            df_filtrado = df_filtrado[df_filtrado['loja'] == loja]
-        
-        # Agrupar por produto
-        if metrica == 'quantidade':
-            agrupado = df_filtrado.groupby(['codigo_interno', 'descricao', 'secao']).agg({
-                'quantidade_vendida': 'sum'
-            }).sort_values('quantidade_vendida', ascending=False).head(top_n)
-            
-            return [
-                {
-                    "posicao": i + 1,
-                    "codigo_interno": int(idx[0]),
-                    "descricao": idx[1],
-                    "secao": idx[2],
-                    "quantidade_total": float(row['quantidade_vendida'])
-                }
-                for i, (idx, row) in enumerate(agrupado.iterrows())
-            ]
-        else:
-            agrupado = df_filtrado.groupby(['codigo_interno', 'descricao', 'secao']).agg({
-                'valor_venda': 'sum'
-            }).sort_values('valor_venda', ascending=False).head(top_n)
-            
-            return [
-                {
-                    "posicao": i + 1,
-                    "codigo_interno": int(idx[0]),
-                    "descricao": idx[1],
-                    "secao": idx[2],
-                    "valor_total": float(row['valor_venda'])
-                }
-                for i, (idx, row) in enumerate(agrupado.iterrows())
-            ]
+        df_filtrado = self._consultar(COLUNAS_TOP_PRODUTOS, loja=loja)
+        
+        # Agrupar só pelo código; descrição/seção apenas do top N
+        coluna, chave = ('quantidade_vendida', 'quantidade_total') if metrica == 'quantidade' else ('valor_venda', 'valor_total')
+        agrupado = (
+            df_filtrado.groupby('codigo_interno', observed=True)[coluna]
+            .sum()
+            .sort_values(ascending=False)
+            .head(top_n)
+        )
+        
+        resultado = []
+        for i, (codigo, total) in enumerate(agrupado.items()):
+            descricao, secao = self._descrever_produto(codigo)
+            resultado.append({
+                "posicao": i + 1,
+                "codigo_interno": int(codigo),
+                "descricao": descricao,
+                "secao": secao,
+                chave: float(total)
+            })
+        return resultado
     
     def gerar_contexto_para_agente(
         self,
@@ -353,14 +794,14 @@ class AnalisadorHistorico:
         Returns:
             Texto formatado com contexto
         """
-        if self.df is None:
+        if not self.possui_dados():
             return "[AVISO] Sem dados historicos disponiveis no banco Parquet."
         
         contexto = ["="*60, "CONTEXTO: HISTORICO DE VENDAS", "="*60, ""]
         
         # Estatísticas gerais
         stats = self.obter_estatisticas_gerais()
-        contexto.append(f"Periodo: {stats['periodo']['inicio']} a {stats['periodo']['fim']}")
+        contexto.append(f"Periodo: {formatar_data(stats['periodo']['inicio'])} a {formatar_data(stats['periodo']['fim'])}")
         contexto.append(f"Produtos no historico: {stats['produtos_unicos']:,}")
         contexto.append(f"Lojas: {stats['lojas']}")
         contexto.append(f"Dias com dados: {len(stats['datas_disponiveis'])}")
@@ -370,7 +811,7 @@ class AnalisadorHistorico:
         if codigo_interno:
             media = self.calcular_media_vendas_produto(codigo_interno, loja)
             if "erro" not in media:
-                contexto.append(f"PRODUTO: {media['descricao']} (Cod: {codigo_interno})")
+                contexto.append(f"PRODUTO: {media['descricao']} (Cod: {formatar_codigo(codigo_interno)})")
                 contexto.append(f"   Secao: {media['secao']}")
                 contexto.append(f"   Média de vendas/dia: {media['vendas']['media_dia']:.2f} unidades")
                 contexto.append(f"   Total vendido no período: {media['vendas']['total']:.0f} unidades")
@@ -387,7 +828,7 @@ class AnalisadorHistorico:
         
         # Top produtos da loja
         if loja:
-            contexto.append(f"TOP 5 PRODUTOS DA LOJA {loja}:")
+            contexto.append(f"TOP 5 PRODUTOS DA LOJA {formatar_loja(loja)}:")
             top = self.obter_top_produtos(loja, top_n=5)
             for item in top:
                 contexto.append(f"   {item['posicao']}. {item['descricao'][:40]} - {item['quantidade_total']:.0f} unidades")
@@ -0,0 +1,1000 @@
+"""
+Módulo de armazenamento do histórico de vendas em dataset Parquet particionado
+
+O histórico é um diretório no estilo Hive, com uma partição por data de venda:
+
+    data/vendas_historico.parquet/
+        data_venda=2025-11-29/part-0.parquet
+        data_venda=2025-11-30/part-0.parquet
+
+Cada importação diária grava (ou substitui) apenas a sua própria partição,
+sem reler nem reescrever o restante do histórico.
+
+Ao lado do histórico bruto é mantido um resumo diário pré-agregado
+(produto x loja x dia), com o mesmo particionamento, usado pelas análises:
+
+    data/vendas_diarias.parquet/
+        data_venda=2025-11-29/part-0.parquet
+
+A coluna data_venda é armazenada como date32 (tipo data nativo do Arrow),
+então ordenação, min/max e filtros por período são cronológicos.
+
+Códigos de produto e loja são inteiros (int32/int16) em todo o sistema;
+os zeros à esquerda (0021771, 004) existem só na apresentação e na
+exportação (formatar_codigo, formatar_loja, formatar_chaves).
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+ARQUIVO_HISTORICO = 'data/vendas_historico.parquet'
+
+NOME_RESUMO_DIARIO = 'vendas_diarias.parquet'
+
+# Chave e agregações do resumo diário (produto x loja x dia)
+CHAVE_RESUMO_DIARIO = ['codigo_interno', 'loja', 'data_venda']
+AGREGACOES_RESUMO_DIARIO = {
+    'quantidade_vendida': 'sum',
+    'valor_venda': 'sum',
+    'estoque': 'last',
+    'estoque_cd': 'last',
+}
+COLUNAS_RESUMO_DIARIO = CHAVE_RESUMO_DIARIO + list(AGREGACOES_RESUMO_DIARIO)
+
+# Dimensão de produtos: descrição e seção uma vez por código (não por linha)
+NOME_DIMENSAO_PRODUTOS = 'vendas_produtos.parquet'
+COLUNAS_DIMENSAO_PRODUTOS = ['codigo_interno', 'descricao', 'secao']
+
+# Chaves como inteiros compactos (mesmo tipo no Parquet, no banco.db e no calculador)
+TIPOS_CHAVES = {'codigo_interno': pa.int32(), 'loja': pa.int16()}
+
+# Dígitos das chaves na apresentação/exportação (0021771, 004)
+DIGITOS_CHAVES = {'codigo_interno': 7, 'loja': 3}
+
+# Colunas de texto repetitivas: dictionary no Arrow, category no pandas
+COLUNAS_CATEGORICAS = ['descricao', 'secao']
+
+# Diretório temporário dentro do dataset (prefixo "_" é ignorado na leitura;
+# removido quando a última gravação em andamento termina)
+DIRETORIO_STAGING = '_staging'
+
+NOME_ARQUIVO_PARTICAO = 'part-0.parquet'
+
+# Manifesto de importações (versão incrementada a cada gravação)
+ARQUIVO_MANIFESTO = '_manifesto.json'
+
+# Row groups pequenos + ordenação por produto: as estatísticas min/max de
+# cada row group permitem que uma consulta por produto leia poucos grupos
+LINHAS_POR_ROW_GROUP = 8192
+
+# Formato de data usado pelos usuários (entrada e relatórios)
+FORMATO_DATA = '%d/%m/%y'
+
+PARTICIONAMENTO = ds.partitioning(pa.schema([('data_venda', pa.date32())]), flavor='hive')
+
+DataVenda = Union[str, date, datetime, pd.Timestamp]
+
+
+def converter_data(data_venda: DataVenda) -> date:
+    """
+    Converte uma data de venda para datetime.date
+
+    Args:
+        data_venda: Data como date/Timestamp, string dd/mm/yy ou ISO (yyyy-mm-dd)
+
+    Returns:
+        Data convertida
+    """
+    if isinstance(data_venda, datetime):
+        return data_venda.date()
+    if isinstance(data_venda, date):
+        return data_venda
+
+    texto = str(data_venda).strip()
+    if '/' in texto:
+        return datetime.strptime(texto, FORMATO_DATA).date()
+    return date.fromisoformat(texto)
+
+
+def formatar_data(data_venda: DataVenda) -> str:
+    """Formata uma data de venda como dd/mm/yy para exibição"""
+    return converter_data(data_venda).strftime(FORMATO_DATA)
+
+
+def caminho_particao(data_venda: DataVenda, raiz: str = ARQUIVO_HISTORICO) -> str:
+    """
+    Retorna o diretório da partição de uma data
+
+    Args:
+        data_venda: Data da partição
+        raiz: Diretório raiz do dataset
+
+    Returns:
+        Caminho do diretório da partição
+    """
+    return os.path.join(raiz, f"data_venda={converter_data(data_venda).isoformat()}")
+
+
+def converter_chave(valor):
+    """
+    Código de produto ou loja como int
+
+    Aceita int, texto com zeros à esquerda ('0021771') ou uma lista desses
+    valores (retorna lista de int); None continua None.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, (list, tuple, set, np.ndarray, pd.Index, pd.Series)):
+        return [int(v) for v in valor]
+    return int(valor)
+
+
+def converter_chaves(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas codigo_interno/loja para int32/int16
+
+    Aceita texto com zeros à esquerda ou números; levanta ValueError se
+    houver chave vazia ou não numérica.
+    """
+    convertidas = {}
+    for nome, tipo in TIPOS_CHAVES.items():
+        if nome in df.columns and df[nome].dtype != tipo.to_pandas_dtype():
+            coluna = df[nome]
+            if not pd.api.types.is_numeric_dtype(coluna):
+                coluna = pd.to_numeric(coluna.astype(str), errors='raise')
+            convertidas[nome] = coluna.astype(tipo.to_pandas_dtype())
+    return df.assign(**convertidas) if convertidas else df
+
+
+def _formatar_chave(valor, digitos: int):
+    """Chave (int, texto ou Series) como texto com zeros à esquerda"""
+    if isinstance(valor, pd.Series):
+        return pd.to_numeric(valor, errors='coerce').astype('Int64').astype('string').str.zfill(digitos)
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return ""
+    return str(int(valor)).zfill(digitos)
+
+
+def formatar_codigo(valor):
+    """Código de produto para exibição/exportação (21771 -> '0021771')"""
+    return _formatar_chave(valor, DIGITOS_CHAVES['codigo_interno'])
+
+
+def formatar_loja(valor):
+    """Código de loja para exibição/exportação (4 -> '004')"""
+    return _formatar_chave(valor, DIGITOS_CHAVES['loja'])
+
+
+def formatar_chaves(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia do DataFrame com codigo_interno/loja como texto com zeros à esquerda"""
+    formatadas = {
+        nome: _formatar_chave(df[nome], digitos)
+        for nome, digitos in DIGITOS_CHAVES.items() if nome in df.columns
+    }
+    return df.assign(**formatadas)
+
+
+def codificar_categorias(tabela: pa.Table, colunas: List[str] = COLUNAS_CATEGORICAS) -> pa.Table:
+    """
+    Converte colunas de texto em dictionary (viram Categorical no pandas)
+
+    Cada valor distinto é guardado uma vez; as linhas guardam só o índice.
+    """
+    for nome in colunas:
+        if nome not in tabela.column_names:
+            continue
+        tipo = tabela.schema.field(nome).type
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            indice = tabela.column_names.index(nome)
+            tabela = tabela.set_column(indice, nome, tabela.column(nome).combine_chunks().dictionary_encode())
+    return tabela
+
+
+def decodificar_categorias(tabela: pa.Table) -> pa.Table:
+    """Volta colunas dictionary para o tipo dos valores (formato gravado em disco)"""
+    for indice, campo in enumerate(tabela.schema):
+        if pa.types.is_dictionary(campo.type):
+            tabela = tabela.set_column(indice, campo.name, tabela.column(indice).cast(campo.type.value_type))
+    return tabela
+
+
+def _tabela_com_data_tipada(df: pd.DataFrame) -> pa.Table:
+    """Converte DataFrame em tabela Arrow garantindo data_venda como date32 e chaves inteiras"""
+    # Em disco as colunas ficam como texto (o Parquet já comprime com dicionário)
+    tabela = decodificar_categorias(pa.Table.from_pandas(df, preserve_index=False))
+
+    # Chaves em texto ('0021771') ou int64 viram int32/int16
+    for nome, tipo in TIPOS_CHAVES.items():
+        if nome in tabela.column_names and tabela.schema.field(nome).type != tipo:
+            indice = tabela.column_names.index(nome)
+            tabela = tabela.set_column(indice, nome, tabela.column(nome).cast(tipo))
+
+    if 'data_venda' in tabela.column_names:
+        coluna = tabela.column('data_venda')
+        if pa.types.is_string(coluna.type) or pa.types.is_large_string(coluna.type):
+            datas = pd.to_datetime(df['data_venda'], format=FORMATO_DATA)
+            coluna = pa.array(datas.dt.date, type=pa.date32())
+        else:
+            coluna = coluna.cast(pa.date32())
+        indice = tabela.column_names.index('data_venda')
+        tabela = tabela.set_column(indice, 'data_venda', coluna)
+
+    # Metadados pandas guardariam o tipo original (texto) da coluna
+    return tabela.replace_schema_metadata(None)
+
+
+def _substituir_diretorio(origem: str, destino: str):
+    """
+    Substitui o diretório destino pelo diretório origem
+
+    Cada passo é um rename; se o processo cair no meio, a partição antiga
+    continua íntegra dentro do diretório de staging.
+    """
+    antigo = None
+    if os.path.exists(destino):
+        antigo = os.path.join(os.path.dirname(origem), f"antigo-{uuid.uuid4().hex}")
+        os.replace(destino, antigo)
+
+    os.replace(origem, destino)
+
+    if antigo:
+        shutil.rmtree(antigo, ignore_errors=True)
+
+
+def gravar_particao(
+    df_dia: pd.DataFrame,
+    data_venda: DataVenda,
+    raiz: str = ARQUIVO_HISTORICO
+) -> str:
+    """
+    Grava os dados de um dia, substituindo atomicamente a partição da data
+
+    O arquivo é escrito primeiro em um diretório de staging e só então
+    trocado pela partição definitiva, então um erro durante a escrita
+    nunca corrompe o histórico existente.
+
+    Args:
+        df_dia: DataFrame com os registros do dia
+        data_venda: Data dos registros
+        raiz: Diretório raiz do dataset
+
+    Returns:
+        Caminho da partição gravada
+    """
+    migrar_historico(raiz)
+    return _gravar_particao(df_dia, data_venda, raiz)
+
+
+def _gravar_particao(df_dia: pd.DataFrame, data_venda: DataVenda, raiz: str) -> str:
+    """Grava a partição via staging + rename (sem verificar migração)"""
+    with GravadorParticao(data_venda, raiz, migrar=False) as gravador:
+        gravador.escrever(df_dia)
+    return gravador.destino
+
+
+class GravadorParticao:
+    """
+    Grava a partição de uma data em lotes, sem manter o dia inteiro em memória
+
+    Cada lote é anexado ao arquivo de staging como novos row groups; a
+    partição definitiva só é substituída ao sair do bloco sem erro. Se
+    houver exceção, o staging é descartado e a partição antiga fica intacta.
+
+        with GravadorParticao(data_venda) as gravador:
+            for lote in lotes:
+                gravador.escrever(lote)
+
+    Args:
+        data_venda: Data da partição
+        raiz: Diretório raiz do dataset
+        migrar: Se True, migra o histórico para o formato atual antes de gravar
+    """
+
+    def __init__(self, data_venda: DataVenda, raiz: str = ARQUIVO_HISTORICO, migrar: bool = True):
+        self.data_venda = converter_data(data_venda)
+        self.raiz = raiz
+        self.migrar = migrar
+        self.destino = caminho_particao(self.data_venda, raiz)
+        self.registros = 0
+        self._staging = None
+        self._escritor = None
+        self._esquema_vazio = None
+
+    def __enter__(self) -> 'GravadorParticao':
+        if self.migrar:
+            migrar_historico(self.raiz)
+        self._staging = os.path.join(self.raiz, DIRETORIO_STAGING, uuid.uuid4().hex)
+        try:
+            os.makedirs(self._staging)
+        except FileNotFoundError:
+            # Outro gravador removeu o _staging vazio entre criar o pai e o filho
+            os.makedirs(self._staging)
+        return self
+
+    def escrever(self, df_lote: pd.DataFrame):
+        """
+        Anexa um lote de registros à partição em gravação
+
+        Args:
+            df_lote: Registros do lote (mesmas colunas em todos os lotes)
+        """
+        tabela = _tabela_com_data_tipada(df_lote)
+
+        # Ordenar por produto/loja deixa cada produto em poucos row groups
+        colunas_ordem = [c for c in ('codigo_interno', 'loja') if c in tabela.column_names]
+        if colunas_ordem:
+            tabela = tabela.sort_by([(c, 'ascending') for c in colunas_ordem])
+
+        if tabela.num_rows == 0:
+            # Guarda o esquema para gravar uma partição vazia se nada vier depois
+            if self._esquema_vazio is None:
+                self._esquema_vazio = tabela
+            return
+
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(
+                os.path.join(self._staging, NOME_ARQUIVO_PARTICAO),
+                tabela.schema,
+                compression='snappy'
+            )
+        else:
+            tabela = tabela.cast(self._escritor.schema)
+
+        self._escritor.write_table(tabela, row_group_size=LINHAS_POR_ROW_GROUP)
+        self.registros += tabela.num_rows
+
+    def __exit__(self, tipo_erro, erro, rastreio):
+        try:
+            if self._escritor is not None:
+                self._escritor.close()
+            elif tipo_erro is None and self._esquema_vazio is not None:
+                pq.write_table(self._esquema_vazio, os.path.join(self._staging, NOME_ARQUIVO_PARTICAO))
+        finally:
+            if tipo_erro is None and os.path.exists(os.path.join(self._staging, NOME_ARQUIVO_PARTICAO)):
+                _substituir_diretorio(self._staging, self.destino)
+            else:
+                shutil.rmtree(self._staging, ignore_errors=True)
+            try:
+                # Só sai se estiver vazio (outros processos podem estar gravando)
+                os.rmdir(os.path.dirname(self._staging))
+            except OSError:
+                pass
+        return False
+
+
+def _esquema_atual(esquema: pa.Schema) -> bool:
+    """Indica se um esquema gravado tem data_venda em date32 e chaves inteiras"""
+    if 'data_venda' in esquema.names and not pa.types.is_date32(esquema.field('data_venda').type):
+        return False
+    return all(
+        esquema.field(nome).type == tipo
+        for nome, tipo in TIPOS_CHAVES.items() if nome in esquema.names
+    )
+
+
+def _particoes_formato_antigo(raiz: str) -> List[str]:
+    """Lista arquivos de partição com data_venda em texto ou chaves em texto"""
+    arquivos = []
+    for nome in os.listdir(raiz):
+        arquivo = os.path.join(raiz, nome, NOME_ARQUIVO_PARTICAO)
+        if nome.startswith('data_venda=') and os.path.exists(arquivo):
+            if not _esquema_atual(pq.read_schema(arquivo)):
+                arquivos.append(arquivo)
+    return arquivos
+
+
+def migrar_historico(raiz: str = ARQUIVO_HISTORICO) -> bool:
+    """
+    Migra o histórico para o formato atual (particionado, data_venda em
+    date32, chaves inteiras)
+
+    - Arquivo Parquet único antigo: convertido em dataset particionado por
+      data, com o original preservado com a extensão .legado
+    - Partições com data_venda em texto (dd/mm/yy) ou códigos/lojas em
+      texto ('0021771'): reescritas com date32 e int32/int16
+
+    Só lê os metadados dos arquivos quando não há nada a migrar.
+
+    Args:
+        raiz: Caminho do histórico
+
+    Returns:
+        True se houve migração
+    """
+    if os.path.isfile(raiz):
+        print(f"   [INFO] Migrando {raiz} para dataset particionado por data...")
+        df = pd.read_parquet(raiz)
+
+        arquivo_legado = f"{raiz}.legado"
+        os.replace(raiz, arquivo_legado)
+        os.makedirs(raiz, exist_ok=True)
+
+        for data_venda, df_dia in df.groupby('data_venda', sort=False):
+            _gravar_particao(df_dia, data_venda, raiz)
+
+        print(f"   [OK] {len(df):,} registros migrados (original salvo em {arquivo_legado})")
+        return True
+
+    if not os.path.isdir(raiz):
+        return False
+
+    arquivos = _particoes_formato_antigo(raiz)
+    for arquivo in arquivos:
+        df = pd.read_parquet(arquivo)
+        data_venda = os.path.basename(os.path.dirname(arquivo)).split('=', 1)[1]
+        _gravar_particao(df, data_venda, raiz)
+
+    if arquivos:
+        print(f"   [OK] {len(arquivos)} partições migradas para o formato atual (date32, chaves inteiras)")
+    return bool(arquivos)
+
+
+def abrir_dataset(raiz: str = ARQUIVO_HISTORICO) -> Optional[ds.Dataset]:
+    """
+    Abre o histórico como um único dataset lógico
+
+    Aceita tanto o dataset particionado quanto o arquivo único antigo
+    (neste caso data_venda ainda é texto e ler_historico converte em memória).
+
+    Args:
+        raiz: Caminho do histórico
+
+    Returns:
+        Dataset pyarrow ou None se não existir
+    """
+    if not os.path.exists(raiz):
+        return None
+
+    if os.path.isfile(raiz):
+        dataset = ds.dataset(raiz, format='parquet')
+    else:
+        dataset = ds.dataset(raiz, format='parquet', partitioning=PARTICIONAMENTO)
+    if not dataset.files:
+        return None
+
+    return dataset
+
+
+def montar_filtro(
+    codigo_interno: Optional[Union[int, str, List]] = None,
+    loja: Optional[Union[int, str, List]] = None,
+    data_inicio: Optional[DataVenda] = None,
+    data_fim: Optional[DataVenda] = None
+) -> Optional[ds.Expression]:
+    """
+    Monta um filtro pyarrow para ser aplicado na leitura do dataset
+
+    Filtros de data eliminam partições inteiras; filtros de produto/loja
+    usam as estatísticas dos row groups para pular blocos do arquivo.
+
+    Args:
+        codigo_interno: Código do produto (ou lista de códigos; int ou texto)
+        loja: Código da loja (ou lista de lojas; int ou texto)
+        data_inicio: Data inicial (inclusiva)
+        data_fim: Data final (inclusiva)
+
+    Returns:
+        Expressão de filtro ou None se nenhum critério foi informado
+    """
+    condicoes = []
+    for nome, valor in (('codigo_interno', converter_chave(codigo_interno)), ('loja', converter_chave(loja))):
+        if isinstance(valor, list):
+            condicoes.append(ds.field(nome).isin(valor))
+        elif valor is not None:
+            condicoes.append(ds.field(nome) == valor)
+    if data_inicio is not None:
+        condicoes.append(ds.field('data_venda') >= converter_data(data_inicio))
+    if data_fim is not None:
+        condicoes.append(ds.field('data_venda') <= converter_data(data_fim))
+
+    if not condicoes:
+        return None
+
+    filtro = condicoes[0]
+    for condicao in condicoes[1:]:
+        filtro = filtro & condicao
+    return filtro
+
+
+def ler_historico(
+    raiz: str = ARQUIVO_HISTORICO,
+    colunas: Optional[List[str]] = None,
+    filtro: Optional[ds.Expression] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Lê o histórico (todas as partições) em um DataFrame
+
+    A coluna data_venda é entregue como datetime64, pronta para filtros por
+    período e aritmética de datas vetorizada; códigos e lojas como int32/int16
+    (históricos antigos com chaves em texto também) e descrições e seções
+    como category.
+
+    Args:
+        raiz: Caminho do histórico
+        colunas: Colunas a carregar (None = todas)
+        filtro: Filtro aplicado durante a leitura (ver montar_filtro)
+
+    Returns:
+        DataFrame com o histórico ou None se não existir
+    """
+    dataset = abrir_dataset(raiz)
+    if dataset is None:
+        return None
+
+    tabela = dataset.to_table(columns=colunas, filter=filtro)
+    df = converter_chaves(codificar_categorias(tabela).to_pandas(date_as_object=False))
+
+    # Arquivo único antigo: data ainda em texto dd/mm/yy
+    if 'data_venda' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['data_venda']):
+        df['data_venda'] = pd.to_datetime(df['data_venda'], format=FORMATO_DATA)
+
+    return df
+
+
+def caminho_resumo_diario(raiz: str = ARQUIVO_HISTORICO) -> str:
+    """Retorna o caminho do resumo diário correspondente a um histórico"""
+    return os.path.join(os.path.dirname(raiz), NOME_RESUMO_DIARIO)
+
+
+def calcular_resumo_diario(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega registros brutos em uma linha por produto x loja x dia
+
+    Args:
+        df: Registros do histórico (um ou mais dias)
+
+    Returns:
+        DataFrame com quantidade/valor somados e o último estoque/estoque CD
+    """
+    agregacoes = {col: func for col, func in AGREGACOES_RESUMO_DIARIO.items() if col in df.columns}
+    return df.groupby(CHAVE_RESUMO_DIARIO, as_index=False, sort=False, observed=True).agg(agregacoes)
+
+
+def compactar_registros(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduz registros brutos a uma linha por produto x loja x dia, mantendo
+    descrição e seção
+
+    Usado na importação em lotes: concatenar os lotes compactados e passar
+    o resultado a gravar_resumo_diario produz o mesmo resumo e a mesma
+    dimensão de produtos que o arquivo inteiro (somas de somas e o último
+    valor do último lote).
+
+    Args:
+        df: Registros brutos (um lote)
+
+    Returns:
+        DataFrame compactado com as colunas do resumo + descricao/secao
+    """
+    agregacoes = {col: func for col, func in AGREGACOES_RESUMO_DIARIO.items() if col in df.columns}
+    agregacoes.update({col: 'last' for col in ('descricao', 'secao') if col in df.columns})
+    return df.groupby(CHAVE_RESUMO_DIARIO, as_index=False, sort=False, observed=True).agg(agregacoes)
+
+
+def resumo_diario_atualizado(raiz: str = ARQUIVO_HISTORICO) -> bool:
+    """
+    Indica se o resumo diário e a dimensão de produtos existem no formato atual
+
+    Resumos antigos guardavam descrição e seção em todas as linhas, ou
+    códigos e lojas como texto. Confere o esquema de todas as partições (só
+    metadados): uma importação antiga pode ter deixado datas no formato
+    anterior ao lado de datas já atualizadas.
+    """
+    raiz_resumo = caminho_resumo_diario(raiz)
+    if not os.path.isdir(raiz_resumo) or not os.path.isfile(caminho_dimensao_produtos(raiz)):
+        return False
+
+    if not _esquema_atual(pq.read_schema(caminho_dimensao_produtos(raiz))):
+        return False
+
+    for nome in os.listdir(raiz_resumo):
+        arquivo = os.path.join(raiz_resumo, nome, NOME_ARQUIVO_PARTICAO)
+        if nome.startswith('data_venda=') and os.path.exists(arquivo):
+            esquema = pq.read_schema(arquivo)
+            if 'descricao' in esquema.names or not _esquema_atual(esquema):
+                return False
+    return True
+
+
+def gravar_resumo_diario(
+    df_dia: pd.DataFrame,
+    data_venda: DataVenda,
+    raiz: str = ARQUIVO_HISTORICO
+) -> str:
+    """
+    Atualiza o resumo diário (e a dimensão de produtos) apenas para a data importada
+
+    Se o resumo ainda não existir, ele é reconstruído a partir do histórico.
+
+    Args:
+        df_dia: Registros brutos do dia
+        data_venda: Data dos registros
+        raiz: Caminho do histórico bruto
+
+    Returns:
+        Caminho da partição gravada no resumo
+    """
+    raiz_resumo = caminho_resumo_diario(raiz)
+    if not resumo_diario_atualizado(raiz):
+        reconstruir_resumo_diario(raiz)
+
+    atualizar_dimensao_produtos(df_dia, data_venda, raiz)
+    return gravar_particao(calcular_resumo_diario(df_dia), data_venda, raiz_resumo)
+
+
+def reconstruir_resumo_diario(raiz: str = ARQUIVO_HISTORICO) -> int:
+    """
+    Reconstrói o resumo diário e a dimensão de produtos a partir de todas
+    as partições do histórico
+
+    Processa uma partição por vez, então a memória usada é a de um dia.
+
+    Args:
+        raiz: Caminho do histórico bruto
+
+    Returns:
+        Quantidade de datas processadas
+    """
+    migrar_historico(raiz)
+    if not os.path.isdir(raiz):
+        return 0
+
+    raiz_resumo = caminho_resumo_diario(raiz)
+    os.makedirs(raiz_resumo, exist_ok=True)
+
+    datas = listar_datas(raiz)
+    produtos = []
+    for data_venda in datas:
+        df_dia = ler_historico(raiz, filtro=montar_filtro(data_inicio=data_venda, data_fim=data_venda))
+        _gravar_particao(calcular_resumo_diario(df_dia), data_venda, raiz_resumo)
+        produtos.append(calcular_dimensao_produtos(df_dia, data_venda))
+
+    # Datas em ordem cronológica: prevalece a descrição mais recente
+    _gravar_dimensao_produtos(pd.concat(produtos) if produtos else calcular_dimensao_produtos(None, None), raiz)
+
+    # Datas apagadas do histórico saem também do resumo
+    removidas = [d for d in listar_datas(raiz_resumo) if d not in set(datas)]
+    for data_venda in removidas:
+        shutil.rmtree(caminho_particao(data_venda, raiz_resumo))
+
+    if datas or removidas:
+        registrar_no_manifesto(datas, raiz, removidas=removidas)
+
+    print(f"   [OK] Resumo diário reconstruído: {len(datas)} datas em {raiz_resumo}")
+    return len(datas)
+
+
+def caminho_dimensao_produtos(raiz: str = ARQUIVO_HISTORICO) -> str:
+    """Retorna o caminho da dimensão de produtos correspondente a um histórico"""
+    return os.path.join(os.path.dirname(raiz), NOME_DIMENSAO_PRODUTOS)
+
+
+def calcular_dimensao_produtos(df: Optional[pd.DataFrame], data_venda: Optional[DataVenda]) -> pd.DataFrame:
+    """
+    Extrai código, descrição e seção (uma linha por produto) dos registros de um dia
+
+    Args:
+        df: Registros brutos do dia (None = dimensão vazia)
+        data_venda: Data dos registros (guardada como data_referencia)
+
+    Returns:
+        DataFrame com COLUNAS_DIMENSAO_PRODUTOS + data_referencia
+    """
+    if df is None:
+        return pd.DataFrame({
+            'codigo_interno': pd.Series(dtype=TIPOS_CHAVES['codigo_interno'].to_pandas_dtype()),
+            'descricao': pd.Series(dtype=str),
+            'secao': pd.Series(dtype=str),
+            'data_referencia': pd.Series(dtype='datetime64[ns]')
+        })
+
+    produtos = converter_chaves(df[COLUNAS_DIMENSAO_PRODUTOS].drop_duplicates('codigo_interno', keep='last'))
+    produtos = produtos.astype({'descricao': str, 'secao': str})
+    produtos['data_referencia'] = pd.Timestamp(converter_data(data_venda))
+    return produtos
+
+
+def _gravar_dimensao_produtos(produtos: pd.DataFrame, raiz: str):
+    """Grava a dimensão (última descrição por código) de forma atômica"""
+    produtos = (
+        produtos
+        .sort_values('data_referencia', kind='stable')
+        .drop_duplicates('codigo_interno', keep='last')
+        .sort_values('codigo_interno')
+    )
+    tabela = _tabela_com_data_tipada(produtos)
+    tabela = tabela.set_column(
+        tabela.column_names.index('data_referencia'), 'data_referencia',
+        tabela.column('data_referencia').cast(pa.date32())
+    )
+
+    arquivo = caminho_dimensao_produtos(raiz)
+    temporario = f"{arquivo}.{uuid.uuid4().hex}.tmp"
+    pq.write_table(tabela, temporario, compression='snappy')
+    os.replace(temporario, arquivo)
+
+
+def atualizar_dimensao_produtos(df_dia: pd.DataFrame, data_venda: DataVenda, raiz: str = ARQUIVO_HISTORICO):
+    """
+    Inclui os produtos do dia na dimensão de produtos
+
+    Códigos novos são adicionados; os existentes ficam com a descrição e a
+    seção da data mais recente (reimportar um dia antigo não desfaz
+    renomeações posteriores).
+
+    Args:
+        df_dia: Registros brutos do dia
+        data_venda: Data dos registros
+        raiz: Caminho do histórico bruto
+    """
+    novos = calcular_dimensao_produtos(df_dia, data_venda)
+    existentes = ler_dimensao_produtos(raiz)
+    if existentes is not None:
+        existentes = existentes.reset_index().astype({'descricao': str, 'secao': str})
+        novos = pd.concat([existentes, novos], ignore_index=True)
+    _gravar_dimensao_produtos(novos, raiz)
+
+
+def ler_dimensao_produtos(raiz: str = ARQUIVO_HISTORICO) -> Optional[pd.DataFrame]:
+    """
+    Lê a dimensão de produtos
+
+    Returns:
+        DataFrame indexado por codigo_interno (int32) com descricao, secao
+        e data_referencia, ou None se não existir
+    """
+    arquivo = caminho_dimensao_produtos(raiz)
+    if not os.path.isfile(arquivo):
+        return None
+
+    tabela = codificar_categorias(pq.read_table(arquivo), ['secao'])
+    return tabela.to_pandas(date_as_object=False).set_index('codigo_interno')
+
+
+def ler_manifesto(raiz: str = ARQUIVO_HISTORICO) -> Dict:
+    """
+    Lê o manifesto de importações do histórico
+
+    Returns:
+        Dicionário {"versao": int, "datas": {data ISO: {"versao", "registros",
+        "gravado_em", "hash_origem"}}}
+    """
+    arquivo = os.path.join(raiz, ARQUIVO_MANIFESTO)
+    if not os.path.isfile(arquivo):
+        return {"versao": 0, "datas": {}}
+
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def registrar_no_manifesto(
+    datas: List[DataVenda],
+    raiz: str = ARQUIVO_HISTORICO,
+    registros: Optional[Dict[DataVenda, int]] = None,
+    removidas: Optional[List[DataVenda]] = None,
+    origens: Optional[Dict[DataVenda, str]] = None
+) -> int:
+    """
+    Registra no manifesto que as datas informadas foram (re)gravadas
+
+    Deve ser chamado depois que as partições (histórico e resumo) foram
+    gravadas. Leitores comparam a versão para saber o que mudou.
+
+    Args:
+        datas: Datas gravadas
+        raiz: Caminho do histórico
+        registros: Quantidade de registros por data (opcional)
+        removidas: Datas que deixaram de existir no histórico (opcional)
+        origens: Hash do arquivo de origem de cada data (opcional, ver hash_origem)
+
+    Returns:
+        Nova versão do manifesto
+    """
+    manifesto = ler_manifesto(raiz)
+    manifesto['versao'] += 1
+    registros = {converter_data(d): n for d, n in (registros or {}).items()}
+    origens = {converter_data(d): h for d, h in (origens or {}).items()}
+
+    for data_venda in datas:
+        data_venda = converter_data(data_venda)
+        entrada = manifesto['datas'].setdefault(data_venda.isoformat(), {})
+        entrada['versao'] = manifesto['versao']
+        entrada['gravado_em'] = datetime.now().isoformat(timespec='seconds')
+        if data_venda in registros:
+            entrada['registros'] = int(registros[data_venda])
+        if data_venda in origens:
+            entrada['hash_origem'] = origens[data_venda]
+
+    for data_venda in removidas or []:
+        manifesto['datas'].pop(converter_data(data_venda).isoformat(), None)
+
+    _gravar_manifesto(manifesto, raiz)
+    return manifesto['versao']
+
+
+def _gravar_manifesto(manifesto: Dict, raiz: str):
+    """Grava o manifesto via arquivo temporário + rename"""
+    arquivo = os.path.join(raiz, ARQUIVO_MANIFESTO)
+    temporario = f"{arquivo}.{uuid.uuid4().hex}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    os.replace(temporario, arquivo)
+
+
+def hash_origem(data_venda: DataVenda, raiz: str = ARQUIVO_HISTORICO) -> Optional[str]:
+    """
+    Hash do arquivo de origem da última importação de uma data
+
+    Permite à importação reconhecer um arquivo já importado sem relê-lo.
+
+    Args:
+        data_venda: Data consultada
+        raiz: Caminho do histórico
+
+    Returns:
+        Hash registrado ou None se a data não tiver partição ou hash
+    """
+    if not os.path.isdir(caminho_particao(data_venda, raiz)):
+        return None
+    entrada = ler_manifesto(raiz)['datas'].get(converter_data(data_venda).isoformat(), {})
+    return entrada.get('hash_origem')
+
+
+def descartar_hash_origem(datas: List[DataVenda], raiz: str = ARQUIVO_HISTORICO):
+    """
+    Remove o hash de origem das datas que vão ser regravadas
+
+    Chamado antes de substituir as partições: se a importação falhar no
+    meio, a data não fica associada ao arquivo anterior.
+
+    Args:
+        datas: Datas que serão reimportadas
+        raiz: Caminho do histórico
+    """
+    manifesto = ler_manifesto(raiz)
+    alterado = False
+    for data_venda in datas:
+        entrada = manifesto['datas'].get(converter_data(data_venda).isoformat(), {})
+        if entrada.pop('hash_origem', None) is not None:
+            alterado = True
+
+    if alterado:
+        _gravar_manifesto(manifesto, raiz)
+
+
+def assinatura_manifesto(raiz: str = ARQUIVO_HISTORICO) -> Optional[Tuple[int, int, int]]:
+    """
+    Assinatura barata do manifesto: (mtime, tamanho, versão)
+
+    Returns:
+        Tupla ou None se o histórico ainda não tiver manifesto
+    """
+    arquivo = os.path.join(raiz, ARQUIVO_MANIFESTO)
+    if not os.path.isfile(arquivo):
+        return None
+
+    info = os.stat(arquivo)
+    return (info.st_mtime_ns, info.st_size, ler_manifesto(raiz)['versao'])
+
+
+def datas_alteradas_desde(versao: int, raiz: str = ARQUIVO_HISTORICO) -> List[date]:
+    """Datas gravadas depois de uma versão do manifesto"""
+    return sorted(
+        date.fromisoformat(data_iso)
+        for data_iso, entrada in ler_manifesto(raiz)['datas'].items()
+        if entrada.get('versao', 0) > versao
+    )
+
+
+def impressao_digital(raiz: str = ARQUIVO_HISTORICO) -> Optional[str]:
+    """
+    Calcula uma impressão digital barata do dataset
+
+    Usa apenas nome, tamanho e data de modificação dos arquivos de partição
+    (nenhum dado é lido), então muda sempre que uma partição é regravada.
+
+    Args:
+        raiz: Caminho do dataset
+
+    Returns:
+        Hash hexadecimal ou None se o dataset não existir
+    """
+    if not os.path.exists(raiz):
+        return None
+
+    if os.path.isfile(raiz):
+        arquivos = [raiz]
+    else:
+        arquivos = [
+            os.path.join(raiz, nome, NOME_ARQUIVO_PARTICAO)
+            for nome in sorted(os.listdir(raiz))
+            if nome.startswith('data_venda=')
+        ]
+
+    hash_arquivos = hashlib.sha1()
+    for arquivo in arquivos:
+        if os.path.exists(arquivo):
+            info = os.stat(arquivo)
+            hash_arquivos.update(f"{arquivo}|{info.st_size}|{info.st_mtime_ns}\n".encode('utf-8'))
+
+    return hash_arquivos.hexdigest()[:16]
+
+
+def gravar_tabela_arrow(tabela: pa.Table, caminho: str):
+    """
+    Grava uma tabela em formato Arrow IPC (Feather v2) sem compressão
+
+    Sem compressão o arquivo pode ser aberto com memory-map e usado sem
+    decodificação. A escrita é feita em arquivo temporário + rename.
+
+    Args:
+        tabela: Tabela a gravar
+        caminho: Arquivo de destino
+    """
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+
+    with pa.OSFile(temporario, 'wb') as destino:
+        with pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+    os.replace(temporario, caminho)
+
+
+def abrir_tabela_arrow(caminho: str) -> Optional[pa.Table]:
+    """
+    Abre um arquivo Arrow IPC com memory-map (sem copiar os dados para a memória)
+
+    Args:
+        caminho: Arquivo Arrow IPC
+
+    Returns:
+        Tabela mapeada ou None se o arquivo não existir ou estiver inválido
+    """
+    if not os.path.exists(caminho):
+        return None
+
+    try:
+        return pa.ipc.open_file(pa.memory_map(caminho, 'r')).read_all()
+    except (pa.ArrowInvalid, OSError):
+        return None
+
+
+def listar_datas(raiz: str = ARQUIVO_HISTORICO) -> List[date]:
+    """Lista as datas com partição no histórico, em ordem cronológica"""
+    return list(contar_registros_por_data(raiz).keys())
+
+
+def contar_registros_por_data(raiz: str = ARQUIVO_HISTORICO) -> Dict[date, int]:
+    """
+    Conta registros por partição usando apenas os metadados dos arquivos
+
+    Args:
+        raiz: Caminho do histórico
+
+    Returns:
+        Dicionário {data: quantidade de registros}, em ordem cronológica
+    """
+    if not os.path.isdir(raiz):
+        return {}
+
+    contagem = {}
+    for nome in sorted(os.listdir(raiz)):
+        if not nome.startswith('data_venda='):
+            continue
+        arquivo = os.path.join(raiz, nome, NOME_ARQUIVO_PARTICAO)
+        if os.path.exists(arquivo):
+            contagem[date.fromisoformat(nome.split('=', 1)[1])] = pq.ParquetFile(arquivo).metadata.num_rows
+
+    return contagem
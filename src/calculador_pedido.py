@@ -3,9 +3,87 @@ Módulo para calcular sugestões de pedido baseado em vendas e estoque
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import hashlib
+import inspect
+from typing import Dict, Optional, Tuple
 from pathlib import Path
+import argparse
 import math
+import os
+
+from .banco_vendas import (
+    ARQUIVO_HISTORICO,
+    converter_chaves,
+    formatar_codigo,
+    formatar_data,
+    formatar_loja,
+)
+from . import estrategia_pedido
+from .estrategia_pedido import DIAS_GIRO_MAXIMO, DIAS_GIRO_MINIMO, calcular_estrategia
+from .etapas_pipeline import gravar_etapa, metadados_etapa
+from .exportacao_excel import exportar_excel
+from .indicadores_vendas import montar_entrada_calculador
+
+# Colunas de entrada do cálculo (as demais colunas do DataFrame só acompanham)
+COLUNAS_ENTRADA_CALCULO = [
+    'estoque_atual', 'venda_media_dia', 'embalagem',
+    'venda_acumulada_7dias', 'venda_acumulada_14dias',
+    'venda_acumulada_30dias', 'venda_acumulada_60dias',
+    'ponto_pedido', 'estoque_ideal'
+]
+
+# Resultados da última execução por assinatura das entradas (ver processar_dataframe)
+ARQUIVO_CACHE_SUGESTOES = 'data/cache_sugestoes.parquet'
+
+# Versão do cálculo fora da regra (entrada_calculo, colunas de resultado):
+# mudou, incremente para descartar o cache de sugestões
+VERSAO_CALCULO = 1
+
+# Hash do código de src/estrategia_pedido.py (limites de tendência, ramos de
+# calcular_caixas): qualquer mudança na regra também descarta o cache
+ASSINATURA_REGRA = hashlib.sha1(inspect.getsource(estrategia_pedido).encode('utf-8')).hexdigest()[:16]
+
+
+def entrada_calculo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas COLUNAS_ENTRADA_CALCULO de df como float
+
+    Quantidades truncadas em unidades inteiras, como no cálculo por produto
+    (int()); venda_media_dia fica como está. Células vazias seguem as regras
+    de montar_entrada_calculador: estoque e vendas vazios contam como zero e
+    embalagem vazia ou menor que 1 vira 1 (ponto_pedido e estoque_ideal
+    vazios continuam não definidos).
+    """
+    entrada = pd.DataFrame({
+        coluna: pd.to_numeric(df[coluna]).to_numpy(dtype=float)
+        for coluna in COLUNAS_ENTRADA_CALCULO
+    })
+    inteiras = [coluna for coluna in COLUNAS_ENTRADA_CALCULO if coluna != 'venda_media_dia']
+    entrada[inteiras] = np.trunc(entrada[inteiras])
+
+    quantidades = [coluna for coluna in COLUNAS_ENTRADA_CALCULO
+                   if coluna not in ('embalagem', 'ponto_pedido', 'estoque_ideal')]
+    vazias = entrada[quantidades].isna().any(axis=1)
+    embalagem_invalida = ~(entrada['embalagem'] > 0)
+    if vazias.any() or embalagem_invalida.any():
+        print(f"[AVISO] {vazias.sum()} linha(s) com estoque/vendas vazios (considerados 0) e "
+              f"{embalagem_invalida.sum()} com embalagem vazia ou menor que 1 (considerada 1)")
+        entrada[quantidades] = entrada[quantidades].fillna(0.0)
+        entrada.loc[embalagem_invalida, 'embalagem'] = 1.0
+    return entrada
+
+
+def _arredondar(valores, casas: int) -> list:
+    """
+    Arredonda como round() do Python
+
+    np.round multiplica por 10**casas antes de arredondar e erra em valores
+    como 3.15 (3.2 em vez de 3.1); round() usa o valor decimal exato.
+    """
+    return [round(valor, casas) for valor in np.asarray(valores, dtype=float).tolist()]
 
 
 class CalculadorPedido:
@@ -37,6 +115,9 @@ class CalculadorPedido:
         """
         Calcula a sugestão de pedido para um produto
         
+        Estratégia de balanceamento (giro de 4-6 dias x valores do comprador)
+        de src/estrategia_pedido.py aplicada a um único produto.
+        
         Args:
             estoque_atual: Estoque atual em unidades
             venda_media_dia: Venda média diária
@@ -51,163 +132,99 @@ class CalculadorPedido:
         Returns:
             Dicionário com sugestão e análise
         """
-        
-        # 1. ESTRATÉGIA INTELIGENTE: Equilibrar giro saudável (4-6 dias) com exposição visual
-        
-        # Calcula necessidade baseada em giro saudável
-        dias_giro_minimo = 4  # Mínimo recomendado
-        dias_giro_maximo = 6  # Máximo recomendado
-        
-        necessidade_giro_min = venda_media_dia * dias_giro_minimo
-        necessidade_giro_max = venda_media_dia * dias_giro_maximo
-        
-        # 2. Considera valores do comprador (experiência visual)
-        if ponto_pedido and estoque_ideal:
-            # O comprador definiu valores baseados em experiência de exposição
-            # Validar se esses valores são compatíveis com giro saudável
-            
-            diferenca_comprador = estoque_ideal - ponto_pedido
-            dias_cobertura_comprador = diferenca_comprador / venda_media_dia if venda_media_dia > 0 else 0
-            
-            # Se os valores do comprador resultam em giro muito lento (>6 dias)
-            if dias_cobertura_comprador > dias_giro_maximo:
-                # Ajusta para o máximo recomendado, mas respeitando múltiplos de embalagem
-                quantidade_necessaria = necessidade_giro_max * self.margem_seguranca - estoque_atual
-                estrategia = 'giro_otimizado'
-                observacao = f'Ajustado de {dias_cobertura_comprador:.1f} para {dias_giro_maximo} dias (giro mais saudável)'
-            
-            # Se os valores do comprador resultam em giro muito rápido (<4 dias)
-            elif dias_cobertura_comprador < dias_giro_minimo:
-                # Ajusta para o mínimo recomendado
-                quantidade_necessaria = necessidade_giro_min * self.margem_seguranca - estoque_atual
-                estrategia = 'giro_otimizado'
-                observacao = f'Ajustado de {dias_cobertura_comprador:.1f} para {dias_giro_minimo} dias (evitar excesso de pedidos)'
-            
-            # Se está dentro do range (4-6 dias), respeita valores do comprador
-            else:
-                # Verifica se está abaixo do ponto de pedido
-                if estoque_atual < ponto_pedido:
-                    quantidade_necessaria = estoque_ideal - estoque_atual
-                    estrategia = 'comprador'
-                    observacao = f'Respeitando valores do comprador ({dias_cobertura_comprador:.1f} dias de cobertura)'
-                else:
-                    quantidade_necessaria = 0
-                    estrategia = 'comprador'
-                    observacao = 'Estoque acima do ponto de pedido definido'
-        else:
-            # Sem valores do comprador, usa apenas lógica de giro saudável
-            quantidade_necessaria = necessidade_giro_min * self.margem_seguranca - estoque_atual
-            estrategia = 'giro_saudavel'
-            observacao = f'Baseado em giro de {dias_giro_minimo} dias (padrão do sistema)'
-        
-        # 3. Se não precisa pedir (estoque suficiente), retorna 0
-        if quantidade_necessaria <= 0:
-            return {
-                'sugestao_unidades': 0,
-                'sugestao_caixas': 0,
-                'estoque_suficiente': True,
-                'dias_cobertura_atual': estoque_atual / venda_media_dia if venda_media_dia > 0 else float('inf'),
-                'estrategia': estrategia,
-                'observacao': observacao,
-                'ponto_pedido': ponto_pedido,
-                'estoque_ideal': estoque_ideal,
-                'motivo': 'Estoque atual suficiente para cobertura'
-            }
-        
-        # 4. Arredonda para cima em múltiplos da embalagem
-        caixas_necessarias = math.ceil(quantidade_necessaria / embalagem)
-        sugestao_unidades = caixas_necessarias * embalagem
-        
-        # 5. Análise de tendência
-        tendencia = self._analisar_tendencia(venda_7dias, venda_14dias, venda_30dias, venda_60dias)
-        
-        # 6. Ajusta baseado na tendência
-        ajuste_tendencia = ''
-        if tendencia['tipo'] == 'crescimento_forte':
-            # Aumenta em 1 caixa se crescimento forte
-            caixas_necessarias += 1
-            sugestao_unidades = caixas_necessarias * embalagem
-            ajuste_tendencia = ' + Ajustado para cima (crescimento forte)'
-        elif tendencia['tipo'] == 'queda_forte':
-            # Diminui em 1 caixa se queda forte (mas não menos que 1)
-            if caixas_necessarias > 1:
-                caixas_necessarias -= 1
-                sugestao_unidades = caixas_necessarias * embalagem
-                ajuste_tendencia = ' + Ajustado para baixo (queda forte)'
-        
-        motivo = observacao + ajuste_tendencia
-        
-        return {
-            'sugestao_unidades': sugestao_unidades,
-            'sugestao_caixas': caixas_necessarias,
-            'estoque_suficiente': False,
-            'dias_cobertura_atual': estoque_atual / venda_media_dia if venda_media_dia > 0 else 0,
-            'dias_cobertura_apos_pedido': (estoque_atual + sugestao_unidades) / venda_media_dia if venda_media_dia > 0 else float('inf'),
-            'estrategia': estrategia,
-            'observacao': observacao,
+        linha = self.calcular_lote(
+            estoque_atual=[estoque_atual],
+            venda_media_dia=[venda_media_dia],
+            embalagem=[embalagem],
+            venda_7dias=[venda_7dias],
+            venda_14dias=[venda_14dias],
+            ponto_pedido=[np.nan if ponto_pedido is None else ponto_pedido],
+            estoque_ideal=[np.nan if estoque_ideal is None else estoque_ideal]
+        ).iloc[0]
+        
+        resultado = {
+            'sugestao_unidades': int(linha['sugestao_unidades']),
+            'sugestao_caixas': int(linha['sugestao_caixas']),
+            'estoque_suficiente': bool(linha['estoque_suficiente']),
+            'dias_cobertura_atual': float(linha['dias_cobertura_atual']),
+            'estrategia': linha['estrategia'],
+            'observacao': linha['observacao'],
             'ponto_pedido': ponto_pedido,
             'estoque_ideal': estoque_ideal,
-            'tendencia': tendencia,
-            'motivo': motivo
+            'motivo': linha['motivo']
+        }
+        if resultado['estoque_suficiente']:
+            return resultado
+        
+        resultado['dias_cobertura_apos_pedido'] = float(linha['dias_cobertura_apos_pedido'])
+        resultado['tendencia'] = {
+            'tipo': linha['tendencia_tipo'],
+            'percentual': float(linha['tendencia_percentual']),
+            'descricao': linha['tendencia_descricao']
         }
+        if venda_7dias and venda_14dias:
+            # Médias diárias por período (só quando há dados para a tendência)
+            media_14dias = venda_14dias / 14
+            resultado['tendencia'].update({
+                'media_7dias': round(venda_7dias / 7, 2),
+                'media_14dias': round(media_14dias, 2),
+                'media_30dias': round(venda_30dias / 30 if venda_30dias > 0 else media_14dias, 2)
+            })
+        return resultado
     
-    def _analisar_tendencia(
+    def calcular_lote(
         self,
-        venda_7dias: int,
-        venda_14dias: int,
-        venda_30dias: int,
-        venda_60dias: int
-    ) -> Dict:
+        estoque_atual,
+        venda_media_dia,
+        embalagem,
+        venda_7dias=0,
+        venda_14dias=0,
+        venda_30dias=0,
+        venda_60dias=0,
+        ponto_pedido=None,
+        estoque_ideal=None
+    ) -> pd.DataFrame:
         """
-        Analisa a tendência de vendas
+        Calcula a sugestão de pedido de vários produtos de uma vez
         
+        Colunas inteiras (arrays/Series) em vez de um produto por chamada;
+        mesma regra de calcular_sugestao_pedido (ver calcular_estrategia).
+        
+        Args:
+            estoque_atual: Estoque atual em unidades
+            venda_media_dia: Venda média diária
+            embalagem: Quantidade de unidades por caixa
+            venda_7dias: Venda acumulada dos últimos 7 dias
+            venda_14dias: Venda acumulada dos últimos 14 dias
+            venda_30dias: Venda acumulada dos últimos 30 dias
+            venda_60dias: Venda acumulada dos últimos 60 dias
+            ponto_pedido: Mínimo do comprador (NaN/None = não definido)
+            estoque_ideal: Máximo do comprador (NaN/None = não definido)
+            
         Returns:
-            Dicionário com tipo de tendência e percentual
+            DataFrame com uma linha por produto e as chaves do dicionário de
+            calcular_sugestao_pedido como colunas; a tendência vem em
+            tendencia_tipo/tendencia_percentual/tendencia_descricao. Chaves
+            ausentes no dicionário (estoque suficiente) ficam NaN/None.
         """
-        if venda_7dias == 0 or venda_14dias == 0:
-            return {'tipo': 'estavel', 'percentual': 0, 'descricao': 'Sem dados suficientes'}
-        
-        # Calcula média diária de cada período
-        media_7dias = venda_7dias / 7
-        media_14dias = venda_14dias / 14
-        media_30dias = venda_30dias / 30 if venda_30dias > 0 else media_14dias
-        
-        # Compara período mais recente (7 dias) com período anterior (14 dias)
-        if media_14dias > 0:
-            variacao = ((media_7dias - (venda_14dias - venda_7dias) / 7) / ((venda_14dias - venda_7dias) / 7)) * 100
-        else:
-            variacao = 0
-        
-        # Classifica tendência
-        if variacao > 20:
-            tipo = 'crescimento_forte'
-            descricao = f'Crescimento forte ({variacao:.1f}%)'
-        elif variacao > 5:
-            tipo = 'crescimento'
-            descricao = f'Crescimento moderado ({variacao:.1f}%)'
-        elif variacao < -20:
-            tipo = 'queda_forte'
-            descricao = f'Queda forte ({variacao:.1f}%)'
-        elif variacao < -5:
-            tipo = 'queda'
-            descricao = f'Queda moderada ({variacao:.1f}%)'
-        else:
-            tipo = 'estavel'
-            descricao = f'Vendas estáveis ({variacao:.1f}%)'
-        
-        return {
-            'tipo': tipo,
-            'percentual': round(variacao, 2),
-            'descricao': descricao,
-            'media_7dias': round(media_7dias, 2),
-            'media_14dias': round(media_14dias, 2),
-            'media_30dias': round(media_30dias, 2)
-        }
+        return calcular_estrategia(
+            estoque_atual,
+            venda_media_dia,
+            embalagem,
+            venda_7dias=venda_7dias,
+            venda_14dias=venda_14dias,
+            ponto_pedido=ponto_pedido,
+            estoque_ideal=estoque_ideal,
+            margem_seguranca=self.margem_seguranca
+        )
     
     def processar_arquivo(
         self,
         arquivo_entrada: str = "data/gerado.xlsx",
-        arquivo_saida: str = "data/gerado_com_sugestao.xlsx"
+        arquivo_saida: str = "data/gerado_com_sugestao.xlsx",
+        verboso: bool = False,
+        processos: Optional[int] = 1,
+        arquivo_cache: Optional[str] = None
     ) -> pd.DataFrame:
         """
         Processa o arquivo Excel e preenche a coluna de sugestão
@@ -215,6 +232,10 @@ class CalculadorPedido:
         Args:
             arquivo_entrada: Caminho do arquivo de entrada
             arquivo_saida: Caminho do arquivo de saída
+            verboso: Imprime o detalhe de cada produto
+            processos: Processos em paralelo (ver processar_dataframe)
+            arquivo_cache: Resultados da execução anterior (ex.:
+                ARQUIVO_CACHE_SUGESTOES; None = recalcula tudo e não grava)
             
         Returns:
             DataFrame processado
@@ -226,81 +247,234 @@ class CalculadorPedido:
         print(f"📊 Total de linhas: {len(df)}")
         print(f"   Colunas: {list(df.columns)}\n")
         
-        # Processa cada linha
-        resultados = []
+        df = self.processar_dataframe(df, verboso=verboso, processos=processos, arquivo_cache=arquivo_cache)
+        self._salvar_excel(df, arquivo_saida)
+        print(f"[OK] Arquivo processado com sucesso!")
+        self._imprimir_resumo(df)
         
-        for idx, row in df.iterrows():
-            # Obtém ponto_pedido e estoque_ideal (pode ser NaN)
-            ponto_pedido = int(row['ponto_pedido']) if pd.notna(row['ponto_pedido']) else None
-            estoque_ideal = int(row['estoque_ideal']) if pd.notna(row['estoque_ideal']) else None
-            
-            resultado = self.calcular_sugestao_pedido(
-                estoque_atual=int(row['estoque_atual']),
-                venda_media_dia=float(row['venda_media_dia']),
-                embalagem=int(row['embalagem']),
-                venda_7dias=int(row['venda_acumulada_7dias']),
-                venda_14dias=int(row['venda_acumulada_14dias']),
-                venda_30dias=int(row['venda_acumulada_30dias']),
-                venda_60dias=int(row['venda_acumulada_60dias']),
-                ponto_pedido=ponto_pedido,
-                estoque_ideal=estoque_ideal
-            )
-            
-            resultados.append(resultado)
+        return df
+    
+    def processar_historico(
+        self,
+        arquivo_saida: str = "data/gerado_com_sugestao.xlsx",
+        data_referencia=None,
+        arquivo_parquet: str = ARQUIVO_HISTORICO,
+        verboso: bool = False,
+        processos: Optional[int] = 1,
+        arquivo_cache: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Calcula sugestões direto do histórico Parquet (sem gerado.xlsx)
+        
+        Vendas acumuladas de 7/14/30/60 dias e venda média diária são
+        calculadas do histórico; estoque e parâmetros do comprador vêm da
+        importação do dia de referência.
+        
+        Args:
+            arquivo_saida: Caminho do arquivo de saída
+            data_referencia: Dia da posição de estoque (None = mais recente)
+            arquivo_parquet: Caminho do histórico
+            verboso: Imprime o detalhe de cada produto
+            processos: Processos em paralelo (ver processar_dataframe)
+            arquivo_cache: Resultados da execução anterior (ex.:
+                ARQUIVO_CACHE_SUGESTOES; None = recalcula tudo e não grava)
             
-            # Log detalhado
-            print(f"[{idx+1}/{len(df)}] Produto {row['codigo_interno']} - Loja {row['loja']}")
-            print(f"  Estoque atual: {row['estoque_atual']} un")
-            print(f"  Venda média/dia: {row['venda_media_dia']:.2f} un")
-            print(f"  Cobertura atual: {resultado['dias_cobertura_atual']:.1f} dias")
-            print(f"  Tendência: {resultado.get('tendencia', {}).get('descricao', 'N/A')}")
-            print(f"  ➜ Sugestão: {resultado['sugestao_caixas']} caixas ({resultado['sugestao_unidades']} unidades)")
-            print(f"  Motivo: {resultado['motivo']}")
-            print()
+        Returns:
+            DataFrame processado (vazio se não houver histórico)
+        """
+        print(f"📂 Lendo histórico: {arquivo_parquet}")
+        df = montar_entrada_calculador(arquivo_parquet, data_referencia)
         
-        # Preenche a coluna sugestao com as unidades sugeridas
-        df['sugestao'] = [r['sugestao_unidades'] for r in resultados]
+        if df.empty:
+            print("[AVISO] Histórico vazio, nada a calcular")
+            return df
         
-        # Adiciona colunas extras com detalhes
-        df['sugestao_caixas'] = [r['sugestao_caixas'] for r in resultados]
-        df['dias_cobertura_atual'] = [round(r['dias_cobertura_atual'], 1) for r in resultados]
-        df['dias_cobertura_apos'] = [round(r.get('dias_cobertura_apos_pedido', 0), 1) for r in resultados]
-        df['estrategia_usada'] = [r.get('estrategia', 'N/A') for r in resultados]
-        df['tendencia'] = [r.get('tendencia', {}).get('descricao', 'N/A') for r in resultados]
-        df['motivo_sugestao'] = [r['motivo'] for r in resultados]
+        print(f"📊 Total de linhas: {len(df)} (posição de {formatar_data(df['data_venda'].iloc[0])})\n")
         
-        # Formata codigo_interno com 7 dígitos (string com zeros à esquerda)
-        df['codigo_interno'] = df['codigo_interno'].apply(lambda x: str(int(x)).zfill(7))
+        df = self.processar_dataframe(df, verboso=verboso, processos=processos, arquivo_cache=arquivo_cache)
+        self._salvar_excel(df, arquivo_saida)
+        print(f"[OK] Sugestões calculadas com sucesso!")
+        self._imprimir_resumo(df)
         
-        # Formata loja com 3 dígitos (string com zeros à esquerda)
-        df['loja'] = df['loja'].apply(lambda x: str(int(x)).zfill(3))
+        return df
+    
+    def processar_dataframe(
+        self,
+        df: pd.DataFrame,
+        verboso: bool = False,
+        processos: Optional[int] = 1,
+        arquivo_cache: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Calcula a sugestão de todas as linhas e adiciona as colunas de resultado
         
-        # Salva arquivo com formatação de texto
-        print(f"💾 Salvando arquivo: {arquivo_saida}")
-        df.to_excel(arquivo_saida, index=False)
+        Com arquivo_cache, só recalcula as linhas cujas entradas (estoque,
+        vendas, embalagem, ponto_pedido, estoque_ideal) mudaram desde a
+        última execução; as demais reaproveitam o resultado gravado.
         
-        # Força formato texto nas colunas codigo_interno e loja usando openpyxl
-        try:
-            from openpyxl import load_workbook
-            wb = load_workbook(arquivo_saida)
-            ws = wb.active
-            
-            # Identifica as colunas
-            headers = [cell.value for cell in ws[1]]
-            col_codigo = headers.index('codigo_interno') + 1
-            col_loja = headers.index('loja') + 1
-            
-            # Aplica formato texto (@) nas colunas
-            for row in range(2, ws.max_row + 1):
-                ws.cell(row=row, column=col_codigo).number_format = '@'
-                ws.cell(row=row, column=col_loja).number_format = '@'
+        Args:
+            df: DataFrame com estoque_atual, venda_media_dia, embalagem,
+                venda_acumulada_7/14/30/60dias, ponto_pedido e estoque_ideal
+            verboso: Imprime o detalhe de cada produto (lento em milhares de linhas)
+            processos: Processos em paralelo, cada um com as lojas de uma
+                parte (None ou 0 = um por CPU; 1 = no próprio processo)
+            arquivo_cache: Parquet com os resultados da execução anterior
+                (None = recalcula tudo e não grava)
             
-            wb.save(arquivo_saida)
-        except Exception as e:
-            print(f"⚠️  Aviso: Não foi possível aplicar formato texto: {e}")
+        Returns:
+            DataFrame com sugestao e colunas de detalhe (codigo_interno e
+            loja como inteiros; os zeros à esquerda são aplicados na exportação)
+        """
+        # Códigos do Excel podem vir como número ou texto com zeros à esquerda
+        df = converter_chaves(df)
         
-        print(f"[OK] Arquivo processado com sucesso!")
+        entrada = entrada_calculo(df)
+        
+        if arquivo_cache:
+            colunas = self._colunas_com_cache(entrada, df['loja'], processos, arquivo_cache)
+        else:
+            colunas = self._calcular_colunas(entrada, df['loja'], processos)
+        
+        for coluna in colunas.columns:
+            df[coluna] = colunas[coluna].to_numpy()
+        
+        if verboso:
+            self._imprimir_detalhes(df)
+        
+        return df
+    
+    def _calcular_colunas(
+        self,
+        entrada: pd.DataFrame,
+        lojas: pd.Series,
+        processos: Optional[int]
+    ) -> pd.DataFrame:
+        """Colunas de resultado no próprio processo ou divididas por loja"""
+        processos = processos or os.cpu_count() or 1
+        if processos > 1 and lojas.nunique() > 1:
+            return calcular_por_loja(self, entrada, lojas, processos)
+        return self._colunas_sugestao(entrada)
+    
+    def _parametros_cache(self) -> Dict[str, str]:
+        """Parâmetros que, se mudarem, invalidam todo o cache de sugestões"""
+        return {
+            'versao_calculo': str(VERSAO_CALCULO),
+            'assinatura_regra': ASSINATURA_REGRA,
+            'margem_seguranca': str(self.margem_seguranca),
+            'dias_giro_minimo': str(DIAS_GIRO_MINIMO),
+            'dias_giro_maximo': str(DIAS_GIRO_MAXIMO)
+        }
+    
+    def _ler_cache(self, arquivo_cache: str) -> Optional[pd.DataFrame]:
+        """
+        Resultados da execução anterior indexados pela assinatura das entradas
+        
+        Returns:
+            DataFrame ou None se não houver cache compatível com os parâmetros atuais
+        """
+        if not os.path.isfile(arquivo_cache):
+            return None
+        if metadados_etapa(arquivo_cache) != self._parametros_cache():
+            print("[INFO] Parâmetros do cálculo mudaram, recalculando todas as linhas")
+            return None
+        return pd.read_parquet(arquivo_cache).set_index('assinatura')
+    
+    def _colunas_com_cache(
+        self,
+        entrada: pd.DataFrame,
+        lojas: pd.Series,
+        processos: Optional[int],
+        arquivo_cache: str
+    ) -> pd.DataFrame:
+        """
+        Colunas de resultado recalculando só as linhas com entradas novas
+        
+        A assinatura de cada linha é o hash dos valores de entrada; o
+        resultado depende só deles e dos parâmetros gravados nos metadados do
+        cache. O cache é regravado com as linhas desta execução.
+        """
+        assinaturas = pd.util.hash_pandas_object(entrada, index=False).to_numpy()
+        anteriores = self._ler_cache(arquivo_cache)
+        
+        if anteriores is None:
+            reaproveitadas = np.zeros(len(entrada), dtype=bool)
+        else:
+            reaproveitadas = np.isin(assinaturas, anteriores.index.to_numpy())
+        
+        novas = np.flatnonzero(~reaproveitadas)
+        colunas = self._calcular_colunas(
+            entrada.iloc[novas].reset_index(drop=True),
+            lojas.iloc[novas].reset_index(drop=True),
+            processos
+        ).set_axis(novas)
+        
+        if reaproveitadas.any():
+            partes = [anteriores.loc[assinaturas[reaproveitadas]].set_axis(np.flatnonzero(reaproveitadas))]
+            if len(novas):
+                partes.append(colunas)
+            colunas = pd.concat(partes).sort_index()
+        print(f"[INFO] {reaproveitadas.sum()} de {len(entrada)} linhas sem mudança nas entradas, "
+              f"{len(novas)} recalculadas")
+        
+        cache = colunas.set_axis(assinaturas).rename_axis('assinatura').reset_index()
+        gravar_etapa(cache.drop_duplicates('assinatura'), arquivo_cache, self._parametros_cache())
+        return colunas.reset_index(drop=True)
+    
+    def _colunas_sugestao(self, entrada: pd.DataFrame) -> pd.DataFrame:
+        """
+        Colunas de resultado de processar_dataframe
         
+        Args:
+            entrada: Colunas COLUNAS_ENTRADA_CALCULO já numéricas
+            
+        Returns:
+            DataFrame com sugestao, sugestao_caixas, coberturas,
+            estrategia_usada, tendencia e motivo_sugestao (mesma ordem de linhas)
+        """
+        resultados = self.calcular_lote(
+            estoque_atual=entrada['estoque_atual'].to_numpy(),
+            venda_media_dia=entrada['venda_media_dia'].to_numpy(),
+            embalagem=entrada['embalagem'].to_numpy(),
+            venda_7dias=entrada['venda_acumulada_7dias'].to_numpy(),
+            venda_14dias=entrada['venda_acumulada_14dias'].to_numpy(),
+            venda_30dias=entrada['venda_acumulada_30dias'].to_numpy(),
+            venda_60dias=entrada['venda_acumulada_60dias'].to_numpy(),
+            ponto_pedido=entrada['ponto_pedido'].to_numpy(),
+            estoque_ideal=entrada['estoque_ideal'].to_numpy()
+        )
+        
+        return pd.DataFrame({
+            # Unidades sugeridas
+            'sugestao': resultados['sugestao_unidades'].to_numpy(),
+            # Detalhes
+            'sugestao_caixas': resultados['sugestao_caixas'].to_numpy(),
+            'dias_cobertura_atual': _arredondar(resultados['dias_cobertura_atual'], 1),
+            'dias_cobertura_apos': _arredondar(resultados['dias_cobertura_apos_pedido'].fillna(0), 1),
+            'dias_cobertura_comprador': _arredondar(resultados['dias_cobertura_comprador'], 1),
+            'estrategia_usada': resultados['estrategia'].to_numpy(),
+            'tendencia': resultados['tendencia_descricao'].fillna('N/A').to_numpy(),
+            'motivo_sugestao': resultados['motivo'].to_numpy()
+        })
+    
+    def _imprimir_detalhes(self, df: pd.DataFrame):
+        """Log detalhado de cada produto calculado"""
+        for posicao, row in enumerate(df.itertuples(index=False)):
+            print(f"[{posicao+1}/{len(df)}] Produto {formatar_codigo(row.codigo_interno)} - Loja {formatar_loja(row.loja)}")
+            print(f"  Estoque atual: {row.estoque_atual} un")
+            print(f"  Venda média/dia: {row.venda_media_dia:.2f} un")
+            print(f"  Cobertura atual: {row.dias_cobertura_atual:.1f} dias")
+            print(f"  Tendência: {row.tendencia}")
+            print(f"  ➜ Sugestão: {row.sugestao_caixas} caixas ({row.sugestao} unidades)")
+            print(f"  Motivo: {row.motivo_sugestao}")
+            print()
+    
+    def _salvar_excel(self, df: pd.DataFrame, arquivo_saida: str):
+        """Salva o resultado com codigo_interno e loja como texto (0021771, 004)"""
+        print(f"💾 Salvando arquivo: {arquivo_saida}")
+        exportar_excel(df, arquivo_saida)
+    
+    def _imprimir_resumo(self, df: pd.DataFrame):
+        """Imprime o resumo do processamento"""
         # Relatório resumido
         print("\n" + "="*70)
         print("📊 RESUMO DO PROCESSAMENTO")
@@ -313,8 +487,6 @@ class CalculadorPedido:
         print(f"\nMédia de dias de cobertura atual: {df['dias_cobertura_atual'].mean():.1f} dias")
         print(f"Média de dias de cobertura após pedido: {df['dias_cobertura_apos'].mean():.1f} dias")
         print("="*70)
-        
-        return df
     
     def gerar_relatorio_detalhado(self, df: pd.DataFrame) -> str:
         """Gera relatório detalhado em texto"""
@@ -326,7 +498,7 @@ class CalculadorPedido:
         relatorio.append("")
         
         for idx, row in df.iterrows():
-            relatorio.append(f"PRODUTO: {row['codigo_interno']} | LOJA: {row['loja']}")
+            relatorio.append(f"PRODUTO: {formatar_codigo(row['codigo_interno'])} | LOJA: {formatar_loja(row['loja'])}")
             relatorio.append("-"*70)
             relatorio.append(f"Estoque atual: {row['estoque_atual']} unidades")
             relatorio.append(f"Embalagem: {row['embalagem']} unidades/caixa")
@@ -353,9 +525,77 @@ class CalculadorPedido:
         return "\n".join(relatorio)
 
 
+def _para_arrow(df: pd.DataFrame) -> pa.Buffer:
+    """DataFrame em formato Arrow IPC (enviado aos processos sem pickle das colunas)"""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue()
+
+
+def _de_arrow(buffer: pa.Buffer) -> pd.DataFrame:
+    """DataFrame de um buffer gerado por _para_arrow"""
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+def _calcular_parte_em_processo(calculador: 'CalculadorPedido', buffer: pa.Buffer) -> pa.Buffer:
+    """Calcula as colunas de resultado de uma loja dentro de um processo do pool"""
+    return _para_arrow(calculador._colunas_sugestao(_de_arrow(buffer)))
+
+
+def calcular_por_loja(
+    calculador: CalculadorPedido,
+    entrada: pd.DataFrame,
+    lojas: pd.Series,
+    processos: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Calcula as sugestões em paralelo, uma loja por tarefa
+
+    Cada processo recebe só as colunas de entrada das linhas de uma loja,
+    em buffer Arrow, e devolve as colunas de resultado também em Arrow.
+    As lojas são enviadas em ordem crescente e o resultado volta na ordem
+    das linhas de entrada: o mesmo de calcular tudo em um único processo.
+
+    Args:
+        calculador: Calculador com os parâmetros (margem de segurança)
+        entrada: Colunas COLUNAS_ENTRADA_CALCULO já numéricas
+        lojas: Loja de cada linha da entrada
+        processos: Processos em paralelo (None = um por CPU, limitado ao número de lojas)
+
+    Returns:
+        Colunas de resultado de processar_dataframe, na ordem da entrada
+    """
+    posicoes_por_loja = entrada.groupby(lojas.to_numpy(), sort=True, dropna=False).indices
+    partes = [_para_arrow(entrada.iloc[posicoes]) for posicoes in posicoes_por_loja.values()]
+
+    processos = max(1, min(processos or os.cpu_count() or 1, len(partes)))
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        # map devolve na ordem de envio, qualquer que seja o processo que termina primeiro
+        resultados = [_de_arrow(buffer) for buffer in executor.map(_calcular_parte_em_processo, repeat(calculador), partes)]
+
+    resultado = pd.concat(resultados, ignore_index=True)
+    resultado.index = np.concatenate(list(posicoes_por_loja.values()))
+    return resultado.sort_index()
+
+
 def main():
     """Função principal para executar o calculador"""
     
+    parser = argparse.ArgumentParser(description="Calcula sugestões de pedido")
+    parser.add_argument(
+        '--excel', metavar='ARQUIVO',
+        help="Lê vendas acumuladas de uma planilha (ex.: data/gerado.xlsx) em vez do histórico"
+    )
+    parser.add_argument('--data', help="Data da posição de estoque (dd/mm/yy); padrão: mais recente")
+    parser.add_argument('--verboso', action='store_true', help="Imprime o detalhe de cada produto")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Processos em paralelo, divididos por loja (padrão: 1; 0 = um por CPU)")
+    parser.add_argument('--recalcular', action='store_true',
+                        help="Recalcula todas as linhas, sem reaproveitar a execução anterior")
+    args = parser.parse_args()
+    
     print("="*70)
     print("  CALCULADOR DE SUGESTÕES DE PEDIDO")
     print("="*70)
@@ -371,12 +611,26 @@ def main():
     # Inicializa calculador
     calculador = CalculadorPedido(dias_cobertura=4, margem_seguranca=1.2)
     
-    # Processa arquivo
+    # Processa histórico (ou planilha, se informada)
     try:
-        df = calculador.processar_arquivo(
-            arquivo_entrada="data/gerado.xlsx",
-            arquivo_saida="data/gerado_com_sugestao.xlsx"
-        )
+        if args.excel:
+            df = calculador.processar_arquivo(
+                arquivo_entrada=args.excel,
+                arquivo_saida="data/gerado_com_sugestao.xlsx",
+                verboso=args.verboso,
+                processos=args.processos,
+                arquivo_cache=None if args.recalcular else ARQUIVO_CACHE_SUGESTOES
+            )
+        else:
+            df = calculador.processar_historico(
+                arquivo_saida="data/gerado_com_sugestao.xlsx",
+                data_referencia=args.data,
+                verboso=args.verboso,
+                processos=args.processos,
+                arquivo_cache=None if args.recalcular else ARQUIVO_CACHE_SUGESTOES
+            )
+            if df.empty:
+                return
         
         # Gera relatório detalhado
         relatorio = calculador.gerar_relatorio_detalhado(df)
@@ -387,8 +641,8 @@ def main():
         
         print(f"\n📄 Relatório detalhado salvo em: data/relatorio_sugestoes.txt")
         
-    except FileNotFoundError:
-        print("[ERRO] Arquivo 'data/gerado.xlsx' não encontrado!")
+    except FileNotFoundError as e:
+        print(f"[ERRO] Arquivo não encontrado: {e.filename}")
     except Exception as e:
         print(f"[ERRO] {e}")
         import traceback
@@ -0,0 +1,194 @@
+"""
+Simulação de cenários de política de giro (what-if)
+
+Avalia uma grade de parâmetros (dias mínimos, dias máximos e margem de
+segurança) sobre todos os produtos x lojas de uma só vez: a parte numérica
+da regra (calcular_caixas, em estrategia_pedido.py) roda com os parâmetros
+em forma (cenários, 1) e devolve a matriz cenários x produtos, sem repetir o
+pipeline para cada configuração.
+
+    python -m src.cenarios_pedido --dias-minimos 3 4 5 --dias-maximos 5 6 7 --margens 1.0 1.2 1.4
+"""
+import argparse
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .banco_vendas import ARQUIVO_HISTORICO
+from .calculador_pedido import entrada_calculo
+from .estrategia_pedido import DIAS_GIRO_MAXIMO, DIAS_GIRO_MINIMO, calcular_caixas, tipo_tendencia
+from .exportacao_excel import exportar_excel
+from .indicadores_vendas import CHAVE_PRODUTO_LOJA, calcular_preco_medio, montar_entrada_calculador
+from .regras_negocio import GIRO_ESTOQUE
+
+# Planilha opcional com o resultado da grade (--excel)
+ARQUIVO_CENARIOS = 'data/cenarios_pedido.xlsx'
+
+# Células (cenários x produtos) calculadas por bloco: limita a memória da grade
+ELEMENTOS_POR_BLOCO = 4_000_000
+
+PARAMETROS_CENARIO = ['dias_minimo', 'dias_maximo', 'margem_seguranca']
+
+
+def montar_cenarios(
+    dias_minimos: Sequence[float],
+    dias_maximos: Sequence[float],
+    margens: Sequence[float]
+) -> pd.DataFrame:
+    """
+    Combinações dos parâmetros de giro (descarta dias_minimo > dias_maximo)
+
+    Returns:
+        DataFrame com dias_minimo, dias_maximo e margem_seguranca, um cenário por linha
+    """
+    grade = pd.MultiIndex.from_product(
+        [sorted(set(dias_minimos)), sorted(set(dias_maximos)), sorted(set(margens))],
+        names=PARAMETROS_CENARIO
+    ).to_frame(index=False)
+    return grade[grade['dias_minimo'] <= grade['dias_maximo']].reset_index(drop=True)
+
+
+def simular_cenarios(
+    entrada: pd.DataFrame,
+    cenarios: pd.DataFrame,
+    preco_unitario: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Totais do pedido sugerido em cada cenário
+
+    A tendência não depende dos parâmetros e é classificada uma única vez;
+    só as caixas são recalculadas, em blocos de cenários.
+
+    Args:
+        entrada: Colunas COLUNAS_ENTRADA_CALCULO (ver entrada_calculo)
+        cenarios: Parâmetros por linha (ver montar_cenarios)
+        preco_unitario: Preço por unidade de cada linha da entrada (NaN =
+            sem preço, não entra nos valores; None = valores zerados)
+
+    Returns:
+        Uma linha por cenário: os parâmetros, atual (parâmetros de
+        GIRO_ESTOQUE), produtos_com_pedido, caixas, unidades, valor_pedido,
+        valor_estoque_apos, cobertura_media_apos e cobertura_mediana_apos
+        (dias, só produtos com venda) e produtos_abaixo_minimo (produtos com
+        venda que seguem abaixo de dias_minimo após o pedido)
+    """
+    estoque = entrada['estoque_atual'].to_numpy(dtype=float)
+    venda_media = entrada['venda_media_dia'].to_numpy(dtype=float)
+    embalagem = entrada['embalagem'].to_numpy(dtype=float)
+    ponto = entrada['ponto_pedido'].to_numpy(dtype=float)
+    ideal = entrada['estoque_ideal'].to_numpy(dtype=float)
+    tendencia = tipo_tendencia(entrada['venda_acumulada_7dias'], entrada['venda_acumulada_14dias'], len(entrada))
+
+    preco = np.zeros(len(entrada)) if preco_unitario is None else np.nan_to_num(np.asarray(preco_unitario, dtype=float))
+    estoque_valorizado = np.maximum(estoque, 0) @ preco
+    com_venda = venda_media > 0
+
+    cenarios = cenarios[PARAMETROS_CENARIO].reset_index(drop=True)
+    por_bloco = max(1, ELEMENTOS_POR_BLOCO // max(len(entrada), 1))
+    resultados = []
+
+    for inicio in range(0, len(cenarios), por_bloco):
+        bloco = cenarios.iloc[inicio:inicio + por_bloco]
+        dias_minimo = bloco['dias_minimo'].to_numpy(dtype=float)[:, None]
+
+        calculo = calcular_caixas(
+            estoque, venda_media, embalagem, ponto, ideal, tendencia,
+            margem_seguranca=bloco['margem_seguranca'].to_numpy(dtype=float)[:, None],
+            dias_minimo=dias_minimo,
+            dias_maximo=bloco['dias_maximo'].to_numpy(dtype=float)[:, None]
+        )
+        unidades = calculo['sugestao_unidades']
+        valor_pedido = unidades @ preco
+
+        cobertura = (estoque[com_venda] + unidades[:, com_venda]) / venda_media[com_venda]
+        vazio = cobertura.shape[1] == 0
+
+        resultados.append(pd.DataFrame({
+            'produtos_com_pedido': (unidades > 0).sum(axis=1),
+            'caixas': calculo['sugestao_caixas'].sum(axis=1),
+            'unidades': unidades.sum(axis=1),
+            'valor_pedido': valor_pedido,
+            'valor_estoque_apos': estoque_valorizado + valor_pedido,
+            'cobertura_media_apos': np.full(len(bloco), np.nan) if vazio else cobertura.mean(axis=1),
+            'cobertura_mediana_apos': np.full(len(bloco), np.nan) if vazio else np.median(cobertura, axis=1),
+            'produtos_abaixo_minimo': (cobertura < dias_minimo).sum(axis=1)
+        }))
+
+    atual = (
+        (cenarios['dias_minimo'] == DIAS_GIRO_MINIMO)
+        & (cenarios['dias_maximo'] == DIAS_GIRO_MAXIMO)
+        & (cenarios['margem_seguranca'] == GIRO_ESTOQUE['margem_seguranca'])
+    )
+    colunas = ['produtos_com_pedido', 'caixas', 'unidades', 'valor_pedido', 'valor_estoque_apos',
+               'cobertura_media_apos', 'cobertura_mediana_apos', 'produtos_abaixo_minimo']
+    totais = pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame(columns=colunas)
+    return pd.concat([cenarios, atual.rename('atual'), totais], axis=1)
+
+
+def simular_historico(
+    cenarios: pd.DataFrame,
+    raiz: str = ARQUIVO_HISTORICO,
+    data_referencia=None
+) -> pd.DataFrame:
+    """
+    Simula os cenários com a posição de estoque de um dia do histórico
+
+    Valores a preço médio de venda dos últimos dias (o custo não é
+    importado; ver calcular_preco_medio).
+
+    Args:
+        cenarios: Parâmetros por linha (ver montar_cenarios)
+        raiz: Caminho do histórico bruto
+        data_referencia: Dia da posição de estoque (None = data mais recente)
+
+    Returns:
+        Resultado de simular_cenarios (vazio se não houver histórico)
+    """
+    df = montar_entrada_calculador(raiz, data_referencia)
+    if df.empty:
+        return pd.DataFrame()
+
+    referencia = df['data_venda'].iloc[0].date()
+    precos = calcular_preco_medio(raiz, referencia)
+    preco = df[CHAVE_PRODUTO_LOJA].merge(precos, on=CHAVE_PRODUTO_LOJA, how='left')['preco_medio']
+
+    return simular_cenarios(entrada_calculo(df), cenarios, preco.to_numpy(dtype=float))
+
+
+def main():
+    """Executa a grade de cenários na posição de estoque do histórico"""
+    parser = argparse.ArgumentParser(description="Simula políticas de giro sobre todos os produtos x lojas")
+    parser.add_argument('--dias-minimos', type=float, nargs='+', default=[3, 4, 5])
+    parser.add_argument('--dias-maximos', type=float, nargs='+', default=[5, 6, 7, 8])
+    parser.add_argument('--margens', type=float, nargs='+', default=[1.0, 1.1, 1.2, 1.3, 1.5])
+    parser.add_argument('--data', help="Data da posição de estoque (dd/mm/yy); padrão: mais recente")
+    parser.add_argument('--excel', action='store_true', help=f"Grava também {ARQUIVO_CENARIOS}")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("  SIMULAÇÃO DE CENÁRIOS DE GIRO")
+    print("="*70)
+
+    cenarios = montar_cenarios(args.dias_minimos, args.dias_maximos, args.margens)
+    if cenarios.empty:
+        print("[AVISO] Nenhum cenário válido (dias mínimos acima dos máximos)")
+        return
+
+    inicio = time.perf_counter()
+    resultado = simular_historico(cenarios, data_referencia=args.data)
+    if resultado.empty:
+        return
+    print(f"[OK] {len(resultado)} cenários simulados em {time.perf_counter() - inicio:.1f}s\n")
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200, 'display.float_format', '{:,.1f}'.format):
+        print(resultado.to_string(index=False))
+
+    if args.excel:
+        exportar_excel(resultado, ARQUIVO_CENARIOS, formatos={})
+        print(f"\n[OK] Cenários salvos em: {ARQUIVO_CENARIOS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Estratégia de balanceamento da sugestão de pedido (regra única)
+
+Giro saudável de 4-6 dias contra os valores do comprador (ponto_pedido e
+estoque_ideal), caixas fechadas e ajuste por tendência, aplicados a colunas
+inteiras de uma vez. CalculadorPedido, scripts/atualizar_simples.py e
+scripts/analisar_estrategias.py usam só esta implementação; os relatórios
+leem as colunas produzidas aqui em vez de recalcular a estratégia.
+
+Ao mudar a regra, incremente VERSAO_CALCULO em calculador_pedido.py (os
+resultados anteriores ficam em cache por assinatura das entradas).
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .regras_negocio import GIRO_ESTOQUE
+
+# Faixa de cobertura considerada saudável (dias)
+DIAS_GIRO_MINIMO = GIRO_ESTOQUE['dias_minimo']
+DIAS_GIRO_MAXIMO = GIRO_ESTOQUE['dias_maximo']
+
+# Variação semanal (%) que classifica a tendência de vendas
+TENDENCIA_FORTE = 20
+TENDENCIA_MODERADA = 5
+
+# Tipo de tendência de cada condição de _classificar_tendencia
+TIPOS_TENDENCIA = ['estavel', 'crescimento_forte', 'crescimento', 'queda_forte', 'queda']
+
+
+def _coluna(valores, tamanho: int) -> np.ndarray:
+    """Valores (array, Series ou escalar) como array float do tamanho do lote"""
+    return np.broadcast_to(np.asarray(pd.to_numeric(valores), dtype=float), tamanho)
+
+
+def _classificar_tendencia(venda_7dias, venda_14dias, tamanho: int) -> Tuple[list, np.ndarray]:
+    """Condições de cada tipo de tendência (ordem de TIPOS_TENDENCIA) e variação semanal (%)"""
+    venda_7 = _coluna(venda_7dias, tamanho)
+    venda_14 = _coluna(venda_14dias, tamanho)
+
+    sem_dados = (venda_7 == 0) | (venda_14 == 0)
+    media_7dias = venda_7 / 7
+    media_semana_anterior = (venda_14 - venda_7) / 7
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = np.where(
+            media_semana_anterior > 0,
+            ((media_7dias - media_semana_anterior) / media_semana_anterior) * 100,
+            0.0
+        )
+    variacao = np.where(sem_dados, 0.0, variacao)
+
+    condicoes = [
+        sem_dados,
+        variacao > TENDENCIA_FORTE,
+        variacao > TENDENCIA_MODERADA,
+        variacao < -TENDENCIA_FORTE,
+        variacao < -TENDENCIA_MODERADA
+    ]
+    return condicoes, variacao
+
+
+def tipo_tendencia(venda_7dias, venda_14dias, tamanho: int) -> np.ndarray:
+    """
+    Só o 'tipo' de analisar_tendencia, sem montar as descrições
+
+    Para quem recalcula a tendência muitas vezes (simulações) e só precisa
+    do tipo usado em calcular_caixas.
+    """
+    condicoes, _ = _classificar_tendencia(venda_7dias, venda_14dias, tamanho)
+    return np.select(condicoes, TIPOS_TENDENCIA, default='estavel').astype(object)
+
+
+def analisar_tendencia(venda_7dias, venda_14dias, tamanho: int) -> Dict[str, np.ndarray]:
+    """
+    Classifica a tendência comparando os últimos 7 dias com a semana anterior
+
+    Args:
+        venda_7dias: Venda acumulada dos últimos 7 dias
+        venda_14dias: Venda acumulada dos últimos 14 dias
+        tamanho: Número de produtos do lote
+
+    Returns:
+        Dicionário com arrays 'tipo', 'percentual' e 'descricao'
+    """
+    condicoes, variacao = _classificar_tendencia(venda_7dias, venda_14dias, tamanho)
+    tipo = np.select(condicoes, TIPOS_TENDENCIA, default='estavel').astype(object)
+
+    variacao_texto = np.char.mod('%.1f', variacao).astype(object)
+    descricao = np.select(
+        condicoes,
+        [
+            'Sem dados suficientes',
+            'Crescimento forte (' + variacao_texto + '%)',
+            'Crescimento moderado (' + variacao_texto + '%)',
+            'Queda forte (' + variacao_texto + '%)',
+            'Queda moderada (' + variacao_texto + '%)'
+        ],
+        default='Vendas estáveis (' + variacao_texto + '%)'
+    )
+
+    percentual = np.array([round(valor, 2) for valor in variacao.tolist()])
+    return {'tipo': tipo, 'percentual': percentual, 'descricao': descricao}
+
+
+def calcular_caixas(
+    estoque: np.ndarray,
+    venda_media: np.ndarray,
+    embalagem: np.ndarray,
+    ponto: np.ndarray,
+    ideal: np.ndarray,
+    tipo_tendencia: np.ndarray,
+    margem_seguranca=GIRO_ESTOQUE['margem_seguranca'],
+    dias_minimo=DIAS_GIRO_MINIMO,
+    dias_maximo=DIAS_GIRO_MAXIMO
+) -> Dict[str, np.ndarray]:
+    """
+    Parte numérica da regra: caixas e unidades sugeridas (sem textos)
+
+    Os parâmetros podem ser arrays que se combinam por broadcasting com as
+    colunas dos produtos: com margem_seguranca, dias_minimo e dias_maximo em
+    forma (cenários, 1), o resultado tem forma (cenários, produtos).
+
+    Args:
+        estoque: Estoque atual em unidades
+        venda_media: Venda média diária
+        embalagem: Unidades por caixa
+        ponto: ponto_pedido (NaN = não definido)
+        ideal: estoque_ideal (NaN = não definido)
+        tipo_tendencia: 'tipo' de analisar_tendencia
+        margem_seguranca: Multiplicador das metas de giro
+        dias_minimo: Menor cobertura aceita para os valores do comprador
+        dias_maximo: Maior cobertura aceita para os valores do comprador
+
+    Returns:
+        Dicionário de arrays: sugestao_caixas, sugestao_unidades,
+        estoque_suficiente, dias_cobertura_comprador e as máscaras de cada
+        ramo da regra (usadas para montar estratégia e motivo)
+    """
+    necessidade_giro_min = venda_media * dias_minimo
+    necessidade_giro_max = venda_media * dias_maximo
+    com_venda = venda_media > 0
+
+    # Valores do comprador (NaN ou zero = não definido)
+    do_comprador = (np.nan_to_num(ponto) != 0) & (np.nan_to_num(ideal) != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_cobertura_comprador = np.where(com_venda, (ideal - ponto) / venda_media, 0.0)
+    dias_cobertura_comprador = np.where(do_comprador, dias_cobertura_comprador, 0.0)
+
+    acima_maximo = do_comprador & (dias_cobertura_comprador > dias_maximo)
+    abaixo_minimo = do_comprador & ~acima_maximo & (dias_cobertura_comprador < dias_minimo)
+    no_intervalo = do_comprador & ~acima_maximo & ~abaixo_minimo
+    abaixo_ponto = no_intervalo & (estoque < ponto)
+
+    quantidade_necessaria = np.select(
+        [acima_maximo, abaixo_minimo, abaixo_ponto, no_intervalo],
+        [
+            necessidade_giro_max * margem_seguranca - estoque,
+            necessidade_giro_min * margem_seguranca - estoque,
+            ideal - estoque,
+            0.0
+        ],
+        default=necessidade_giro_min * margem_seguranca - estoque
+    )
+
+    suficiente = quantidade_necessaria <= 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        caixas = np.ceil(quantidade_necessaria / embalagem)
+
+    # Embalagem zero ou estoque/venda NaN não viram caixas (o cast para int64 daria lixo)
+    invalidas = ~suficiente & ~np.isfinite(caixas)
+    if invalidas.any():
+        posicoes = np.unique(np.nonzero(invalidas)[-1])
+        raise ValueError(
+            f"Caixas não calculáveis em {len(posicoes)} produto(s) (posições {posicoes[:10].tolist()}): "
+            "embalagem deve ser maior que zero e estoque_atual/venda_media_dia numéricos"
+        )
+
+    # Tendência: +1 caixa com crescimento forte, -1 com queda forte (mínimo 1)
+    crescimento_forte = tipo_tendencia == 'crescimento_forte'
+    reduz = (tipo_tendencia == 'queda_forte') & (caixas > 1)
+    caixas = np.where(crescimento_forte, caixas + 1, np.where(reduz, caixas - 1, caixas))
+    caixas = np.where(suficiente, 0, caixas).astype(np.int64)
+
+    return {
+        'sugestao_caixas': caixas,
+        'sugestao_unidades': np.where(suficiente, 0, caixas * embalagem).astype(np.int64),
+        'estoque_suficiente': suficiente,
+        'dias_cobertura_comprador': dias_cobertura_comprador,
+        'do_comprador': do_comprador,
+        'acima_maximo': acima_maximo,
+        'abaixo_minimo': abaixo_minimo,
+        'no_intervalo': no_intervalo,
+        'abaixo_ponto': abaixo_ponto,
+        'crescimento_forte': crescimento_forte & ~suficiente,
+        'reduz': reduz & ~suficiente
+    }
+
+
+def calcular_estrategia(
+    estoque_atual,
+    venda_media_dia,
+    embalagem,
+    venda_7dias=0,
+    venda_14dias=0,
+    ponto_pedido=None,
+    estoque_ideal=None,
+    margem_seguranca: float = GIRO_ESTOQUE['margem_seguranca'],
+    dias_minimo: float = DIAS_GIRO_MINIMO,
+    dias_maximo: float = DIAS_GIRO_MAXIMO
+) -> pd.DataFrame:
+    """
+    Sugestão, estratégia e cobertura de cada produto numa única passada
+
+    1. Com ponto_pedido e estoque_ideal (ambos diferentes de zero), calcula
+       a cobertura que eles representam: acima de dias_maximo ou abaixo de
+       dias_minimo a meta vira o limite da faixa ('giro_otimizado'); dentro
+       da faixa, repõe até estoque_ideal quando o estoque está abaixo do
+       ponto de pedido ('comprador').
+    2. Sem valores do comprador, meta de dias_minimo ('giro_saudavel').
+    3. Arredonda para cima em caixas fechadas; crescimento forte soma uma
+       caixa e queda forte tira uma (mínimo 1).
+
+    Args:
+        estoque_atual: Estoque atual em unidades
+        venda_media_dia: Venda média diária
+        embalagem: Quantidade de unidades por caixa
+        venda_7dias: Venda acumulada dos últimos 7 dias
+        venda_14dias: Venda acumulada dos últimos 14 dias
+        ponto_pedido: Mínimo do comprador (NaN/None = não definido)
+        estoque_ideal: Máximo do comprador (NaN/None = não definido)
+        margem_seguranca: Multiplicador das metas de giro
+        dias_minimo: Menor cobertura aceita para os valores do comprador
+        dias_maximo: Maior cobertura aceita para os valores do comprador
+
+    Returns:
+        DataFrame com uma linha por produto: sugestao_unidades,
+        sugestao_caixas, estoque_suficiente, dias_cobertura_atual,
+        dias_cobertura_apos_pedido (NaN com estoque suficiente),
+        dias_cobertura_comprador (NaN sem valores do comprador), estrategia,
+        observacao, ponto_pedido, estoque_ideal, tendencia_tipo,
+        tendencia_percentual, tendencia_descricao e motivo
+    """
+    estoque = np.asarray(pd.to_numeric(estoque_atual), dtype=float)
+    tamanho = len(estoque)
+    venda_media = _coluna(venda_media_dia, tamanho)
+    embalagem = _coluna(embalagem, tamanho)
+    ponto = np.full(tamanho, np.nan) if ponto_pedido is None else _coluna(ponto_pedido, tamanho)
+    ideal = np.full(tamanho, np.nan) if estoque_ideal is None else _coluna(estoque_ideal, tamanho)
+
+    tendencia = analisar_tendencia(venda_7dias, venda_14dias, tamanho)
+    calculo = calcular_caixas(
+        estoque, venda_media, embalagem, ponto, ideal, tendencia['tipo'],
+        margem_seguranca, dias_minimo, dias_maximo
+    )
+    acima_maximo = calculo['acima_maximo']
+    abaixo_minimo = calculo['abaixo_minimo']
+    no_intervalo = calculo['no_intervalo']
+    abaixo_ponto = calculo['abaixo_ponto']
+    dias_cobertura_comprador = calculo['dias_cobertura_comprador']
+    suficiente = calculo['estoque_suficiente']
+    crescimento_forte = calculo['crescimento_forte']
+    reduz = calculo['reduz']
+    sugestao_unidades = calculo['sugestao_unidades']
+    com_venda = venda_media > 0
+
+    estrategia = np.select(
+        [acima_maximo | abaixo_minimo, no_intervalo],
+        ['giro_otimizado', 'comprador'],
+        default='giro_saudavel'
+    ).astype(object)
+
+    dias_texto = np.char.mod('%.1f', dias_cobertura_comprador).astype(object)
+    observacao = np.select(
+        [acima_maximo, abaixo_minimo, abaixo_ponto, no_intervalo],
+        [
+            'Ajustado de ' + dias_texto + f' para {dias_maximo} dias (giro mais saudável)',
+            'Ajustado de ' + dias_texto + f' para {dias_minimo} dias (evitar excesso de pedidos)',
+            'Respeitando valores do comprador (' + dias_texto + ' dias de cobertura)',
+            'Estoque acima do ponto de pedido definido'
+        ],
+        default=f'Baseado em giro de {dias_minimo} dias (padrão do sistema)'
+    )
+
+    ajuste_tendencia = np.select(
+        [crescimento_forte, reduz],
+        [' + Ajustado para cima (crescimento forte)', ' + Ajustado para baixo (queda forte)'],
+        default=''
+    ).astype(object)
+    motivo = np.where(suficiente, 'Estoque atual suficiente para cobertura', observacao + ajuste_tendencia)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cobertura_atual = np.where(com_venda, estoque / venda_media, np.where(suficiente, np.inf, 0.0))
+        cobertura_apos = np.where(com_venda, (estoque + sugestao_unidades) / venda_media, np.inf)
+
+    return pd.DataFrame({
+        'sugestao_unidades': sugestao_unidades,
+        'sugestao_caixas': calculo['sugestao_caixas'],
+        'estoque_suficiente': suficiente,
+        'dias_cobertura_atual': cobertura_atual,
+        'dias_cobertura_apos_pedido': np.where(suficiente, np.nan, cobertura_apos),
+        'dias_cobertura_comprador': np.where(calculo['do_comprador'], dias_cobertura_comprador, np.nan),
+        'estrategia': estrategia,
+        'observacao': observacao,
+        'ponto_pedido': np.where(np.isnan(ponto), None, ponto).astype(object),
+        'estoque_ideal': np.where(np.isnan(ideal), None, ideal).astype(object),
+        'tendencia_tipo': np.where(suficiente, None, tendencia['tipo']),
+        'tendencia_percentual': np.where(suficiente, np.nan, tendencia['percentual']),
+        'tendencia_descricao': np.where(suficiente, None, tendencia['descricao']),
+        'motivo': motivo
+    })
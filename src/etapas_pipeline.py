@@ -0,0 +1,159 @@
+"""
+Arquivos trocados entre as etapas do pipeline diário
+
+tratamento_abc.py -> resultado_abc.parquet -> atualizar_simples.py ->
+sugestao_ia.parquet -> analisar_estrategias.py -> analise_estrategias.parquet
+
+As etapas leem e gravam Parquet (tipos preservados, leitura em fração de
+segundo); o Excel de cada etapa é só uma entrega opcional para os
+compradores (--excel nos scripts), nunca lido de volta pelo pipeline.
+"""
+import os
+import uuid
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .banco_vendas import converter_chaves, decodificar_categorias
+
+# Saída de tratamento_abc.py: registros tratados do dia importado
+ARQUIVO_RESULTADO_ABC = 'data/resultado_abc.parquet'
+
+# Saída de scripts/atualizar_simples.py: sugestão e estratégia por produto x loja
+ARQUIVO_SUGESTOES = 'data/sugestao_ia.parquet'
+
+# Saída de scripts/analisar_estrategias.py
+ARQUIVO_ANALISE_ESTRATEGIAS = 'data/analise_estrategias.parquet'
+
+
+def caminho_excel(arquivo_etapa: str) -> str:
+    """Caminho do Excel opcional correspondente ao arquivo de uma etapa"""
+    return os.path.splitext(arquivo_etapa)[0] + '.xlsx'
+
+
+class GravadorEtapa:
+    """
+    Grava o arquivo de uma etapa em lotes, substituindo o anterior só no fim
+
+    Mesmo esquema de GravadorParticao: os lotes vão para um arquivo
+    temporário, que só troca de nome com o definitivo se o bloco terminar
+    sem erro. Um leitor nunca vê o arquivo pela metade.
+
+        with GravadorEtapa(ARQUIVO_RESULTADO_ABC) as gravador:
+            for lote in lotes:
+                gravador.escrever(lote)
+
+    Args:
+        caminho: Arquivo Parquet da etapa
+        metadados: Pares chave/valor gravados no esquema (ver metadados_etapa)
+    """
+
+    def __init__(self, caminho: str, metadados: Optional[Dict[str, str]] = None):
+        self.caminho = caminho
+        self.metadados = {chave: str(valor) for chave, valor in (metadados or {}).items() if valor is not None}
+        self.registros = 0
+        self._temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        self._escritor = None
+        self._esquema_vazio = None
+
+    def __enter__(self) -> 'GravadorEtapa':
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        return self
+
+    def escrever(self, df_lote: pd.DataFrame):
+        """
+        Anexa um lote ao arquivo em gravação
+
+        Args:
+            df_lote: Registros do lote (mesmas colunas em todos os lotes)
+        """
+        # Categorias de cada lote têm dicionários próprios: em disco fica o texto
+        tabela = decodificar_categorias(pa.Table.from_pandas(df_lote, preserve_index=False))
+        tabela = tabela.replace_schema_metadata(self.metadados)
+
+        if tabela.num_rows == 0:
+            if self._esquema_vazio is None:
+                self._esquema_vazio = tabela
+            return
+
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(self._temporario, tabela.schema, compression='snappy')
+        else:
+            tabela = tabela.cast(self._escritor.schema)
+
+        self._escritor.write_table(tabela)
+        self.registros += tabela.num_rows
+
+    def __exit__(self, tipo_erro, erro, rastreio):
+        try:
+            if self._escritor is not None:
+                self._escritor.close()
+            elif tipo_erro is None and self._esquema_vazio is not None:
+                pq.write_table(self._esquema_vazio, self._temporario)
+        finally:
+            if tipo_erro is None and os.path.exists(self._temporario):
+                os.replace(self._temporario, self.caminho)
+            elif os.path.exists(self._temporario):
+                os.remove(self._temporario)
+        return False
+
+
+def gravar_etapa(df: pd.DataFrame, caminho: str, metadados: Optional[Dict[str, str]] = None) -> str:
+    """
+    Grava o resultado de uma etapa, substituindo atomicamente o anterior
+
+    Args:
+        df: Resultado da etapa
+        caminho: Arquivo Parquet da etapa
+        metadados: Pares chave/valor gravados no esquema (opcional)
+
+    Returns:
+        Caminho gravado
+    """
+    with GravadorEtapa(caminho, metadados) as gravador:
+        gravador.escrever(df)
+    return caminho
+
+
+def ler_etapa(caminho: str, colunas: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Lê o resultado de uma etapa anterior
+
+    Se só existir o Excel da etapa (gerado antes do pipeline em Parquet), lê
+    o Excel e avisa.
+
+    Args:
+        caminho: Arquivo Parquet da etapa
+        colunas: Colunas a ler (None = todas)
+
+    Returns:
+        DataFrame ou None se a etapa ainda não foi executada
+    """
+    if os.path.isfile(caminho):
+        return pd.read_parquet(caminho, columns=colunas)
+
+    excel = caminho_excel(caminho)
+    if os.path.isfile(excel):
+        print(f"[AVISO] {caminho} não encontrado, lendo {excel} (mais lento)")
+        df = converter_chaves(pd.read_excel(excel))
+        return df[colunas] if colunas else df
+
+    return None
+
+
+def metadados_etapa(caminho: str) -> Dict[str, str]:
+    """
+    Metadados gravados com o arquivo de uma etapa (lidos só do rodapé)
+
+    Returns:
+        Dicionário chave/valor (vazio se o arquivo não existir)
+    """
+    try:
+        metadados = pq.read_schema(caminho).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return {}
+    return {chave.decode('utf-8'): valor.decode('utf-8') for chave, valor in metadados.items()}
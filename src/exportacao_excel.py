@@ -0,0 +1,136 @@
+"""
+Exportação de planilhas Excel para os compradores
+
+Grava em modo streaming (write-only do openpyxl): cada linha é escrita e
+descartada da memória, e o arquivo é salvo uma única vez. Os formatos das
+colunas (ex.: texto '@' para codigo_interno e loja, que assim mantêm os
+zeros à esquerda) são declarados antes da escrita, sem reabrir o arquivo.
+"""
+import os
+import uuid
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from .banco_vendas import formatar_chaves
+
+# Formato de célula texto do Excel
+FORMATO_TEXTO = '@'
+
+# Códigos e lojas como texto (0021771, 004)
+FORMATOS_CHAVES = {'codigo_interno': FORMATO_TEXTO, 'loja': FORMATO_TEXTO}
+
+
+def linhas_excel(df: pd.DataFrame) -> Iterable[tuple]:
+    """Linhas do DataFrame como tuplas de valores aceitos pelo openpyxl (NaN vira célula vazia)"""
+    valores = df.astype(object).where(df.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+class PlanilhaExcel:
+    """
+    Planilha Excel gravada em lotes, substituindo o arquivo anterior só no fim
+
+    O arquivo é salvo em um temporário e renomeado se o bloco terminar sem
+    erro; com exceção, o Excel anterior fica intacto.
+
+        with PlanilhaExcel('data/sugestao_ia.xlsx') as planilha:
+            for lote in lotes:
+                planilha.escrever(lote)
+
+    Args:
+        arquivo_excel: Arquivo .xlsx de saída
+        formatos: Formato de número por coluna (colunas ausentes no DataFrame são ignoradas)
+        identificador: Texto gravado na propriedade 'identifier' do arquivo (opcional)
+        nome_planilha: Nome da aba
+    """
+
+    def __init__(
+        self,
+        arquivo_excel: str,
+        formatos: Optional[Dict[str, str]] = None,
+        identificador: Optional[str] = None,
+        nome_planilha: str = 'Sheet1'
+    ):
+        self.arquivo_excel = arquivo_excel
+        self.formatos = FORMATOS_CHAVES if formatos is None else formatos
+        self.linhas = 0
+        self._livro = Workbook(write_only=True)
+        self._livro.properties.identifier = identificador
+        self._planilha = self._livro.create_sheet(nome_planilha)
+        self._temporario = f"{arquivo_excel}.{uuid.uuid4().hex}.tmp"
+        self._colunas = None
+        self._formatadas = []
+
+    def __enter__(self) -> 'PlanilhaExcel':
+        return self
+
+    def _celula(self, valor, formato: Optional[str] = None, negrito: bool = False) -> WriteOnlyCell:
+        celula = WriteOnlyCell(self._planilha, value=valor)
+        if formato:
+            celula.number_format = formato
+        if negrito:
+            celula.font = Font(bold=True)
+        return celula
+
+    def escrever(self, df_lote: pd.DataFrame):
+        """
+        Anexa as linhas do lote (códigos e lojas com zeros à esquerda)
+
+        Args:
+            df_lote: Linhas do lote (mesmas colunas em todos os lotes)
+        """
+        if self._colunas is None:
+            self._colunas = list(df_lote.columns)
+            self._formatadas = [
+                (indice, self.formatos[nome]) for indice, nome in enumerate(self._colunas)
+                if nome in self.formatos
+            ]
+            self._planilha.append([self._celula(nome, negrito=True) for nome in self._colunas])
+
+        for linha in linhas_excel(formatar_chaves(df_lote)):
+            if self._formatadas:
+                linha = list(linha)
+                for indice, formato in self._formatadas:
+                    linha[indice] = self._celula(linha[indice], formato)
+            self._planilha.append(linha)
+        self.linhas += len(df_lote)
+
+    def __exit__(self, tipo_erro, erro, rastreio):
+        try:
+            if tipo_erro is None:
+                self._livro.save(self._temporario)
+                os.replace(self._temporario, self.arquivo_excel)
+            elif not self._planilha.closed:
+                # Encerra a planilha parcial (o openpyxl mantém um arquivo temporário aberto)
+                self._planilha.close()
+        finally:
+            if os.path.exists(self._temporario):
+                os.remove(self._temporario)
+        return False
+
+
+def exportar_excel(
+    df: pd.DataFrame,
+    arquivo_excel: str,
+    formatos: Optional[Dict[str, str]] = None,
+    identificador: Optional[str] = None
+) -> str:
+    """
+    Grava um DataFrame em Excel numa única passada (sem reabrir o arquivo)
+
+    Args:
+        df: Dados a exportar
+        arquivo_excel: Arquivo .xlsx de saída
+        formatos: Formato de número por coluna (padrão: FORMATOS_CHAVES)
+        identificador: Texto gravado na propriedade 'identifier' do arquivo (opcional)
+
+    Returns:
+        Caminho gravado
+    """
+    with PlanilhaExcel(arquivo_excel, formatos, identificador) as planilha:
+        planilha.escrever(df)
+    return arquivo_excel
@@ -0,0 +1,196 @@
+"""
+Indicadores de vendas calculados a partir do histórico Parquet
+
+Janelas móveis de vendas (7/14/30/60 dias) e venda média diária por
+produto x loja, no formato esperado pelo CalculadorPedido. Dias sem
+registro de um produto/loja contam como zero venda.
+"""
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .banco_vendas import (
+    ARQUIVO_HISTORICO,
+    DataVenda,
+    caminho_resumo_diario,
+    converter_data,
+    ler_historico,
+    listar_datas,
+    montar_filtro,
+)
+
+# Janelas de venda acumulada usadas pelo calculador (em dias corridos)
+JANELAS_VENDAS = (7, 14, 30, 60)
+
+# Janela usada para a venda média diária
+DIAS_MEDIA = 30
+
+CHAVE_PRODUTO_LOJA = ['codigo_interno', 'loja']
+
+# Colunas do dia de referência (cadastro/estoque) levadas ao calculador
+COLUNAS_CADASTRO = [
+    'codigo_interno', 'loja', 'descricao', 'secao',
+    'estoque', 'ponto_pedido', 'estoque_ideal', 'embalagem'
+]
+
+
+def coluna_janela(dias: int) -> str:
+    """Nome da coluna de venda acumulada de uma janela"""
+    return f'venda_acumulada_{dias}dias'
+
+
+def _data_referencia(raiz: str, data_referencia: Optional[DataVenda]) -> Optional[date]:
+    """Data informada ou a mais recente do resumo diário"""
+    if data_referencia is not None:
+        return converter_data(data_referencia)
+    datas = listar_datas(caminho_resumo_diario(raiz))
+    return datas[-1] if datas else None
+
+
+def calcular_janelas_vendas(
+    raiz: str = ARQUIVO_HISTORICO,
+    data_referencia: Optional[DataVenda] = None,
+    janelas: Sequence[int] = JANELAS_VENDAS,
+    dias_media: int = DIAS_MEDIA
+) -> pd.DataFrame:
+    """
+    Calcula vendas acumuladas e venda média diária por produto x loja
+
+    Lê do resumo diário só as datas da maior janela e faz uma única
+    agregação: cada dia entra na soma das janelas que o contêm. Dias sem
+    registro contam como zero, então uma venda de 60 dias é a soma de 60
+    dias corridos até a data de referência, não de 60 registros.
+
+    A média diária divide a venda dos últimos dias_media dias pelo número
+    de dias desse período cobertos pelo histórico (um histórico de 10 dias
+    não é dividido por 30).
+
+    Args:
+        raiz: Caminho do histórico bruto
+        data_referencia: Último dia das janelas (None = data mais recente)
+        janelas: Tamanhos das janelas em dias
+        dias_media: Janela usada para venda_media_dia
+
+    Returns:
+        DataFrame com codigo_interno, loja, venda_acumulada_<N>dias e
+        venda_media_dia (vazio se não houver histórico)
+    """
+    colunas_saida = CHAVE_PRODUTO_LOJA + [coluna_janela(d) for d in janelas] + ['venda_media_dia']
+
+    raiz_resumo = caminho_resumo_diario(raiz)
+    referencia = _data_referencia(raiz, data_referencia)
+    if referencia is None:
+        return pd.DataFrame(columns=colunas_saida)
+
+    maior_janela = max(max(janelas), dias_media)
+    inicio = referencia - timedelta(days=maior_janela - 1)
+    df = ler_historico(
+        raiz_resumo,
+        colunas=CHAVE_PRODUTO_LOJA + ['data_venda', 'quantidade_vendida'],
+        filtro=montar_filtro(data_inicio=inicio, data_fim=referencia)
+    )
+    if df is None or df.empty:
+        return pd.DataFrame(columns=colunas_saida)
+
+    # Idade do registro em dias (0 = data de referência)
+    idade = (pd.Timestamp(referencia) - df['data_venda']).dt.days.to_numpy()
+    quantidade = df['quantidade_vendida'].fillna(0).to_numpy()
+
+    tamanhos = sorted(set(janelas) | {dias_media})
+    df = df[CHAVE_PRODUTO_LOJA].assign(**{
+        coluna_janela(d): np.where(idade < d, quantidade, 0.0) for d in tamanhos
+    })
+    resultado = df.groupby(CHAVE_PRODUTO_LOJA, observed=True, sort=False).sum().reset_index()
+
+    # Dias da janela da média efetivamente cobertos pelo histórico
+    primeira_data = listar_datas(raiz_resumo)[0]
+    dias_cobertos = min(dias_media, (referencia - primeira_data).days + 1)
+    resultado['venda_media_dia'] = resultado[coluna_janela(dias_media)] / max(dias_cobertos, 1)
+
+    return resultado[colunas_saida]
+
+
+def calcular_preco_medio(
+    raiz: str = ARQUIVO_HISTORICO,
+    data_referencia: Optional[DataVenda] = None,
+    dias: int = DIAS_MEDIA
+) -> pd.DataFrame:
+    """
+    Preço médio de venda por produto x loja (valor_venda / quantidade_vendida)
+
+    O histórico não guarda custo (cmv é descartado na importação); o preço
+    de venda é a referência disponível para valorizar estoque e pedidos.
+
+    Args:
+        raiz: Caminho do histórico bruto
+        data_referencia: Último dia do período (None = data mais recente)
+        dias: Dias corridos considerados até a data de referência
+
+    Returns:
+        DataFrame com codigo_interno, loja e preco_medio (NaN sem venda no
+        período; vazio se não houver histórico)
+    """
+    colunas_saida = CHAVE_PRODUTO_LOJA + ['preco_medio']
+
+    referencia = _data_referencia(raiz, data_referencia)
+    if referencia is None:
+        return pd.DataFrame(columns=colunas_saida)
+
+    df = ler_historico(
+        caminho_resumo_diario(raiz),
+        colunas=CHAVE_PRODUTO_LOJA + ['quantidade_vendida', 'valor_venda'],
+        filtro=montar_filtro(data_inicio=referencia - timedelta(days=dias - 1), data_fim=referencia)
+    )
+    if df is None or df.empty:
+        return pd.DataFrame(columns=colunas_saida)
+
+    totais = df.groupby(CHAVE_PRODUTO_LOJA, observed=True, sort=False)[['quantidade_vendida', 'valor_venda']].sum()
+    quantidade = totais['quantidade_vendida'].where(totais['quantidade_vendida'] > 0)
+    totais['preco_medio'] = totais['valor_venda'] / quantidade
+    return totais.reset_index()[colunas_saida]
+
+
+def montar_entrada_calculador(
+    raiz: str = ARQUIVO_HISTORICO,
+    data_referencia: Optional[DataVenda] = None
+) -> pd.DataFrame:
+    """
+    Monta a entrada do CalculadorPedido direto do histórico (sem Excel)
+
+    Estoque, ponto de pedido, estoque ideal e embalagem vêm da importação
+    do dia de referência; vendas acumuladas e média, de calcular_janelas_vendas.
+
+    Args:
+        raiz: Caminho do histórico bruto
+        data_referencia: Dia da posição de estoque (None = data mais recente)
+
+    Returns:
+        DataFrame com as colunas esperadas por CalculadorPedido.processar_dataframe
+        (vazio se não houver histórico)
+    """
+    referencia = _data_referencia(raiz, data_referencia)
+    if referencia is None:
+        return pd.DataFrame()
+
+    cadastro = ler_historico(
+        raiz,
+        colunas=COLUNAS_CADASTRO,
+        filtro=montar_filtro(data_inicio=referencia, data_fim=referencia)
+    )
+    if cadastro is None or cadastro.empty:
+        print(f"[AVISO] Sem registros no histórico para {referencia}")
+        return pd.DataFrame()
+
+    cadastro = cadastro.drop_duplicates(CHAVE_PRODUTO_LOJA, keep='last').rename(columns={'estoque': 'estoque_atual'})
+    janelas = calcular_janelas_vendas(raiz, referencia)
+
+    entrada = cadastro.merge(janelas, on=CHAVE_PRODUTO_LOJA, how='left')
+    colunas_venda = [coluna_janela(d) for d in JANELAS_VENDAS] + ['venda_media_dia']
+    entrada[colunas_venda] = entrada[colunas_venda].fillna(0.0)
+    entrada['estoque_atual'] = entrada['estoque_atual'].fillna(0)
+    entrada['embalagem'] = entrada['embalagem'].where(entrada['embalagem'] > 0, 1)
+    entrada['data_venda'] = pd.Timestamp(referencia)
+
+    return entrada.reset_index(drop=True)
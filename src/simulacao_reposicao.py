@@ -0,0 +1,367 @@
+"""
+Simulação retroativa (backtest) da política de reposição
+
+Reproduz dia a dia as vendas do histórico contra a regra do
+CalculadorPedido: o estoque simulado recebe os pedidos após o prazo de
+entrega, em caixas fechadas, e perde as vendas que não consegue atender.
+Cada dia é um passo vetorizado sobre todas as séries produto x loja, então
+meses de histórico da rede inteira rodam em segundos.
+
+    python -m src.simulacao_reposicao --inicio 01/09/25 --fim 30/11/25 --prazo 2
+
+Simplificações:
+- A demanda é a quantidade_vendida registrada (vendas perdidas na época
+  não aparecem no histórico).
+- O estoque de abertura de cada série é o estoque do seu primeiro dia no
+  período somado às vendas desse dia; o estoque simulado nunca fica
+  negativo (a venda sem estoque é perdida).
+- O estoque considerado no pedido é a posição (estoque + pedidos em
+  trânsito); sem isso, um prazo maior que o intervalo de revisão repetiria
+  o mesmo pedido a cada dia.
+"""
+import argparse
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .banco_vendas import (
+    ARQUIVO_HISTORICO,
+    caminho_resumo_diario,
+    converter_data,
+    formatar_data,
+    ler_historico,
+    listar_datas,
+    montar_filtro,
+)
+from .calculador_pedido import CalculadorPedido
+from .estrategia_pedido import DIAS_GIRO_MAXIMO, DIAS_GIRO_MINIMO, calcular_caixas, tipo_tendencia
+from .etapas_pipeline import caminho_excel, gravar_etapa
+from .exportacao_excel import exportar_excel
+from .indicadores_vendas import CHAVE_PRODUTO_LOJA, DIAS_MEDIA
+
+# Resultado por produto x loja da última simulação (--excel grava também o .xlsx)
+ARQUIVO_SIMULACAO = 'data/simulacao_reposicao.parquet'
+
+# Dias entre o pedido (fim do dia) e a chegada na loja (início do dia)
+PRAZO_ENTREGA_DIAS = 1
+
+# Cobertura acima da qual o dia conta como excesso (alerta 'estoque_alto' de regras_negocio)
+DIAS_COBERTURA_EXCESSO = 10
+
+ESTRATEGIAS = np.array(['giro_otimizado', 'comprador', 'giro_saudavel'], dtype=object)
+
+
+def _matriz(dias: np.ndarray, series: np.ndarray, valores: np.ndarray, forma, vazio: float = 0.0) -> np.ndarray:
+    """Matriz dias x séries preenchida com os valores dos registros"""
+    matriz = np.full(forma, vazio)
+    matriz[dias, series] = valores
+    return matriz
+
+
+def carregar_series(
+    data_inicio,
+    data_fim,
+    raiz: str = ARQUIVO_HISTORICO
+) -> Optional[Dict]:
+    """
+    Monta as matrizes dias x séries do período a simular
+
+    Lê do resumo diário as vendas e o estoque (mais DIAS_MEDIA dias antes
+    do início, para as médias do primeiro dia) e do histórico bruto os
+    parâmetros do comprador de cada dia. Dias sem registro têm venda zero;
+    ponto de pedido, estoque ideal e embalagem repetem o último valor.
+
+    Args:
+        data_inicio: Primeiro dia simulado
+        data_fim: Último dia simulado
+        raiz: Caminho do histórico bruto
+
+    Returns:
+        Dicionário com chaves (codigo_interno, loja), datas, vendas (com os
+        dias de aquecimento), aquecimento, dias_historico, estoque,
+        ponto_pedido, estoque_ideal e embalagem; None sem registros no período
+    """
+    inicio = converter_data(data_inicio)
+    fim = converter_data(data_fim)
+    carga = inicio - timedelta(days=DIAS_MEDIA - 1)
+
+    resumo = ler_historico(
+        caminho_resumo_diario(raiz),
+        colunas=CHAVE_PRODUTO_LOJA + ['data_venda', 'quantidade_vendida', 'estoque'],
+        filtro=montar_filtro(data_inicio=carga, data_fim=fim)
+    )
+    if resumo is None or resumo.empty:
+        return None
+
+    cadastro = ler_historico(
+        raiz,
+        colunas=CHAVE_PRODUTO_LOJA + ['data_venda', 'ponto_pedido', 'estoque_ideal', 'embalagem'],
+        filtro=montar_filtro(data_inicio=inicio, data_fim=fim)
+    )
+    cadastro = cadastro.drop_duplicates(CHAVE_PRODUTO_LOJA + ['data_venda'], keep='last')
+
+    # Séries: produto x loja com registro no período simulado
+    no_periodo = resumo['data_venda'] >= pd.Timestamp(inicio)
+    chaves = resumo.loc[no_periodo, CHAVE_PRODUTO_LOJA].drop_duplicates().reset_index(drop=True)
+    if chaves.empty:
+        return None
+    indice_series = pd.MultiIndex.from_frame(chaves)
+
+    aquecimento = (inicio - carga).days
+    total_dias = (fim - carga).days + 1
+    forma = (total_dias, len(chaves))
+
+    serie = indice_series.get_indexer(pd.MultiIndex.from_frame(resumo[CHAVE_PRODUTO_LOJA]))
+    dia = (resumo['data_venda'] - pd.Timestamp(carga)).dt.days.to_numpy()
+    valido = serie >= 0
+    vendas = _matriz(
+        dia[valido], serie[valido],
+        resumo['quantidade_vendida'].fillna(0).clip(lower=0).to_numpy()[valido], forma
+    )
+    estoque = _matriz(dia[valido], serie[valido], resumo['estoque'].to_numpy(dtype=float)[valido], forma, np.nan)
+
+    serie = indice_series.get_indexer(pd.MultiIndex.from_frame(cadastro[CHAVE_PRODUTO_LOJA]))
+    dia = (cadastro['data_venda'] - pd.Timestamp(carga)).dt.days.to_numpy()
+    valido = serie >= 0
+    parametros = {
+        coluna: pd.DataFrame(_matriz(
+            dia[valido], serie[valido],
+            pd.to_numeric(cadastro[coluna]).to_numpy(dtype=float)[valido], forma, np.nan
+        )).ffill().to_numpy()[aquecimento:]
+        for coluna in ('ponto_pedido', 'estoque_ideal', 'embalagem')
+    }
+    embalagem = parametros['embalagem']
+    parametros['embalagem'] = np.where(embalagem > 0, embalagem, 1.0)
+
+    # Dias de histórico até cada linha (a média diária não divide por dias inexistentes)
+    primeira_data = listar_datas(caminho_resumo_diario(raiz))[0]
+    dias_historico = np.arange(total_dias) + (carga - primeira_data).days + 1
+
+    return {
+        'chaves': chaves,
+        'datas': pd.date_range(inicio, fim, freq='D'),
+        'vendas': vendas,
+        'aquecimento': aquecimento,
+        'dias_historico': dias_historico,
+        'estoque': estoque[aquecimento:],
+        **parametros
+    }
+
+
+def simular_reposicao(
+    series: Dict,
+    calculador: Optional[CalculadorPedido] = None,
+    prazo_entrega: int = PRAZO_ENTREGA_DIAS,
+    intervalo_revisao: int = 1,
+    usar_comprador: bool = True,
+    dias_minimo: float = DIAS_GIRO_MINIMO,
+    dias_maximo: float = DIAS_GIRO_MAXIMO
+) -> pd.DataFrame:
+    """
+    Simula o estoque de cada série sob a política do calculador
+
+    Cada dia: chegam os pedidos do prazo, as vendas consomem o estoque (o
+    que falta é venda perdida) e, nos dias de revisão, a regra de
+    estrategia_pedido calcula o pedido com as médias do histórico até o dia.
+
+    Args:
+        series: Resultado de carregar_series
+        calculador: Política simulada (margem_seguranca; padrão: CalculadorPedido())
+        prazo_entrega: Dias entre o pedido e a chegada (mínimo 1)
+        intervalo_revisao: Dias entre pedidos (1 = pedido diário)
+        usar_comprador: False ignora ponto_pedido e estoque_ideal (tudo
+            'giro_saudavel'), para comparar com a regra completa
+        dias_minimo: Menor cobertura da faixa de giro
+        dias_maximo: Maior cobertura da faixa de giro
+
+    Returns:
+        DataFrame por produto x loja: dias_simulados, demanda,
+        unidades_vendidas, unidades_perdidas, nivel_servico, dias_ruptura,
+        dias_excesso, pedidos, caixas_pedidas, unidades_pedidas,
+        estoque_medio, estoque_final, dias_sem_estoque_real (estoque
+        registrado zerado) e estrategia (a mais usada nas revisões)
+    """
+    calculador = calculador or CalculadorPedido()
+    prazo_entrega = max(int(prazo_entrega), 1)
+    intervalo_revisao = max(int(intervalo_revisao), 1)
+
+    vendas = series['vendas']
+    aquecimento = series['aquecimento']
+    dias, tamanho = series['estoque'].shape
+    acumulado = np.vstack([np.zeros(tamanho), np.cumsum(vendas, axis=0)])
+    dias_media = np.clip(series['dias_historico'], 1, DIAS_MEDIA)
+
+    # Estoque de abertura a partir do primeiro registro de cada série
+    registrado = ~np.isnan(series['estoque'])
+    primeiro_dia = np.where(registrado.any(axis=0), registrado.argmax(axis=0), dias)
+    abertura = np.maximum(np.nan_to_num(series['estoque']) + vendas[aquecimento:], 0)
+
+    estoque = np.zeros(tamanho)
+    transito = np.zeros(tamanho)
+    chegadas = np.zeros((dias + prazo_entrega, tamanho))
+    sem_valor = np.full(tamanho, np.nan)
+
+    vendidas = np.zeros(tamanho)
+    perdidas = np.zeros(tamanho)
+    dias_ruptura = np.zeros(tamanho, dtype=np.int64)
+    dias_excesso = np.zeros(tamanho, dtype=np.int64)
+    pedidos = np.zeros(tamanho, dtype=np.int64)
+    caixas_pedidas = np.zeros(tamanho, dtype=np.int64)
+    unidades_pedidas = np.zeros(tamanho, dtype=np.int64)
+    estoque_somado = np.zeros(tamanho)
+    revisoes = np.zeros((len(ESTRATEGIAS), tamanho), dtype=np.int64)
+
+    for dia in range(dias):
+        linha = aquecimento + dia
+        ativas = primeiro_dia <= dia
+        novas = primeiro_dia == dia
+        estoque[novas] = abertura[dia, novas]
+
+        estoque += chegadas[dia]
+        transito -= chegadas[dia]
+
+        demanda = vendas[linha]
+        vendido = np.minimum(estoque, demanda)
+        estoque -= vendido
+        vendidas += vendido
+        perdidas += demanda - vendido
+        dias_ruptura += demanda > vendido
+        estoque_somado += np.where(ativas, estoque, 0.0)
+
+        # Médias até o fim do dia, como calcular_janelas_vendas
+        venda_7dias = np.trunc(acumulado[linha + 1] - acumulado[linha + 1 - 7])
+        venda_14dias = np.trunc(acumulado[linha + 1] - acumulado[linha + 1 - 14])
+        venda_media = (acumulado[linha + 1] - acumulado[linha + 1 - DIAS_MEDIA]) / dias_media[linha]
+
+        dias_excesso += ativas & (estoque > 0) & (estoque > venda_media * DIAS_COBERTURA_EXCESSO)
+
+        if dia % intervalo_revisao:
+            continue
+
+        tendencia = tipo_tendencia(venda_7dias, venda_14dias, tamanho)
+        calculo = calcular_caixas(
+            np.trunc(estoque + transito), venda_media, np.trunc(series['embalagem'][dia]),
+            np.trunc(series['ponto_pedido'][dia]) if usar_comprador else sem_valor,
+            np.trunc(series['estoque_ideal'][dia]) if usar_comprador else sem_valor,
+            tendencia, calculador.margem_seguranca, dias_minimo, dias_maximo
+        )
+        unidades = np.where(ativas, calculo['sugestao_unidades'], 0)
+
+        chegadas[dia + prazo_entrega] += unidades
+        transito += unidades
+        pedidos += unidades > 0
+        caixas_pedidas += np.where(ativas, calculo['sugestao_caixas'], 0)
+        unidades_pedidas += unidades
+
+        estrategia = np.select(
+            [calculo['acima_maximo'] | calculo['abaixo_minimo'], calculo['no_intervalo']], [0, 1], default=2
+        )
+        revisoes[estrategia, np.arange(tamanho)] += ativas
+
+    demanda_total = vendidas + perdidas
+    dias_simulados = np.maximum(dias - primeiro_dia, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nivel_servico = np.where(demanda_total > 0, vendidas / demanda_total, 1.0)
+        estoque_medio = np.where(dias_simulados > 0, estoque_somado / dias_simulados, 0.0)
+
+    return series['chaves'].assign(
+        dias_simulados=dias_simulados,
+        demanda=demanda_total,
+        unidades_vendidas=vendidas,
+        unidades_perdidas=perdidas,
+        nivel_servico=nivel_servico,
+        dias_ruptura=dias_ruptura,
+        dias_excesso=dias_excesso,
+        pedidos=pedidos,
+        caixas_pedidas=caixas_pedidas,
+        unidades_pedidas=unidades_pedidas,
+        estoque_medio=estoque_medio,
+        estoque_final=estoque,
+        dias_sem_estoque_real=(registrado & (series['estoque'] <= 0)).sum(axis=0),
+        estrategia=ESTRATEGIAS[revisoes.argmax(axis=0)]
+    )
+
+
+def resumir_simulacao(resultado: pd.DataFrame) -> pd.DataFrame:
+    """
+    Indicadores da simulação por estratégia (mais a linha 'total')
+
+    Returns:
+        DataFrame com series, nivel_servico (vendido / demanda),
+        dias_ruptura, dias_excesso e pedidos médios por série, e
+        dias_sem_estoque_real médio (o que aconteceu de fato)
+    """
+    def indicadores(grupo: pd.DataFrame) -> pd.Series:
+        demanda = grupo['demanda'].sum()
+        return pd.Series({
+            'series': len(grupo),
+            'nivel_servico': grupo['unidades_vendidas'].sum() / demanda if demanda else 1.0,
+            'dias_ruptura': grupo['dias_ruptura'].mean(),
+            'dias_excesso': grupo['dias_excesso'].mean(),
+            'pedidos': grupo['pedidos'].mean(),
+            'dias_sem_estoque_real': grupo['dias_sem_estoque_real'].mean()
+        })
+
+    por_estrategia = {estrategia: indicadores(grupo) for estrategia, grupo in resultado.groupby('estrategia')}
+    por_estrategia['total'] = indicadores(resultado)
+    resumo = pd.DataFrame(por_estrategia).T
+    resumo['series'] = resumo['series'].astype(int)
+    return resumo.rename_axis('estrategia').reset_index()
+
+
+def main():
+    """Simula a política de reposição sobre o histórico"""
+    parser = argparse.ArgumentParser(description="Simula a política de reposição sobre o histórico de vendas")
+    parser.add_argument('--inicio', help="Primeiro dia simulado (dd/mm/yy); padrão: primeiro dia do histórico")
+    parser.add_argument('--fim', help="Último dia simulado (dd/mm/yy); padrão: mais recente")
+    parser.add_argument('--prazo', type=int, default=PRAZO_ENTREGA_DIAS, help="Dias entre pedido e entrega")
+    parser.add_argument('--revisao', type=int, default=1, help="Dias entre pedidos (padrão: diário)")
+    parser.add_argument('--margem', type=float, default=1.2, help="Margem de segurança da política")
+    parser.add_argument('--sem-comprador', action='store_true',
+                        help="Ignora ponto_pedido e estoque_ideal (só giro saudável)")
+    parser.add_argument('--excel', action='store_true', help="Grava também o Excel do resultado por série")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("  SIMULAÇÃO DA POLÍTICA DE REPOSIÇÃO")
+    print("="*70)
+
+    datas = listar_datas(caminho_resumo_diario(ARQUIVO_HISTORICO))
+    if not datas:
+        print(f"[AVISO] Histórico vazio: {ARQUIVO_HISTORICO}")
+        return
+    inicio = converter_data(args.inicio) if args.inicio else datas[0]
+    fim = converter_data(args.fim) if args.fim else datas[-1]
+
+    tempo = time.perf_counter()
+    series = carregar_series(inicio, fim)
+    if series is None:
+        print(f"[AVISO] Sem registros entre {formatar_data(inicio)} e {formatar_data(fim)}")
+        return
+    print(f"[INFO] {series['estoque'].shape[1]:,} séries x {len(series['datas'])} dias "
+          f"({formatar_data(inicio)} a {formatar_data(fim)})")
+
+    resultado = simular_reposicao(
+        series,
+        CalculadorPedido(margem_seguranca=args.margem),
+        prazo_entrega=args.prazo,
+        intervalo_revisao=args.revisao,
+        usar_comprador=not args.sem_comprador
+    )
+    print(f"[OK] Simulação concluída em {time.perf_counter() - tempo:.1f}s\n")
+
+    with pd.option_context('display.width', 200, 'display.float_format', '{:,.2f}'.format):
+        print(resumir_simulacao(resultado).to_string(index=False))
+
+    gravar_etapa(resultado, ARQUIVO_SIMULACAO)
+    print(f"\n[OK] Resultado por série salvo em: {ARQUIVO_SIMULACAO}")
+    if args.excel:
+        exportar_excel(resultado, caminho_excel(ARQUIVO_SIMULACAO))
+        print(f"[OK] Excel salvo em: {caminho_excel(ARQUIVO_SIMULACAO)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,14 +7,113 @@ Este script processa o arquivo grid_tmp_abcmerc.csv:
 1. Lê os nomes das colunas de colunas.txt
 2. Remove colunas desnecessárias
 3. Adiciona coluna data_venda informada pelo usuário
-4. Gera arquivo Excel com resultado
+4. Grava o resultado em data/resultado_abc.parquet, lido pela etapa seguinte
+   (o Excel resultado_abc.xlsx só é gerado com --excel)
+
+O CSV é lido e gravado em lotes (LINHAS_POR_LOTE), com memória limitada
+independente do tamanho da exportação.
 """
 
+import argparse
+import codecs
+import hashlib
+import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import os
+import re
+import sys
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from datetime import datetime, timedelta
-import pyarrow.parquet as pq
-import pyarrow as pa
+
+from src.banco_vendas import (
+    ARQUIVO_HISTORICO,
+    COLUNAS_CATEGORICAS,
+    TIPOS_CHAVES,
+    GravadorParticao,
+    caminho_particao,
+    compactar_registros,
+    contar_registros_por_data,
+    converter_data,
+    descartar_hash_origem,
+    formatar_chaves,
+    formatar_data,
+    gravar_resumo_diario,
+    hash_origem,
+    migrar_historico,
+    reconstruir_resumo_diario,
+    registrar_no_manifesto,
+    resumo_diario_atualizado,
+)
+from src.etapas_pipeline import (
+    ARQUIVO_RESULTADO_ABC,
+    GravadorEtapa,
+    caminho_excel,
+    metadados_etapa,
+)
+from src.exportacao_excel import PlanilhaExcel
+
+# Versão das regras de tratamento; mudar invalida o hash das importações já feitas
+VERSAO_TRATAMENTO = 1
+
+# Linhas do CSV processadas por vez (a memória usada é a de um lote)
+LINHAS_POR_LOTE = 100_000
+
+# Encodings candidatos do CSV, do mais restritivo ao mais permissivo
+# (latin-1 decodifica qualquer byte, então fica por último)
+ENCODINGS_CSV = ['utf-8', 'cp1252', 'latin-1']
+
+# Bytes lidos de cada trecho do arquivo (início, meio e fim) para detectar o encoding
+BYTES_AMOSTRA_ENCODING = 256 * 1024
+
+# Encoding detectado por sistema de origem (reaproveitado quando a amostra só tem ASCII)
+ARQUIVO_CACHE_ENCODING = 'data/encodings_csv.json'
+
+# Datas aceitas no nome das exportações (--diretorio): (regex, formato strptime)
+PADROES_DATA_ARQUIVO = [
+    (r'(?<!\d)(\d{4})[-_.]?(\d{2})[-_.]?(\d{2})(?!\d)', '%Y-%m-%d'),
+    (r'(?<!\d)(\d{2})[-_.](\d{2})[-_.](\d{4})(?!\d)', '%d-%m-%Y'),
+    (r'(?<!\d)(\d{2})[-_.](\d{2})[-_.](\d{2})(?!\d)', '%d-%m-%y'),
+]
+
+# Colunas no formato numérico brasileiro (1.234,56)
+COLUNAS_NUMERICAS = [
+    'valor_venda', 'quantidade_vendida', 'ponto_pedido',
+    'estoque_ideal', 'embalagem', 'capacidade', 'estoque', 'estoque_cd'
+]
+
+# Número já sem separador de milhares e com ponto decimal ("1234.56")
+REGEX_NUMERO = r'^[+-]?(\d+\.?\d*|\.\d+)$'
+
+# Colunas do relatório ABC que não vão para o resultado
+COLUNAS_REMOVER = [
+    'percentual_venda',
+    'posicao_venda',
+    'percentual_acumulado',
+    'valor_margem',
+    'percentual_margem',
+    'participacao',  # Sem acento
+    'posicao_margem',
+    'acumulo_margem',
+    'ranking_margem',
+    'cmv_bruto',
+    'cmv_liquido',
+    'fornecedor_principal',
+    'tributacao',  # CORRIGIDO: Sem cedilha (como está no colunas.txt)
+    'usuario',
+    'departamento',
+    'grupo',
+    'subgrupo',
+    'tipo_comercial',
+    'rankin_venda'
+]
+
+# Seções mantidas (prefixo de 2 dígitos da coluna secao)
+SECOES_VALIDAS = ['10', '13', '14', '16', '17', '23']
 
 
 def ler_nomes_colunas(arquivo_colunas='colunas.txt'):
@@ -70,61 +169,54 @@ def validar_data(data_str):
         return None
 
 
-def salvar_no_banco_parquet(df_novo, arquivo_parquet, data_venda):
+def salvar_no_banco_parquet(df_compactado, arquivo_parquet, data_venda, registros, verboso=True,
+                            assinatura=None):
     """
-    Salva dados no banco Parquet de forma incremental
-    Se já existir dados para a mesma data, substitui
-    Caso contrário, adiciona novos registros
+    Atualiza resumo diário, dimensão de produtos e manifesto após a
+    gravação da partição do dia
+
+    A partição bruta já foi gravada lote a lote durante a leitura do CSV;
+    aqui entram apenas os registros compactados (produto x loja), que
+    ocupam uma fração da memória do arquivo original.
     
     Args:
-        df_novo: DataFrame com novos dados
-        arquivo_parquet: Caminho do arquivo Parquet
+        df_compactado: Lotes do dia reduzidos por compactar_registros
+        arquivo_parquet: Caminho do dataset Parquet
         data_venda: Data dos dados sendo inseridos
-    """
-    print(f"\n[INFO] Salvando no banco de dados Parquet...")
+        registros: Quantidade de registros brutos gravados na partição
+        verboso: Se True, mostra os registros por data do banco
+        assinatura: Hash da importação (assinatura_importacao) registrado no manifesto
     
+    Returns:
+        True se resumo, dimensão e manifesto foram atualizados
+    """
     try:
-        # Verifica se arquivo já existe
-        if os.path.exists(arquivo_parquet):
-            print(f"   [INFO] Banco existente encontrado, carregando...")
-            df_existente = pd.read_parquet(arquivo_parquet)
-            print(f"   [INFO] Registros existentes: {len(df_existente)}")
-            
-            # Verificar se já existe dados para esta data
-            if 'data_venda' in df_existente.columns:
-                registros_mesma_data = len(df_existente[df_existente['data_venda'] == data_venda])
-                
-                if registros_mesma_data > 0:
-                    print(f"   [AVISO] Encontrados {registros_mesma_data} registros para {data_venda}")
-                    print(f"   [INFO] Removendo registros antigos dessa data...")
-                    # Remove registros da mesma data
-                    df_existente = df_existente[df_existente['data_venda'] != data_venda]
-                    print(f"   [OK] Registros removidos. Restam {len(df_existente)} registros")
-            
-            # Combinar dados existentes com novos
-            df_final = pd.concat([df_existente, df_novo], ignore_index=True)
-            print(f"   [INFO] Adicionando {len(df_novo)} novos registros")
-            
-        else:
-            print(f"   [INFO] Criando novo banco de dados...")
-            df_final = df_novo
-        
-        # Salvar no formato Parquet
-        df_final.to_parquet(arquivo_parquet, index=False, engine='pyarrow', compression='snappy')
+        # Resumo diário (produto x loja x dia) usado pelas análises
+        particao_resumo = gravar_resumo_diario(df_compactado, data_venda, arquivo_parquet)
+        print(f"   [INFO] Resumo diário atualizado em {particao_resumo}")
         
+        # Manifesto: avisa os leitores (agente/interface) que esta data mudou
+        versao = registrar_no_manifesto(
+            [data_venda], arquivo_parquet, {data_venda: registros},
+            origens={data_venda: assinatura} if assinatura else None
+        )
+        print(f"   [INFO] Manifesto do banco na versão {versao}")
         print(f"   [OK] Banco atualizado com sucesso!")
-        print(f"   [INFO] Total de registros no banco: {len(df_final)}")
+        if not verboso:
+            return True
         
-        # Mostrar estatísticas por data
-        if 'data_venda' in df_final.columns:
-            print(f"\n   [INFO] Registros por data:")
-            contagem_datas = df_final['data_venda'].value_counts().sort_index()
-            for data, count in contagem_datas.items():
-                print(f"      {data}: {count} registros")
+        # Mostrar estatísticas por data (lidas dos metadados, sem carregar dados)
+        contagem_datas = contar_registros_por_data(arquivo_parquet)
+        print(f"   [INFO] Total de registros no banco: {sum(contagem_datas.values())}")
+        print(f"\n   [INFO] Registros por data:")
+        for data, count in contagem_datas.items():
+            print(f"      {formatar_data(data)}: {count} registros")
+        return True
         
     except Exception as e:
-        print(f"   [ERRO] Erro ao salvar no banco Parquet: {e}")
-        print(f"   [AVISO] O arquivo Excel foi salvo, mas o banco não foi atualizado")
+        print(f"   [ERRO] Erro ao atualizar resumo diário/manifesto: {e}")
+        print(f"   [AVISO] A partição do dia foi gravada; rode scripts/migrar_historico.py para reconstruir o resumo")
+        return False
 
 
 def solicitar_data_venda():
@@ -160,18 +252,444 @@ def solicitar_data_venda():
             print("[ERRO] Data inválida! Use o formato dd/mm/yy (exemplo: 30/11/25)")
 
 
+def assinatura_importacao(arquivo_csv, nomes_colunas):
+    """
+    Hash do que determina o resultado de uma importação
+
+    Combina o conteúdo do CSV com o mapeamento de colunas (colunas.txt) e as
+    regras de tratamento: o mesmo arquivo com outro colunas.txt, ou após
+    mudar as seções válidas, é outra importação.
+    
+    Args:
+        arquivo_csv: Arquivo CSV de entrada
+        nomes_colunas: Nomes das colunas (ler_nomes_colunas)
+        
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    hash_importacao = hashlib.sha256()
+    with open(arquivo_csv, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            hash_importacao.update(bloco)
+    
+    regras = {
+        'colunas': nomes_colunas,
+        'remover': COLUNAS_REMOVER,
+        'secoes': SECOES_VALIDAS,
+        'versao': VERSAO_TRATAMENTO,
+    }
+    hash_importacao.update(json.dumps(regras, sort_keys=True).encode('utf-8'))
+    return hash_importacao.hexdigest()
+
+
+def assinatura_excel(arquivo_excel):
+    """
+    Hash da importação que gerou um Excel (propriedade 'identifier' do arquivo)
+
+    Lê só as propriedades dentro do .xlsx, sem abrir a planilha.
+    
+    Returns:
+        Hash gravado por _importar_lotes ou None se não houver
+    """
+    try:
+        with zipfile.ZipFile(arquivo_excel) as arquivo:
+            propriedades = arquivo.read('docProps/core.xml').decode('utf-8')
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+    encontrado = re.search(r'<dc:identifier>([0-9a-f]+)</dc:identifier>', propriedades)
+    return encontrado.group(1) if encontrado else None
+
+
+def importacao_atual(assinatura, data_venda, arquivo_parquet=ARQUIVO_HISTORICO, arquivo_saida=None,
+                     arquivo_excel=None):
+    """
+    Indica se a importação já está no banco (e nas saídas pedidas) com o mesmo hash
+
+    Args:
+        assinatura: Hash da importação (assinatura_importacao)
+        data_venda: Data de venda
+        arquivo_parquet: Caminho do dataset Parquet
+        arquivo_saida: Arquivo da etapa que também precisa estar atualizado
+        arquivo_excel: Excel que também precisa estar atualizado
+    """
+    if hash_origem(data_venda, arquivo_parquet) != assinatura:
+        return False
+    if arquivo_saida and metadados_etapa(arquivo_saida).get('hash_origem') != assinatura:
+        return False
+    return not arquivo_excel or assinatura_excel(arquivo_excel) == assinatura
+
+
+def _amostras_arquivo(arquivo, tamanho=BYTES_AMOSTRA_ENCODING):
+    """Lê trechos do início, do meio e do fim do arquivo (o arquivo inteiro se for pequeno)"""
+    tamanho_arquivo = os.path.getsize(arquivo)
+    with open(arquivo, 'rb') as f:
+        if tamanho_arquivo <= 3 * tamanho:
+            return [f.read()]
+        amostras = []
+        for inicio in (0, (tamanho_arquivo - tamanho) // 2, tamanho_arquivo - tamanho):
+            f.seek(inicio)
+            amostras.append(f.read(tamanho))
+        return amostras
+
+
+def _decodifica(amostras, encoding):
+    """Indica se todas as amostras são válidas no encoding"""
+    for indice, amostra in enumerate(amostras):
+        # Trechos do meio e do fim podem começar no meio de um caractere multibyte
+        if indice > 0 and encoding == 'utf-8':
+            inicio = 0
+            while inicio < min(3, len(amostra)) and 0x80 <= amostra[inicio] < 0xC0:
+                inicio += 1
+            amostra = amostra[inicio:]
+        decodificador = codecs.getincrementaldecoder(encoding)()
+        try:
+            decodificador.decode(amostra, final=False)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def ler_cache_encoding(arquivo_cache=ARQUIVO_CACHE_ENCODING):
+    """Lê o cache {origem: encoding} (vazio se não existir ou estiver corrompido)"""
+    try:
+        with open(arquivo_cache, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def registrar_encoding(origem, encoding, arquivo_cache=ARQUIVO_CACHE_ENCODING):
+    """Guarda o encoding usado por um sistema de origem (gravação atômica)"""
+    cache = ler_cache_encoding(arquivo_cache)
+    if cache.get(origem) == encoding:
+        return
+    cache[origem] = encoding
+    temporario = f"{arquivo_cache}.{uuid.uuid4().hex}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temporario, arquivo_cache)
+
+
+def detectar_encoding(arquivo_csv, origem=None, arquivo_cache=ARQUIVO_CACHE_ENCODING):
+    """
+    Detecta o encoding do CSV a partir de amostras limitadas do arquivo
+    
+    Testa ENCODINGS_CSV em ordem sobre trechos do início, meio e fim do
+    arquivo, sem fazer o parse. Se as amostras só tiverem ASCII (qualquer
+    encoding serve para elas), usa o encoding já conhecido da origem.
+    
+    Args:
+        arquivo_csv: Arquivo CSV de entrada
+        origem: Sistema de origem da exportação (padrão: nome do arquivo)
+        arquivo_cache: Cache de encodings por origem
+        
+    Returns:
+        Tupla (encoding, conclusivo); conclusivo é False quando a amostra
+        só tinha ASCII e o encoding veio do cache ou do padrão
+    """
+    origem = origem or os.path.basename(arquivo_csv)
+    amostras = _amostras_arquivo(arquivo_csv)
+    
+    if all(amostra.isascii() for amostra in amostras):
+        return ler_cache_encoding(arquivo_cache).get(origem, ENCODINGS_CSV[0]), False
+    
+    for encoding in ENCODINGS_CSV:
+        if _decodifica(amostras, encoding):
+            return encoding, True
+    return ENCODINGS_CSV[-1], True
+
+
+def converter_coluna_brasileira(serie):
+    """
+    Converte uma coluna de texto no formato brasileiro (1.234,56) para float64
+    
+    A coluna inteira é convertida de uma vez com kernels de texto do Arrow:
+    remove os pontos (milhares), troca a vírgula decimal por ponto e faz o
+    cast. Células vazias viram 0.0; valores malformados viram NaN e são
+    contados.
+    
+    Args:
+        serie: Coluna lida do CSV (texto)
+        
+    Returns:
+        Tupla (Series float64, quantidade de valores malformados)
+    """
+    texto = pc.utf8_trim_whitespace(pa.array(serie, type=pa.large_string(), from_pandas=True))
+    vazios = pc.fill_null(pc.equal(texto, ''), True)
+    
+    # Exemplo: "1.234,56" -> "1234.56"
+    texto = pc.replace_substring(pc.replace_substring(texto, '.', ''), ',', '.')
+    validos = pc.fill_null(pc.match_substring_regex(texto, REGEX_NUMERO), False)
+    numeros = pc.cast(pc.if_else(validos, texto, None), pa.float64())
+    
+    malformados = pc.sum(pc.and_(pc.invert(validos), pc.invert(vazios))).as_py() or 0
+    numeros = pc.if_else(vazios, 0.0, numeros)
+    return pd.Series(numeros.to_numpy(zero_copy_only=False), index=serie.index, name=serie.name), malformados
+
+
+def tratar_lote(df, nomes_colunas, data_venda, verboso=False):
+    """
+    Aplica a um lote do CSV todo o tratamento linha a linha: nomes de
+    colunas, conversão numérica, padding de códigos, remoção de colunas,
+    filtros de seção e de ponto_pedido/embalagem zerados e data_venda
+    
+    Args:
+        df: Lote lido do CSV (colunas posicionais, tudo texto)
+        nomes_colunas: Nomes de colunas.txt
+        data_venda: Data de venda (dd/mm/yy)
+        verboso: Se True, descreve cada etapa (usado no primeiro lote)
+        
+    Returns:
+        Tupla (DataFrame tratado, linhas removidas pelo filtro de seção,
+        linhas removidas pelo filtro de ponto_pedido/embalagem,
+        {coluna: valores numéricos malformados no lote})
+    """
+    # Verificar se número de colunas bate
+    if len(df.columns) != len(nomes_colunas):
+        if verboso:
+            print(f"[AVISO] CSV tem {len(df.columns)} colunas, mas colunas.txt tem {len(nomes_colunas)} nomes")
+            print(f"   Usando {min(len(df.columns), len(nomes_colunas))} colunas")
+        df = df.iloc[:, :len(nomes_colunas)]
+    df.columns = nomes_colunas[:len(df.columns)]
+    if verboso:
+        print(f"\n[OK] Colunas nomeadas: {list(df.columns)}")
+    
+    # Converter colunas numéricas do formato brasileiro
+    erros_numericos = {}
+    for col in COLUNAS_NUMERICAS:
+        if col in df.columns:
+            if verboso:
+                print(f"  Convertendo coluna: {col}")
+            df[col], erros_numericos[col] = converter_coluna_brasileira(df[col])
+    
+    # Loja e codigo_interno como inteiros (int16/int32); os zeros à esquerda
+    # (004, 0021771) são aplicados só no Excel. Linhas sem chave numérica
+    # são descartadas e contadas como malformadas
+    chaves = [col for col in TIPOS_CHAVES if col in df.columns]
+    if chaves:
+        numeros = df[chaves].apply(lambda coluna: pd.to_numeric(coluna.str.strip(), errors='coerce'))
+        for col in chaves:
+            erros_numericos[col] = int(numeros[col].isna().sum())
+        validas = numeros.notna().all(axis=1)
+        df = df[validas].assign(**{
+            col: numeros.loc[validas, col].astype(TIPOS_CHAVES[col].to_pandas_dtype()) for col in chaves
+        })
+    
+    # Remover apenas colunas que existem no DataFrame
+    colunas_existentes_para_remover = [col for col in COLUNAS_REMOVER if col in df.columns]
+    if colunas_existentes_para_remover:
+        if verboso:
+            print(f"\n[INFO] Removendo {len(colunas_existentes_para_remover)} colunas:")
+            for col in colunas_existentes_para_remover:
+                print(f"   - {col}")
+        df = df.drop(columns=colunas_existentes_para_remover)
+    elif verboso:
+        print("\n[AVISO] Nenhuma das colunas para remover foi encontrada no DataFrame")
+    
+    # Filtro 1: Manter apenas seções específicas (prefixo da seção)
+    linhas_removidas_secao = 0
+    if 'secao' in df.columns:
+        linhas_antes = len(df)
+        df = df[df['secao'].astype(str).str[:2].isin(SECOES_VALIDAS)]
+        linhas_removidas_secao = linhas_antes - len(df)
+    elif verboso:
+        print(f"   [AVISO] Coluna 'secao' não encontrada, pulando filtro de seção")
+    
+    # Filtro 2: Remove linhas onde ponto_pedido OU embalagem são zero
+    # (malformados, já contados em erros_numericos, contam como zero)
+    linhas_removidas_zeros = 0
+    if 'ponto_pedido' in df.columns and 'embalagem' in df.columns:
+        linhas_antes = len(df)
+        df = df[(df['ponto_pedido'].fillna(0) != 0) & (df['embalagem'].fillna(0) != 0)]
+        linhas_removidas_zeros = linhas_antes - len(df)
+    elif verboso:
+        print(f"   [AVISO] Colunas ponto_pedido ou embalagem não encontradas, pulando filtro")
+    
+    # Coluna data_venda (tipo data, gravada como date32 no Parquet)
+    df = df.assign(data_venda=converter_data(data_venda))
+    
+    # Códigos, lojas, descrições e seções como category (cada texto guardado uma vez)
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    return df, linhas_removidas_secao, linhas_removidas_zeros, erros_numericos
+
+
+def _importar_lotes(arquivo_csv, encoding, nomes_colunas, data_venda, arquivo_saida,
+                    arquivo_parquet, linhas_por_lote, migrar=True, verboso=True,
+                    assinatura=None, arquivo_excel=None):
+    """
+    Lê o CSV em lotes e grava cada lote tratado na partição do dia, no
+    arquivo da etapa (Parquet) e, se pedido, no Excel
+
+    A partição e as saídas só substituem as anteriores se o arquivo inteiro
+    for processado; qualquer erro (inclusive de encoding no meio do
+    arquivo) descarta o que foi gravado.
+    
+    Returns:
+        Dicionário com contagens, primeiro lote (preview), colunas finais e
+        registros compactados por produto x loja
+    """
+    resultado = {
+        'linhas_originais': 0, 'removidas_secao': 0, 'removidas_zeros': 0,
+        'linhas_finais': 0, 'lotes': 0, 'preview': None, 'colunas': [],
+        'erros_numericos': {}
+    }
+    compactados = []
+    
+    with ExitStack() as saidas:
+        gravador = saidas.enter_context(GravadorParticao(data_venda, arquivo_parquet, migrar=migrar))
+        etapa = None
+        if arquivo_saida:
+            etapa = saidas.enter_context(GravadorEtapa(arquivo_saida, {'hash_origem': assinatura}))
+        planilha = None
+        if arquivo_excel:
+            planilha = saidas.enter_context(PlanilhaExcel(arquivo_excel, identificador=assinatura))
+        leitor = saidas.enter_context(pd.read_csv(
+            arquivo_csv,
+            header=None,
+            encoding=encoding,
+            sep=';',
+            dtype=str,  # Ler tudo como string primeiro para converter depois
+            chunksize=linhas_por_lote
+        ))
+        
+        for df in leitor:
+            primeiro = resultado['lotes'] == 0
+            resultado['lotes'] += 1
+            resultado['linhas_originais'] += len(df)
+            
+            df, removidas_secao, removidas_zeros, erros_numericos = tratar_lote(
+                df, nomes_colunas, data_venda, verboso=verboso and primeiro
+            )
+            resultado['removidas_secao'] += removidas_secao
+            resultado['removidas_zeros'] += removidas_zeros
+            for col, erros in erros_numericos.items():
+                resultado['erros_numericos'][col] = resultado['erros_numericos'].get(col, 0) + erros
+            resultado['linhas_finais'] += len(df)
+            
+            if primeiro:
+                resultado['colunas'] = list(df.columns)
+            if resultado['preview'] is None and not df.empty:
+                resultado['preview'] = formatar_chaves(df.head())
+            
+            gravador.escrever(df)
+            if etapa is not None:
+                etapa.escrever(df)
+            if planilha is not None:
+                planilha.escrever(df)
+            compactados.append(compactar_registros(df))
+    
+    resultado['registros'] = gravador.registros
+    resultado['particao'] = gravador.destino
+    resultado['compactado'] = pd.concat(compactados, ignore_index=True) if compactados else None
+    return resultado
+
+
+def importar_dia(
+    arquivo_csv,
+    nomes_colunas,
+    data_venda,
+    arquivo_saida=None,
+    arquivo_parquet=ARQUIVO_HISTORICO,
+    linhas_por_lote=LINHAS_POR_LOTE,
+    origem=None,
+    migrar=True,
+    verboso=True,
+    assinatura=None,
+    arquivo_excel=None
+):
+    """
+    Importa a exportação de um dia: grava a partição bruta e as saídas pedidas
+
+    Não mexe no resumo diário, na dimensão de produtos, no manifesto nem no
+    cache de encodings; esses arquivos são compartilhados entre as datas e
+    ficam a cargo de quem chama (ver salvar_no_banco_parquet e
+    registrar_encoding). Assim várias datas podem ser importadas em
+    paralelo, cada uma substituindo atomicamente só a própria partição.
+    
+    Args:
+        arquivo_csv: Arquivo CSV de entrada
+        nomes_colunas: Nomes das colunas (ler_nomes_colunas)
+        data_venda: Data de venda (dd/mm/yy)
+        arquivo_saida: Arquivo Parquet da etapa, lido por atualizar_simples.py
+            (None = não gera)
+        arquivo_parquet: Caminho do dataset Parquet
+        linhas_por_lote: Linhas do CSV processadas por vez
+        origem: Sistema de origem da exportação, chave do cache de
+            encodings (padrão: nome do arquivo CSV)
+        migrar: Se True, migra o histórico para o formato atual antes de gravar
+        verboso: Se True, mostra as etapas do tratamento
+        assinatura: Hash da importação, gravado no arquivo da etapa e no Excel
+        arquivo_excel: Arquivo Excel de saída (None = não gera Excel)
+    
+    Returns:
+        Dicionário de _importar_lotes mais 'encoding' (usado na leitura) e
+        'registrar_encoding' (se o encoding deve ir para o cache)
+    
+    Raises:
+        UnicodeDecodeError: Se nenhum encoding candidato ler o arquivo
+    """
+    # Encoding detectado por amostra: o arquivo é lido uma única vez
+    encoding, conclusivo = detectar_encoding(arquivo_csv, origem)
+    if verboso:
+        print(f"[INFO] Encoding detectado: '{encoding}'" + ("" if conclusivo else " (amostra só com ASCII, usando o da origem)"))
+    
+    # Os demais candidatos só entram se a amostra não representou o arquivo
+    posicao = ENCODINGS_CSV.index(encoding) + 1 if encoding in ENCODINGS_CSV else 0
+    candidatos = [encoding] + [e for e in ENCODINGS_CSV[posicao:] if e != encoding]
+    for tentativa, encoding in enumerate(candidatos):
+        try:
+            resultado = _importar_lotes(
+                arquivo_csv, encoding, nomes_colunas, data_venda,
+                arquivo_saida, arquivo_parquet, linhas_por_lote,
+                migrar=migrar, verboso=verboso, assinatura=assinatura,
+                arquivo_excel=arquivo_excel
+            )
+        except UnicodeDecodeError:
+            if tentativa == len(candidatos) - 1:
+                raise
+            if verboso:
+                print(f"[AVISO] Encoding '{encoding}' falhou fora da amostra, tentando o próximo")
+            continue
+        
+        resultado['encoding'] = encoding
+        resultado['registrar_encoding'] = conclusivo or tentativa > 0
+        return resultado
+
+
 def processar_arquivo_abc(
     arquivo_csv='grid_tmp_abcmerc.csv',
     arquivo_colunas='colunas.txt',
-    arquivo_saida='resultado_abc.xlsx'
+    arquivo_saida=ARQUIVO_RESULTADO_ABC,
+    linhas_por_lote=LINHAS_POR_LOTE,
+    origem=None,
+    data_venda=None,
+    forcar=False,
+    arquivo_excel=None
 ):
     """
     Processa o arquivo CSV com dados ABC
     
+    O CSV é lido em lotes de linhas_por_lote linhas; cada lote é tratado,
+    filtrado e gravado direto na partição do histórico e no arquivo da
+    etapa (e no Excel, se pedido), então a memória usada não depende do
+    tamanho da exportação.
+    
     Args:
         arquivo_csv: Arquivo CSV de entrada
         arquivo_colunas: Arquivo com nomes das colunas
-        arquivo_saida: Arquivo Excel de saída
+        arquivo_saida: Arquivo Parquet da etapa, lido por atualizar_simples.py
+        linhas_por_lote: Linhas do CSV processadas por vez
+        origem: Sistema de origem da exportação, chave do cache de
+            encodings (padrão: nome do arquivo CSV)
+        data_venda: Data de venda dd/mm/yy (None = pergunta ao usuário)
+        forcar: Se True, reimporta mesmo que o arquivo já tenha sido importado
+        arquivo_excel: Arquivo Excel de saída (None = não gera Excel)
+    
+    Returns:
+        True se o arquivo foi importado (ou já estava)
     """
     
     print("="*60)
@@ -182,227 +700,366 @@ def processar_arquivo_abc(
     # 1. Ler nomes das colunas
     nomes_colunas = ler_nomes_colunas(arquivo_colunas)
     if not nomes_colunas:
-        return
-    
-    # 2. Ler arquivo CSV
-    print(f"\n[INFO] Lendo arquivo CSV: {arquivo_csv}")
+        return False
     
     if not os.path.exists(arquivo_csv):
         print(f"[ERRO] Arquivo {arquivo_csv} não encontrado!")
-        return
-    
-    try:
-        # Tenta ler com diferentes encodings
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'windows-1252']
-        df = None
-        
-        for encoding in encodings:
-            try:
-                # Ler CSV sem especificar decimal/thousands primeiro
-                # O pandas vai detectar automaticamente o formato
-                df = pd.read_csv(
-                    arquivo_csv, 
-                    header=None, 
-                    encoding=encoding, 
-                    sep=';',
-                    dtype=str  # Ler tudo como string primeiro para converter depois
-                )
-                print(f"[OK] Arquivo lido com encoding '{encoding}': {len(df)} linhas, {len(df.columns)} colunas")
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if df is None:
-            print(f"[ERRO] Não foi possível ler o arquivo com nenhum encoding testado")
-            return
-            
-    except Exception as e:
-        print(f"[ERRO] Erro ao ler CSV: {e}")
-        return
-    
-    # 3. Verificar se número de colunas bate
-    if len(df.columns) != len(nomes_colunas):
-        print(f"[AVISO] CSV tem {len(df.columns)} colunas, mas colunas.txt tem {len(nomes_colunas)} nomes")
-        print(f"   Usando {min(len(df.columns), len(nomes_colunas))} colunas")
-        nomes_colunas = nomes_colunas[:len(df.columns)]
-    
-    # Atribuir nomes às colunas
-    df.columns = nomes_colunas
-    print(f"\n[OK] Colunas nomeadas: {list(df.columns)}")
-    
-    # 3.5. Converter colunas numéricas do formato brasileiro
-    print("\n[INFO] Convertendo números do formato brasileiro...")
-    colunas_numericas = [
-        'valor_venda', 'quantidade_vendida', 'ponto_pedido', 
-        'estoque_ideal', 'embalagem', 'capacidade', 'estoque', 'estoque_cd'
-    ]
-    
-    def converter_numero_brasileiro(valor):
-        """Converte número no formato brasileiro (1.234,56) para float"""
-        if pd.isna(valor) or valor == '':
-            return 0.0
-        
-        # Se já for número, retorna
-        if isinstance(valor, (int, float)):
-            return float(valor)
-        
-        # Converter string
-        valor_str = str(valor).strip()
-        
-        # Remover pontos (separador de milhares) e substituir vírgula por ponto (decimal)
-        # Exemplo: "1.234,56" -> "1234.56"
-        valor_str = valor_str.replace('.', '')  # Remove pontos (milhares)
-        valor_str = valor_str.replace(',', '.')  # Vírgula vira ponto (decimal)
-        
-        try:
-            return float(valor_str)
-        except ValueError:
-            return 0.0
-    
-    for col in colunas_numericas:
-        if col in df.columns:
-            print(f"  Convertendo coluna: {col}")
-            df[col] = df[col].apply(converter_numero_brasileiro)
-    
-    print("[OK] Conversão de números concluída!")
-    
-    # 3.6. Normalizar códigos com padding de zeros
-    print("\n[INFO] Normalizando códigos e lojas com zeros à esquerda...")
-    
-    # Padronizar loja com 3 dígitos (001, 002, etc)
-    if 'loja' in df.columns:
-        df['loja'] = df['loja'].astype(str).str.zfill(3)
-        print("  [OK] Coluna 'loja' padronizada com 3 dígitos")
-    
-    # Padronizar codigo_interno com 7 dígitos (0021771, etc)
-    if 'codigo_interno' in df.columns:
-        df['codigo_interno'] = df['codigo_interno'].astype(str).str.zfill(7)
-        print("  [OK] Coluna 'codigo_interno' padronizada com 7 dígitos")
-    
-    # 4. Definir colunas a remover
-    colunas_remover = [
-        'percentual_venda',
-        'posicao_venda',
-        'percentual_acumulado',
-        'valor_margem',
-        'percentual_margem',
-        'participacao',  # Sem acento
-        'posicao_margem',
-        'acumulo_margem',
-        'ranking_margem',
-        'cmv_bruto',
-        'cmv_liquido',
-        'fornecedor_principal',
-        'tributacao',  # CORRIGIDO: Sem cedilha (como está no colunas.txt)
-        'usuario',
-        'departamento',
-        'grupo',
-        'subgrupo',
-        'tipo_comercial',
-        'rankin_venda'
-    ]
-    
-    # Remover apenas colunas que existem no DataFrame
-    colunas_existentes_para_remover = [col for col in colunas_remover if col in df.columns]
+        return False
     
-    if colunas_existentes_para_remover:
-        print(f"\n[INFO] Removendo {len(colunas_existentes_para_remover)} colunas:")
-        for col in colunas_existentes_para_remover:
-            print(f"   - {col}")
-        
-        df = df.drop(columns=colunas_existentes_para_remover)
-        print(f"[OK] Colunas removidas. Restaram {len(df.columns)} colunas")
+    # 2. Data de venda (antes da leitura: os lotes já saem com a data)
+    if data_venda is None:
+        data_venda = solicitar_data_venda()
     else:
-        print("\n[AVISO] Nenhuma das colunas para remover foi encontrada no DataFrame")
+        print(f"[INFO] Data de venda: {data_venda}")
+    arquivo_parquet = ARQUIVO_HISTORICO
     
-    print(f"\n[INFO] Colunas finais: {list(df.columns)}")
+    # Mesmo arquivo, mesmas colunas e mesmas regras: nada a refazer
+    assinatura = assinatura_importacao(arquivo_csv, nomes_colunas)
+    if not forcar and importacao_atual(assinatura, data_venda, arquivo_parquet, arquivo_saida, arquivo_excel):
+        print(f"\n[OK] {arquivo_csv} já importado para {data_venda} com as mesmas colunas, nada a fazer")
+        return True
     
-    # 5. Solicitar data de venda
-    data_venda = solicitar_data_venda()
+    if os.path.exists(caminho_particao(data_venda, arquivo_parquet)):
+        print(f"\n[AVISO] Já existem registros para {data_venda}, a partição será substituída")
+        descartar_hash_origem([data_venda], arquivo_parquet)
     
-    # 6. Filtrar linhas
-    print(f"\n[INFO] Filtrando linhas...")
-    linhas_originais = len(df)
-    print(f"   Total de linhas antes dos filtros: {linhas_originais}")
+    # 3. Ler, tratar e gravar o CSV em lotes
+    print(f"\n[INFO] Lendo arquivo CSV em lotes de {linhas_por_lote:,} linhas: {arquivo_csv}")
+    print(f"[INFO] Convertendo números do formato brasileiro, padronizando códigos e filtrando seções {SECOES_VALIDAS}")
     
-    # Filtro 1: Manter apenas seções específicas (10, 13, 14, 16, 17, 23)
-    secoes_validas = ['10', '13', '14', '16', '17', '23']
-    if 'secao' in df.columns:
-        # Filtra seções que começam com os números especificados
-        df = df[df['secao'].astype(str).str[:2].isin(secoes_validas)]
-        linhas_removidas_secao = linhas_originais - len(df)
-        print(f"   [OK] Removidas {linhas_removidas_secao} linhas (seções diferentes de {secoes_validas})")
-    else:
-        print(f"   [AVISO] Coluna 'secao' não encontrada, pulando filtro de seção")
-        linhas_removidas_secao = 0
+    try:
+        resultado = importar_dia(
+            arquivo_csv, nomes_colunas, data_venda, arquivo_saida,
+            arquivo_parquet, linhas_por_lote, origem, assinatura=assinatura,
+            arquivo_excel=arquivo_excel
+        )
+        print(f"\n[OK] Arquivo lido com encoding '{resultado['encoding']}': {resultado['linhas_originais']} linhas em {resultado['lotes']} lote(s)")
+        if resultado['registrar_encoding']:
+            registrar_encoding(origem or os.path.basename(arquivo_csv), resultado['encoding'])
+    except UnicodeDecodeError:
+        print(f"[ERRO] Não foi possível ler o arquivo com nenhum encoding testado")
+        return False
+    except Exception as e:
+        print(f"[ERRO] Erro ao processar CSV: {e}")
+        print(f"   [AVISO] Nem os arquivos de saída nem o banco foram alterados")
+        return False
     
-    linhas_antes = len(df)
+    linhas_originais = resultado['linhas_originais']
+    linhas_removidas_secao = resultado['removidas_secao']
+    linhas_removidas_zeros = resultado['removidas_zeros']
+    colunas_finais = resultado['colunas']
+    print(f"   [OK] Removidas {linhas_removidas_secao} linhas (seções diferentes de {SECOES_VALIDAS})")
+    print(f"   [OK] Removidas {linhas_removidas_zeros} linhas com ponto_pedido=0 ou embalagem=0")
+    print(f"   [OK] Linhas restantes: {resultado['linhas_finais']}")
     
-    # Filtro 2: Remove linhas onde ponto_pedido OU embalagem são zero
-    if 'ponto_pedido' in df.columns and 'embalagem' in df.columns:
-        df = df[(df['ponto_pedido'] != 0) & (df['embalagem'] != 0)]
-        linhas_removidas_zeros = linhas_antes - len(df)
-        print(f"   [OK] Removidas {linhas_removidas_zeros} linhas com ponto_pedido=0 ou embalagem=0")
-        print(f"   [OK] Linhas restantes: {len(df)}")
+    erros_numericos = {col: n for col, n in resultado['erros_numericos'].items() if n}
+    if erros_numericos:
+        print(f"\n[AVISO] Valores numéricos malformados (gravados como vazio; sem loja/código válido a linha é descartada):")
+        for col, n in erros_numericos.items():
+            print(f"   - {col}: {n}")
     else:
-        print(f"   [AVISO] Colunas ponto_pedido ou embalagem não encontradas, pulando filtro")
-        linhas_removidas_zeros = 0
-    
-    # 7. Adicionar coluna data_venda
-    df['data_venda'] = data_venda
-    print(f"\n[OK] Coluna 'data_venda' adicionada com valor: {data_venda}")
+        print(f"   [OK] Nenhum valor numérico malformado")
     
-    # 8. Mostrar preview dos dados
+    # 4. Mostrar preview dos dados
     print("\n" + "="*60)
     print("PREVIEW DOS DADOS (primeiras 5 linhas)")
     print("="*60)
-    print(df.head())
+    print(resultado['preview'])
     
-    # 9. Salvar em Excel
-    print(f"\n[INFO] Salvando arquivo Excel: {arquivo_saida}")
-    try:
-        df.to_excel(arquivo_saida, index=False)
-        print(f"[OK] Arquivo salvo com sucesso!")
-        print(f"   Total de linhas: {len(df)}")
-        print(f"   Total de colunas: {len(df.columns)}")
-    except Exception as e:
-        print(f"[ERRO] Erro ao salvar Excel: {e}")
-        return
+    if arquivo_saida:
+        print(f"\n[OK] Resultado salvo: {arquivo_saida}")
+    if arquivo_excel:
+        print(f"[OK] Arquivo Excel salvo: {arquivo_excel}")
+    print(f"   Total de linhas: {resultado['linhas_finais']}")
+    print(f"   Total de colunas: {len(colunas_finais)}")
     
-    # 10. Salvar no banco de dados Parquet (incremental)
-    arquivo_parquet = 'data/vendas_historico.parquet'
-    salvar_no_banco_parquet(df, arquivo_parquet, data_venda)
+    # 5. Resumo diário, dimensão de produtos e manifesto
+    print(f"\n[INFO] Salvando no banco de dados Parquet...")
+    print(f"   [INFO] Adicionados {resultado['registros']} registros em {resultado['particao']}")
+    if resultado['compactado'] is not None:
+        salvar_no_banco_parquet(
+            resultado['compactado'], arquivo_parquet, data_venda,
+            resultado['registros'], assinatura=assinatura
+        )
     
-    # 11. Estatísticas finais
+    # 6. Estatísticas finais
     print("\n" + "="*60)
     print("ESTATÍSTICAS")
     print("="*60)
     print(f"Linhas originais: {linhas_originais}")
     print(f"Linhas removidas (filtro seção): {linhas_removidas_secao}")
-    print(f"Linhas removidas (ponto_pedido/embalagem): {linhas_removidas_zeros if 'linhas_removidas_zeros' in locals() else 0}")
-    print(f"Total removido: {linhas_removidas_secao + (linhas_removidas_zeros if 'linhas_removidas_zeros' in locals() else 0)}")
-    print(f"Linhas finais: {len(df)}")
-    print(f"Colunas finais: {len(df.columns)}")
+    print(f"Linhas removidas (ponto_pedido/embalagem): {linhas_removidas_zeros}")
+    print(f"Total removido: {linhas_removidas_secao + linhas_removidas_zeros}")
+    print(f"Valores numéricos malformados: {sum(erros_numericos.values())}")
+    print(f"Linhas finais: {resultado['linhas_finais']}")
+    print(f"Colunas finais: {len(colunas_finais)}")
     print(f"Data de venda: {data_venda}")
     print(f"\nColunas mantidas:")
-    for i, col in enumerate(df.columns, 1):
+    for i, col in enumerate(colunas_finais, 1):
         print(f"  {i}. {col}")
     
     print("\n" + "="*60)
     print("PROCESSAMENTO CONCLUÍDO!")
     print("="*60)
+    return True
+
+
+def data_do_nome_arquivo(nome_arquivo):
+    """
+    Extrai a data de venda do nome de uma exportação
+
+    Aceita yyyy-mm-dd, yyyymmdd e dd-mm-yy(yy) (separados por '-', '_' ou '.'),
+    por exemplo grid_tmp_abcmerc_2025-11-30.csv ou abc_30_11_25.csv.
+    
+    Args:
+        nome_arquivo: Nome (ou caminho) do arquivo
+        
+    Returns:
+        Data no formato dd/mm/yy ou None se o nome não tiver data válida
+    """
+    nome = os.path.splitext(os.path.basename(nome_arquivo))[0]
+    for padrao, formato in PADROES_DATA_ARQUIVO:
+        for encontrado in re.finditer(padrao, nome):
+            try:
+                data_obj = datetime.strptime('-'.join(encontrado.groups()), formato)
+            except ValueError:
+                continue
+            return data_obj.strftime('%d/%m/%y')
+    return None
+
+
+def listar_exportacoes(diretorio):
+    """
+    Lista as exportações CSV de um diretório com a data tirada do nome
+
+    Args:
+        diretorio: Diretório com as exportações diárias
+        
+    Returns:
+        Lista de (arquivo_csv, data_venda dd/mm/yy) em ordem cronológica
+    """
+    dias = []
+    for nome in sorted(os.listdir(diretorio)):
+        if not nome.lower().endswith('.csv'):
+            continue
+        data_venda = data_do_nome_arquivo(nome)
+        if data_venda is None:
+            print(f"[AVISO] {nome} ignorado: data não encontrada no nome do arquivo")
+            continue
+        dias.append((os.path.join(diretorio, nome), data_venda))
+    return sorted(dias, key=lambda dia: converter_data(dia[1]))
+
+
+def _importar_dia_em_processo(arquivo_csv, nomes_colunas, data_venda, arquivo_parquet,
+                              linhas_por_lote, origem):
+    """Importa um dia dentro de um processo do pool (só a partição, sem mensagens)"""
+    return importar_dia(
+        arquivo_csv, nomes_colunas, data_venda, None, arquivo_parquet,
+        linhas_por_lote, origem, migrar=False, verboso=False
+    )
+
+
+def _preparar_historico(arquivo_parquet):
+    """
+    Deixa histórico e resumo diário no formato atual antes de importar em paralelo
+
+    Migração e reconstrução do resumo leem todas as partições; feitas aqui,
+    uma vez, não concorrem com os processos gravando as datas novas.
+    """
+    # Arquivo único antigo vira diretório na migração; só depois cria o dataset vazio
+    migrar_historico(arquivo_parquet)
+    if not os.path.exists(arquivo_parquet):
+        os.makedirs(arquivo_parquet)
+    if not resumo_diario_atualizado(arquivo_parquet):
+        reconstruir_resumo_diario(arquivo_parquet)
+
+
+def processar_lote_abc(
+    dias,
+    arquivo_colunas='colunas.txt',
+    arquivo_parquet=ARQUIVO_HISTORICO,
+    processos=None,
+    linhas_por_lote=LINHAS_POR_LOTE,
+    origem=None,
+    forcar=False
+):
+    """
+    Importa várias exportações diárias sem interação (carga/reprocessamento)
+
+    Cada dia é lido e gravado em um processo do pool, substituindo
+    atomicamente só a própria partição. Resumo diário, dimensão de produtos,
+    manifesto e cache de encodings são arquivos compartilhados: são
+    atualizados aqui, no processo principal, um dia por vez, à medida que
+    cada importação termina. Não gera resultado_abc.parquet nem Excel.
+
+    Exportações já importadas com o mesmo conteúdo e colunas (mesmo hash no
+    manifesto) são puladas sem leitura do CSV.
+    
+    Args:
+        dias: Lista de (arquivo_csv, data_venda dd/mm/yy)
+        arquivo_colunas: Arquivo com nomes das colunas
+        arquivo_parquet: Caminho do dataset Parquet
+        processos: Processos em paralelo (None = um por CPU, limitado ao número de dias)
+        linhas_por_lote: Linhas do CSV processadas por vez
+        origem: Sistema de origem das exportações, chave do cache de
+            encodings (padrão: nome de cada arquivo CSV)
+        forcar: Se True, reimporta também as exportações já importadas
+    
+    Returns:
+        Dicionário {(arquivo_csv, data_venda): True/False} indicando se cada
+        exportação foi importada
+    """
+    print("="*60)
+    print("TRATAMENTO DE DADOS ABC - LOTE")
+    print("="*60)
+    print()
+    
+    dias = list(dict.fromkeys(tuple(dia) for dia in dias))
+    status = {}
+    validos = []
+    datas_vistas = {}
+    for arquivo_csv, data_venda in dias:
+        if validar_data(data_venda) is None:
+            print(f"[ERRO] {arquivo_csv}: data inválida '{data_venda}' (use dd/mm/yy)")
+            status[(arquivo_csv, data_venda)] = False
+        elif converter_data(data_venda) in datas_vistas:
+            # Dois arquivos para a mesma partição: o resultado dependeria da ordem
+            print(f"[ERRO] {arquivo_csv}: data {data_venda} repetida (já informada em {datas_vistas[converter_data(data_venda)]})")
+            status[(arquivo_csv, data_venda)] = False
+        elif not os.path.exists(arquivo_csv):
+            print(f"[ERRO] Arquivo {arquivo_csv} não encontrado!")
+            status[(arquivo_csv, data_venda)] = False
+        else:
+            datas_vistas[converter_data(data_venda)] = arquivo_csv
+            validos.append((arquivo_csv, data_venda))
+    
+    if not validos:
+        print("[ERRO] Nenhuma exportação válida para importar")
+        return status
+    
+    nomes_colunas = ler_nomes_colunas(arquivo_colunas)
+    if not nomes_colunas:
+        return {dia: False for dia in dias}
+    
+    _preparar_historico(arquivo_parquet)
+    
+    assinaturas = {}
+    pendentes = []
+    for arquivo_csv, data_venda in validos:
+        assinatura = assinatura_importacao(arquivo_csv, nomes_colunas)
+        if not forcar and importacao_atual(assinatura, data_venda, arquivo_parquet):
+            print(f"[OK] {data_venda} ({arquivo_csv}) já importado, nada a fazer")
+            status[(arquivo_csv, data_venda)] = True
+            continue
+        assinaturas[data_venda] = assinatura
+        pendentes.append((arquivo_csv, data_venda))
+    
+    if not pendentes:
+        print("\n[OK] Todas as exportações já estavam importadas")
+        return {dia: status[dia] for dia in dias}
+    
+    # Uma escrita do manifesto para todas as datas, antes de os processos gravarem
+    descartar_hash_origem([data_venda for _, data_venda in pendentes], arquivo_parquet)
+    
+    processos = max(1, min(processos or os.cpu_count() or 1, len(pendentes)))
+    print(f"\n[INFO] Importando {len(pendentes)} dia(s) com {processos} processo(s)...")
+    
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {
+            executor.submit(
+                _importar_dia_em_processo, arquivo_csv, nomes_colunas, data_venda,
+                arquivo_parquet, linhas_por_lote, origem
+            ): (arquivo_csv, data_venda)
+            for arquivo_csv, data_venda in pendentes
+        }
+        for futuro in as_completed(futuros):
+            arquivo_csv, data_venda = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except UnicodeDecodeError:
+                print(f"\n[ERRO] {data_venda} ({arquivo_csv}): nenhum encoding testado leu o arquivo")
+                status[(arquivo_csv, data_venda)] = False
+                continue
+            except Exception as e:
+                print(f"\n[ERRO] {data_venda} ({arquivo_csv}): {e}")
+                print(f"   [AVISO] A partição de {data_venda} não foi alterada")
+                status[(arquivo_csv, data_venda)] = False
+                continue
+            
+            print(f"\n[OK] {data_venda} ({arquivo_csv}, '{resultado['encoding']}'): "
+                  f"{resultado['linhas_originais']} linhas lidas, {resultado['linhas_finais']} mantidas")
+            erros_numericos = sum(resultado['erros_numericos'].values())
+            if erros_numericos:
+                print(f"   [AVISO] {erros_numericos} valores numéricos malformados")
+            if resultado['registrar_encoding']:
+                registrar_encoding(origem or os.path.basename(arquivo_csv), resultado['encoding'])
+            
+            status[(arquivo_csv, data_venda)] = True
+            if resultado['compactado'] is not None:
+                status[(arquivo_csv, data_venda)] = salvar_no_banco_parquet(
+                    resultado['compactado'], arquivo_parquet, data_venda,
+                    resultado['registros'], verboso=False,
+                    assinatura=assinaturas[data_venda]
+                )
+    
+    importados = sum(status.values())
+    print("\n" + "="*60)
+    print(f"IMPORTAÇÃO CONCLUÍDA: {importados} de {len(status)} dia(s)")
+    print("="*60)
+    for arquivo_csv, data_venda in dias:
+        importado = status[(arquivo_csv, data_venda)]
+        print(f"  {data_venda} {'[OK]' if importado else '[ERRO]'} {arquivo_csv}")
+    
+    return status
 
 
 def main():
-    """Função principal"""
+    """
+    Função principal
+
+    Sem argumentos pergunta a data e importa data/grid_tmp_abcmerc.csv. Com
+    argumentos roda sem interação:
+
+        python tratamento_abc.py --data 30/11/25
+        python tratamento_abc.py --dia abc_29.csv 29/11/25 --dia abc_30.csv 30/11/25
+        python tratamento_abc.py --diretorio exportacoes/ --processos 4
+    """
+    parser = argparse.ArgumentParser(description="Tratamento e importação das exportações ABC")
+    parser.add_argument('--data', help="Data de venda (dd/mm/yy) do CSV padrão, sem perguntar")
+    parser.add_argument('--csv', default='data/grid_tmp_abcmerc.csv', help="CSV importado com --data")
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADO_ABC, help="Resultado (Parquet) gerado com --data")
+    parser.add_argument('--excel', action='store_true', help="Gera também o Excel do resultado (.xlsx ao lado de --saida)")
+    parser.add_argument('--dia', nargs=2, action='append', default=[], metavar=('CSV', 'DATA'),
+                        help="Exportação e data de venda (dd/mm/yy); pode ser repetido")
+    parser.add_argument('--diretorio', help="Diretório de exportações com a data no nome do arquivo")
+    parser.add_argument('--processos', type=int, help="Dias importados em paralelo (padrão: um por CPU)")
+    parser.add_argument('--colunas', default='data/colunas.txt', help="Arquivo com os nomes das colunas")
+    parser.add_argument('--origem', help="Sistema de origem das exportações (cache de encodings)")
+    parser.add_argument('--forcar', action='store_true', help="Reimporta mesmo exportações já importadas")
+    parser.add_argument('--lote', type=int, default=LINHAS_POR_LOTE, help="Linhas do CSV processadas por vez")
+    args = parser.parse_args()
+    
+    if args.dia or args.diretorio:
+        if args.data:
+            parser.error("--data não pode ser combinado com --dia/--diretorio")
+        dias = list(args.dia)
+        if args.diretorio:
+            dias += listar_exportacoes(args.diretorio)
+        status = processar_lote_abc(
+            dias, args.colunas, processos=args.processos,
+            linhas_por_lote=args.lote, origem=args.origem, forcar=args.forcar
+        )
+        sys.exit(0 if status and all(status.values()) else 1)
     
-    # Define arquivos
-    arquivo_csv = 'data/grid_tmp_abcmerc.csv'
-    arquivo_colunas = 'data/colunas.txt'
-    arquivo_saida = 'data/resultado_abc.xlsx'
+    if args.data is not None and validar_data(args.data) is None:
+        parser.error(f"data inválida '{args.data}' (use dd/mm/yy)")
     
-    # Processa
-    processar_arquivo_abc(arquivo_csv, arquivo_colunas, arquivo_saida)
+    # Processa (sem --data pergunta a data ao usuário)
+    if not processar_arquivo_abc(
+        args.csv, args.colunas, args.saida, args.lote, args.origem, args.data, args.forcar,
+        arquivo_excel=caminho_excel(args.saida) if args.excel else None
+    ):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -8,16 +8,30 @@ Script para consultar o banco de dados de vendas em formato Parquet
 
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+# Adiciona diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def consultar_vendas_por_data(data_venda=None, arquivo_parquet='data/vendas_historico.parquet'):
+from src.banco_vendas import (
+    ARQUIVO_HISTORICO,
+    converter_chave,
+    converter_data,
+    formatar_codigo,
+    formatar_data,
+    formatar_loja,
+    ler_historico,
+)
+
+
+def consultar_vendas_por_data(data_venda=None, arquivo_parquet=ARQUIVO_HISTORICO):
     """
     Consulta vendas por data específica
     
     Args:
         data_venda: Data no formato dd/mm/yy (None = todas as datas)
-        arquivo_parquet: Caminho do arquivo Parquet
+        arquivo_parquet: Caminho do dataset Parquet
     """
     if not os.path.exists(arquivo_parquet):
         print(f"❌ Banco de dados não encontrado: {arquivo_parquet}")
@@ -29,12 +43,12 @@ def consultar_vendas_por_data(data_venda=None, arquivo_parquet='data/vendas_hist
     
     # Carregar banco
     print(f"\n📂 Carregando banco de dados...")
-    df = pd.read_parquet(arquivo_parquet)
+    df = ler_historico(arquivo_parquet)
     print(f"[OK] {len(df)} registros carregados")
     
     # Filtrar por data se especificado
     if data_venda:
-        df_filtrado = df[df['data_venda'] == data_venda]
+        df_filtrado = df[df['data_venda'] == pd.Timestamp(converter_data(data_venda))]
         print(f"\n🔍 Filtrando por data: {data_venda}")
         print(f"[OK] {len(df_filtrado)} registros encontrados")
         return df_filtrado
@@ -42,7 +56,7 @@ def consultar_vendas_por_data(data_venda=None, arquivo_parquet='data/vendas_hist
     return df
 
 
-def estatisticas_vendas(arquivo_parquet='data/vendas_historico.parquet'):
+def estatisticas_vendas(arquivo_parquet=ARQUIVO_HISTORICO):
     """
     Mostra estatísticas gerais do banco de vendas
     """
@@ -54,49 +68,49 @@ def estatisticas_vendas(arquivo_parquet='data/vendas_historico.parquet'):
     print("ESTATÍSTICAS DO BANCO DE VENDAS")
     print("="*60)
     
-    df = pd.read_parquet(arquivo_parquet)
+    df = ler_historico(arquivo_parquet)
     
     print(f"\n📊 Total de registros: {len(df):,}")
-    print(f"📅 Período: {df['data_venda'].min()} a {df['data_venda'].max()}")
+    print(f"📅 Período: {formatar_data(df['data_venda'].min())} a {formatar_data(df['data_venda'].max())}")
     print(f"🏪 Lojas: {df['loja'].nunique()}")
     print(f"📦 Produtos únicos: {df['codigo_interno'].nunique()}")
     
     print(f"\n📅 Registros por data:")
     for data, count in df['data_venda'].value_counts().sort_index().items():
-        print(f"   {data}: {count:,} registros")
+        print(f"   {formatar_data(data)}: {count:,} registros")
     
     print(f"\n🏪 Registros por loja:")
     for loja, count in df['loja'].value_counts().sort_index().items():
-        print(f"   Loja {loja}: {count:,} registros")
+        print(f"   Loja {formatar_loja(loja)}: {count:,} registros")
     
     print(f"\n📦 Top 10 produtos (por quantidade vendida total):")
-    top_produtos = df.groupby(['codigo_interno', 'descricao'])['quantidade_vendida'].sum().sort_values(ascending=False).head(10)
+    top_produtos = df.groupby(['codigo_interno', 'descricao'], observed=True)['quantidade_vendida'].sum().sort_values(ascending=False).head(10)
     for (codigo, descricao), qtd in top_produtos.items():
-        print(f"   {codigo} - {descricao[:40]}: {qtd:,.0f} unidades")
+        print(f"   {formatar_codigo(codigo)} - {descricao[:40]}: {qtd:,.0f} unidades")
     
     print(f"\n🏬 Top 5 seções (por registros):")
     for secao, count in df['secao'].value_counts().head(5).items():
         print(f"   {secao}: {count:,} registros")
 
 
-def consultar_produto(codigo_interno, arquivo_parquet='data/vendas_historico.parquet'):
+def consultar_produto(codigo_interno, arquivo_parquet=ARQUIVO_HISTORICO):
     """
     Consulta histórico de vendas de um produto específico
     
     Args:
         codigo_interno: Código do produto
-        arquivo_parquet: Caminho do arquivo Parquet
+        arquivo_parquet: Caminho do dataset Parquet
     """
     if not os.path.exists(arquivo_parquet):
         print(f"❌ Banco de dados não encontrado: {arquivo_parquet}")
         return None
     
     print("="*60)
-    print(f"HISTÓRICO DO PRODUTO: {codigo_interno}")
+    print(f"HISTÓRICO DO PRODUTO: {formatar_codigo(codigo_interno)}")
     print("="*60)
     
-    df = pd.read_parquet(arquivo_parquet)
-    df_produto = df[df['codigo_interno'] == codigo_interno]
+    df = ler_historico(arquivo_parquet)
+    df_produto = df[df['codigo_interno'] == converter_chave(codigo_interno)]
     
     if len(df_produto) == 0:
         print(f"\n[ERRO] Produto {codigo_interno} não encontrado no banco")
@@ -114,16 +128,16 @@ def consultar_produto(codigo_interno, arquivo_parquet='data/vendas_historico.par
     }).rename(columns={'loja': 'lojas_venderam'})
     
     for data, row in vendas_por_data.iterrows():
-        print(f"   {data}: {row['quantidade_vendida']:,.0f} unidades, R$ {row['valor_venda']}, {row['lojas_venderam']} lojas")
+        print(f"   {formatar_data(data)}: {row['quantidade_vendida']:,.0f} unidades, R$ {row['valor_venda']}, {row['lojas_venderam']} lojas")
     
     print(f"\n🏪 Vendas por loja:")
-    vendas_por_loja = df_produto.groupby('loja').agg({
+    vendas_por_loja = df_produto.groupby('loja', observed=True).agg({
         'quantidade_vendida': 'sum',
         'valor_venda': lambda x: f"{sum(x):,.2f}"
     })
     
     for loja, row in vendas_por_loja.iterrows():
-        print(f"   Loja {loja}: {row['quantidade_vendida']:,.0f} unidades, R$ {row['valor_venda']}")
+        print(f"   Loja {formatar_loja(loja)}: {row['quantidade_vendida']:,.0f} unidades, R$ {row['valor_venda']}")
     
     return df_produto
 
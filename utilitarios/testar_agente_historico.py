@@ -8,12 +8,14 @@ Demonstra como o agente usa dados históricos para análises mais robustas
 
 import sys
 import os
+import time
 
 # Adiciona diretório raiz ao path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.agente_estoque import AgenteEstoque
 from src.analise_historico import AnalisadorHistorico
+from src.banco_vendas import formatar_codigo, formatar_data, formatar_loja
 
 
 def testar_historico():
@@ -24,7 +26,7 @@ def testar_historico():
     
     analisador = AnalisadorHistorico()
     
-    if analisador.df is None:
+    if not analisador.possui_dados():
         print("❌ Sem dados históricos disponíveis")
         print("   Execute 'python tratamento_abc.py' primeiro")
         return False
@@ -33,7 +35,7 @@ def testar_historico():
     stats = analisador.obter_estatisticas_gerais()
     print(f"\n📊 Estatísticas Gerais:")
     print(f"   Total registros: {stats['total_registros']:,}")
-    print(f"   Período: {stats['periodo']['inicio']} a {stats['periodo']['fim']}")
+    print(f"   Período: {formatar_data(stats['periodo']['inicio'])} a {formatar_data(stats['periodo']['fim'])}")
     print(f"   Lojas: {stats['lojas']}")
     print(f"   Produtos: {stats['produtos_unicos']:,}")
     
@@ -54,7 +56,7 @@ def testar_analise_produto():
     
     analisador = AnalisadorHistorico()
     
-    if analisador.df is None:
+    if not analisador.possui_dados():
         return
     
     # Pegar um produto do top 5
@@ -98,6 +100,39 @@ def testar_analise_produto():
         print(f"   Quantidade a pedir: {cobertura['necessidade']['quantidade_pedir']:.0f} unidades")
 
 
+def testar_estatisticas_lote():
+    """Testa estatísticas de todos os produtos/lojas em uma única passada"""
+    print("\n" + "="*60)
+    print("TESTE 4: ESTATÍSTICAS EM LOTE (TODO O CATÁLOGO)")
+    print("="*60)
+    
+    analisador = AnalisadorHistorico()
+    
+    if not analisador.possui_dados():
+        return
+    
+    inicio = time.perf_counter()
+    lote = analisador.calcular_estatisticas_lote(dias_cobertura=4)
+    duracao = time.perf_counter() - inicio
+    
+    print(f"\n📊 {len(lote):,} combinações produto x loja em {duracao:.2f}s")
+    
+    print(f"\n🔍 Status de cobertura (estoque do último dia):")
+    for status, quantidade in lote['status'].value_counts().items():
+        print(f"   {status}: {quantidade:,}")
+    
+    print(f"\n📈 Tendências:")
+    for tendencia, quantidade in lote['tendencia'].value_counts().items():
+        print(f"   {tendencia}: {quantidade:,}")
+    
+    criticos = lote[lote['status'] == 'CRITICO'].nlargest(5, 'quantidade_pedir')
+    if not criticos.empty:
+        print(f"\n🚨 Top 5 críticos (maior quantidade a pedir):")
+        for item in criticos.itertuples():
+            print(f"   {formatar_codigo(item.codigo_interno)} loja {formatar_loja(item.loja)} - {item.descricao[:40]}: "
+                  f"{item.dias_cobertura_atual:.1f} dias, pedir {item.quantidade_pedir:.0f}")
+
+
 def testar_agente_com_historico():
     """Testa agente IA usando histórico"""
     print("\n" + "="*60)
@@ -150,6 +185,7 @@ def menu():
     print("2. Testar análise detalhada de produto")
     print("3. Testar agente IA com histórico (LLaMA 3)")
     print("4. Executar todos os testes")
+    print("5. Estatísticas em lote (todo o catálogo)")
     print("0. Sair")
     
     opcao = input("\nEscolha uma opção: ").strip()
@@ -175,6 +211,9 @@ def menu():
             if resposta == 's':
                 testar_agente_com_historico()
     
+    elif opcao == "5":
+        testar_estatisticas_lote()
+    
     else:
         print("❌ Opção inválida!")
     